@@ -0,0 +1,63 @@
+from sqlalchemy import text
+from app.core.database import engine
+
+
+def add_ingredient_name_unique():
+    """
+    规范化ingredients.name（去除首尾空白、合并连续空白、转为小写），
+    合并重复食材后在name上创建唯一索引
+    """
+    try:
+        with engine.connect() as conn:
+            print("规范化食材名称...")
+            conn.execute(text("""
+                CREATE TEMP TABLE ingredient_name_map ON COMMIT DROP AS
+                SELECT ingredient_id,
+                       lower(regexp_replace(btrim(name), '\\s+', ' ', 'g')) AS normalized_name,
+                       min(ingredient_id) OVER (
+                           PARTITION BY lower(regexp_replace(btrim(name), '\\s+', ' ', 'g'))
+                       ) AS keep_id
+                FROM app_schema.ingredients
+            """))
+            
+            # 将关联记录指向保留的食材
+            result = conn.execute(text("""
+                UPDATE app_schema.recipe_ingredients ri
+                SET ingredient_id = m.keep_id
+                FROM ingredient_name_map m
+                WHERE ri.ingredient_id = m.ingredient_id AND m.ingredient_id <> m.keep_id
+            """))
+            print(f"已重新关联 {result.rowcount} 条食谱食材记录")
+            
+            result = conn.execute(text("""
+                DELETE FROM app_schema.ingredients i
+                USING ingredient_name_map m
+                WHERE i.ingredient_id = m.ingredient_id AND m.ingredient_id <> m.keep_id
+            """))
+            print(f"已删除 {result.rowcount} 条重复食材")
+            
+            conn.execute(text("""
+                UPDATE app_schema.ingredients i
+                SET name = m.normalized_name
+                FROM ingredient_name_map m
+                WHERE i.ingredient_id = m.ingredient_id AND i.name <> m.normalized_name
+            """))
+            
+            conn.commit()
+        
+        # CREATE INDEX CONCURRENTLY 不能在事务中执行，使用自动提交模式
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            print("创建唯一索引 ux_ingredients_name...")
+            conn.execute(text("""
+                CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_ingredients_name
+                ON app_schema.ingredients (name)
+            """))
+            print("唯一索引创建成功!")
+        
+        print("食材名称迁移完成!")
+    
+    except Exception as e:
+        print(f"迁移食材名称时出错: {str(e)}")
+
+if __name__ == "__main__":
+    add_ingredient_name_unique()
@@ -0,0 +1,54 @@
+from app.core.database import engine
+from sqlalchemy import text
+
+# 需要创建的食谱相关索引
+RECIPE_INDEXES = [
+    {
+        "name": "ix_recipes_created_at_recipe_id",
+        "ddl": """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recipes_created_at_recipe_id
+            ON app_schema.recipes (created_at, recipe_id)
+        """,
+    },
+    {
+        # 趋势排行增量读取收藏事件
+        "name": "ix_favorites_created_at_recipe_id",
+        "ddl": """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_favorites_created_at_recipe_id
+            ON app_schema.favorites (created_at, recipe_id)
+        """,
+    },
+    {
+        # 趋势排行增量读取评分事件
+        "name": "ix_ratings_created_at_recipe_id",
+        "ddl": """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ratings_created_at_recipe_id
+            ON app_schema.ratings (created_at, recipe_id, score)
+        """,
+    },
+]
+
+try:
+    # CREATE INDEX CONCURRENTLY 不能在事务中执行，使用自动提交模式
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        print('开始创建食谱相关索引...')
+        
+        for index in RECIPE_INDEXES:
+            print(f"创建索引 {index['name']} ...")
+            conn.execute(text(index["ddl"]))
+            print(f"索引 {index['name']} 创建成功")
+        
+        # 验证索引是否已创建
+        print('\n验证索引创建结果:')
+        for index in RECIPE_INDEXES:
+            result = conn.execute(text("""
+                SELECT 1 FROM pg_indexes
+                WHERE schemaname = 'app_schema' AND indexname = :index_name
+            """), {"index_name": index["name"]})
+            exists = result.fetchone() is not None
+            print(f"索引 {index['name']}: {'创建成功' if exists else '创建失败'}")
+        
+        print('\n索引更新完成！')
+        
+except Exception as e:
+    print(f"创建索引失败: {str(e)}")
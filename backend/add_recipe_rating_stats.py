@@ -0,0 +1,57 @@
+from sqlalchemy import text
+from app.core.database import engine
+
+
+def add_recipe_rating_stats():
+    """
+    为recipes表添加评分聚合字段(rating_count/rating_sum/rating_avg)，
+    根据ratings表回填现有数据，并创建按评分排序的索引
+    """
+    try:
+        with engine.connect() as conn:
+            print("添加评分聚合字段...")
+            conn.execute(text("""
+                ALTER TABLE app_schema.recipes
+                ADD COLUMN IF NOT EXISTS rating_count INTEGER NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS rating_sum INTEGER NOT NULL DEFAULT 0
+            """))
+            conn.execute(text("""
+                ALTER TABLE app_schema.recipes
+                ADD COLUMN IF NOT EXISTS rating_avg DOUBLE PRECISION
+                GENERATED ALWAYS AS (
+                    CASE WHEN rating_count > 0 THEN rating_sum::float8 / rating_count END
+                ) STORED
+            """))
+            print("评分聚合字段添加成功!")
+            
+            print("回填评分聚合数据...")
+            result = conn.execute(text("""
+                UPDATE app_schema.recipes r
+                SET rating_count = s.rating_count, rating_sum = s.rating_sum
+                FROM (
+                    SELECT recipe_id, count(*) AS rating_count, sum(score) AS rating_sum
+                    FROM app_schema.ratings
+                    GROUP BY recipe_id
+                ) s
+                WHERE r.recipe_id = s.recipe_id
+            """))
+            print(f"已回填 {result.rowcount} 个食谱的评分聚合")
+            
+            conn.commit()
+        
+        # CREATE INDEX CONCURRENTLY 不能在事务中执行，使用自动提交模式
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            print("创建索引 ix_recipes_rating...")
+            conn.execute(text("""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recipes_rating
+                ON app_schema.recipes (rating_avg DESC NULLS LAST, rating_count DESC, created_at DESC, recipe_id DESC)
+            """))
+            print("索引创建成功!")
+        
+        print("评分聚合迁移完成!")
+    
+    except Exception as e:
+        print(f"迁移评分聚合时出错: {str(e)}")
+
+if __name__ == "__main__":
+    add_recipe_rating_stats()
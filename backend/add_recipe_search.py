@@ -0,0 +1,66 @@
+from app.core.database import engine
+from app.models.recipe import (
+    SEARCH_VECTOR_FUNCTION, SEARCH_VECTOR_TRIGGER_FUNCTION, SEARCH_VECTOR_TRIGGER
+)
+from sqlalchemy import text
+
+# 为create_all之前创建的recipes表补装全文检索；新建的表由app.models.recipe在建表时安装
+
+try:
+    with engine.connect() as conn:
+        print('开始配置食谱全文检索...')
+        
+        # 启用三元组扩展，用于中文等未分词文本的模糊匹配
+        print('启用 pg_trgm 扩展...')
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.commit()
+        
+        # 添加search_vector字段
+        print('添加 search_vector 字段...')
+        conn.execute(text("""
+            ALTER TABLE app_schema.recipes
+            ADD COLUMN IF NOT EXISTS search_vector tsvector
+        """))
+        conn.commit()
+        
+        # 创建计算函数和触发器
+        print('创建全文检索函数和触发器...')
+        conn.execute(text(SEARCH_VECTOR_FUNCTION))
+        conn.execute(text(SEARCH_VECTOR_TRIGGER_FUNCTION))
+        conn.execute(text("DROP TRIGGER IF EXISTS trg_recipes_search_vector ON app_schema.recipes"))
+        conn.execute(text(SEARCH_VECTOR_TRIGGER))
+        conn.commit()
+        
+        # 回填现有食谱
+        print('回填现有食谱的 search_vector ...')
+        result = conn.execute(text("""
+            UPDATE app_schema.recipes
+            SET search_vector = app_schema.recipe_search_vector(
+                title, description, instructions, to_jsonb(ingredients)
+            )
+        """))
+        conn.commit()
+        print(f'已回填 {result.rowcount} 条食谱')
+        
+    # CREATE INDEX CONCURRENTLY 不能在事务中执行，使用自动提交模式
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        print('创建索引...')
+        conn.execute(text("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recipes_search_vector
+            ON app_schema.recipes USING gin (search_vector)
+        """))
+        conn.execute(text("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recipes_title_trgm
+            ON app_schema.recipes USING gin (title gin_trgm_ops)
+        """))
+        conn.execute(text("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recipes_description_trgm
+            ON app_schema.recipes USING gin (description gin_trgm_ops)
+        """))
+        print('索引创建成功')
+        
+        print('\n全文检索配置完成！')
+        print('建议重启后端服务以应用更改。')
+        
+except Exception as e:
+    print(f"配置全文检索失败: {str(e)}")
@@ -1,9 +1,13 @@
+import asyncio
 import json
 import logging
+import random
 import re
-from typing import Dict, Any, Optional
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 import httpx
+from app.ai_service.cache import ai_recipe_cache, recipe_cache_key
 from app.ai_service.config import get_ai_settings
+from app.ai_service.streaming import IncrementalJSONParser, parse_sse_data
 from app.ai_service.exceptions import (
     AIServiceError,
     APIConnectionError,
@@ -23,7 +27,14 @@ class AIClient:
     def __init__(self):
         self.settings = get_ai_settings()
         self.api_provider = "alipan"  # 固定使用通义千问
-        self.timeout = httpx.Timeout(30.0)
+        self.timeout = httpx.Timeout(
+            self.settings.QWEN_TIMEOUT,
+            connect=self.settings.QWEN_CONNECT_TIMEOUT
+        )
+        
+        # 共享的HTTP客户端（连接池）和并发请求信号量
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._request_semaphore = asyncio.Semaphore(self.settings.QWEN_MAX_CONCURRENCY)
         
         # 初始化通义千问配置
         self.api_key = self.settings.QWEN_API_KEY
@@ -50,7 +61,8 @@ class AIClient:
         self,
         prompt: str,
         max_tokens: Optional[int] = None,
-        temperature: Optional[float] = None
+        temperature: Optional[float] = None,
+        stream: bool = False
     ) -> Dict[str, Any]:
         """
         准备聊天完成请求
@@ -59,6 +71,7 @@ class AIClient:
             prompt: 用户提示词
             max_tokens: 最大令牌数
             temperature: 温度参数
+            stream: 是否请求增量输出（流式）
         
         Returns:
             请求体字典
@@ -66,7 +79,7 @@ class AIClient:
         # 通义千问请求格式
         system_prompt = self.settings.SYSTEM_PROMPT
         
-        return {
+        request_body = {
             "model": self.model,
             "input": {
                 "messages": [
@@ -80,13 +93,90 @@ class AIClient:
                 "result_format": "text"
             }
         }
+        if stream:
+            # 每个SSE事件只返回新生成的文本，而不是截至目前的全部文本
+            request_body["parameters"]["incremental_output"] = True
+        return request_body
+    
+    def _create_http_client(self) -> httpx.AsyncClient:
+        """
+        创建带连接池的HTTP客户端
+        
+        Returns:
+            httpx.AsyncClient实例
+        """
+        http2 = self.settings.QWEN_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("未安装h2包，AI客户端回退到HTTP/1.1")
+                http2 = False
+        
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.settings.QWEN_MAX_CONNECTIONS,
+                max_keepalive_connections=self.settings.QWEN_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=self.settings.QWEN_KEEPALIVE_EXPIRY
+            ),
+            http2=http2
+        )
+    
+    async def startup(self) -> None:
+        """
+        创建长期复用的HTTP客户端（由应用lifespan调用）
+        """
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = self._create_http_client()
+            logger.info(
+                f"AI客户端连接池已创建，最大连接数: {self.settings.QWEN_MAX_CONNECTIONS}，"
+                f"最大并发请求: {self.settings.QWEN_MAX_CONCURRENCY}"
+            )
+    
+    async def shutdown(self) -> None:
+        """
+        关闭HTTP客户端及其连接池（由应用lifespan调用）
+        """
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+            logger.info("AI客户端连接池已关闭")
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """
+        获取HTTP客户端，未通过lifespan启动时（如脚本中使用）按需创建
+        """
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = self._create_http_client()
+        return self._http_client
+    
+    def _retry_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        计算第attempt次重试前的等待时间（指数退避加随机抖动）
+        
+        Args:
+            attempt: 已重试次数（从0开始）
+            retry_after: 服务端通过Retry-After要求的等待时间
+        
+        Returns:
+            等待秒数
+        """
+        backoff = min(
+            self.settings.QWEN_RETRY_BACKOFF_MAX,
+            self.settings.QWEN_RETRY_BACKOFF_BASE * (2 ** attempt)
+        )
+        delay = backoff * (0.5 + random.random() / 2)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.settings.QWEN_RETRY_BACKOFF_MAX))
+        return delay
     
     async def _make_async_request(
         self,
         request_body: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        发送异步HTTP请求
+        发送异步HTTP请求，速率限制、超时、连接错误和5xx错误时按指数退避重试
         
         Args:
             request_body: 请求体
@@ -106,37 +196,90 @@ class AIClient:
         logger.info(f"请求URL: {self.api_base_url}")
         logger.info(f"请求超时设置: {self.timeout}")
         
+        attempt = 0
+        while True:
+            try:
+                return await self._send_request(headers, request_body)
+            except (RateLimitError, APIConnectionError) as e:
+                if attempt >= self.settings.QWEN_MAX_RETRIES:
+                    logger.error(f"AI API请求重试{attempt}次后仍然失败: {e.detail}")
+                    raise
+                delay = self._retry_delay(attempt, getattr(e, "retry_after", None))
+                attempt += 1
+                logger.warning(f"AI API请求失败({e.detail})，{delay:.2f}秒后进行第{attempt}次重试")
+                await asyncio.sleep(delay)
+    
+    def _raise_for_status(self, response: httpx.Response) -> None:
+        """
+        根据状态码抛出对应的AI服务异常
+        
+        Args:
+            response: HTTP响应
+        
+        Raises:
+            AuthenticationError: 认证错误
+            RateLimitError: 速率限制错误（附带retry_after）
+            APIConnectionError: 服务端错误
+            AIServiceError: 其他非200响应
+        """
+        # 检查响应状态码
+        if response.status_code == 401:
+            logger.error("API认证失败，可能是API密钥无效")
+            raise AuthenticationError("Invalid API key or authentication failed")
+        elif response.status_code == 429:
+            logger.error("API速率限制被触发")
+            error = RateLimitError("API rate limit exceeded")
+            try:
+                error.retry_after = float(response.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                error.retry_after = None
+            raise error
+        elif response.status_code >= 500:
+            logger.error(f"API服务器错误，状态码: {response.status_code}")
+            raise APIConnectionError(f"API server error: {response.status_code}")
+        elif response.status_code != 200:
+            logger.error(f"API请求失败，状态码: {response.status_code}")
+            raise AIServiceError(f"API request failed: {response.status_code}")
+    
+    async def _send_request(
+        self,
+        headers: Dict[str, str],
+        request_body: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        通过共享连接池发送一次请求，同时进行的请求数受信号量限制
+        
+        Args:
+            headers: 请求头
+            request_body: 请求体
+        
+        Returns:
+            API响应
+        """
+        client = self._get_http_client()
+        
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with self._request_semaphore:
                 logger.info("开始发送POST请求到AI服务API")
                 response = await client.post(
                     url=self.api_base_url,
                     headers=headers,
                     json=request_body
                 )
-                
-                logger.info(f"API请求完成，状态码: {response.status_code}")
-                
-                # 检查响应状态码
-                if response.status_code == 401:
-                    logger.error("API认证失败，可能是API密钥无效")
-                    raise AuthenticationError("Invalid API key or authentication failed")
-                elif response.status_code == 429:
-                    logger.error("API速率限制被触发")
-                    raise RateLimitError("API rate limit exceeded")
-                elif response.status_code >= 500:
-                    logger.error(f"API服务器错误，状态码: {response.status_code}")
-                    raise APIConnectionError(f"API server error: {response.status_code}")
-                elif response.status_code != 200:
-                    logger.error(f"API请求失败，状态码: {response.status_code}")
-                    raise AIServiceError(f"API request failed: {response.status_code}")
-                
-                # 解析响应
-                logger.info("开始解析API响应")
-                response_json = response.json()
-                logger.info(f"成功获取API响应，响应结构: {list(response_json.keys())}")
-                return response_json
-                
+            
+            logger.info(f"API请求完成，状态码: {response.status_code}")
+            
+            self._raise_for_status(response)
+            
+            # 解析响应
+            logger.info("开始解析API响应")
+            response_json = response.json()
+            logger.info(f"成功获取API响应，响应结构: {list(response_json.keys())}")
+            return response_json
+
+        except AIServiceError:
+            # 上面按状态码抛出的异常已记录日志，直接交给重试逻辑处理
+            raise
         except httpx.ConnectError as e:
             logger.error(f"连接AI API失败: {str(e)}")
             raise APIConnectionError("Failed to connect to AI API")
@@ -150,31 +293,87 @@ class AIClient:
             logger.error(f"API请求处理异常: {str(e)}", exc_info=True)
             raise
     
-    async def generate_recipe(
+    async def _stream_request(
         self,
-        recipe_params: Dict[str, Any]
-    ) -> Dict[str, Any]:
+        request_body: Dict[str, Any]
+    ) -> AsyncIterator[str]:
         """
-        生成个性化食谱
+        以SSE方式请求增量输出，逐段返回模型新生成的文本
+        
+        在收到第一段文本之前，速率限制、超时、连接错误和5xx错误按指数退避重试；
+        已经开始输出后出错则直接抛出，避免重复输出。
         
         Args:
-            recipe_params: 食谱生成参数
+            request_body: 请求体（需设置incremental_output）
         
-        Returns:
-            生成的食谱数据，包含食谱内容和配图URL
+        Yields:
+            新生成的文本片段
+        """
+        headers = self._prepare_request_headers()
+        headers["Accept"] = "text/event-stream"
+        headers["X-DashScope-SSE"] = "enable"
+        client = self._get_http_client()
         
-        Raises:
-            AIServiceError: AI服务错误
+        attempt = 0
+        while True:
+            received = False
+            try:
+                async with self._request_semaphore:
+                    async with client.stream(
+                        "POST",
+                        self.api_base_url,
+                        headers=headers,
+                        json=request_body
+                    ) as response:
+                        logger.info(f"流式API请求已建立，状态码: {response.status_code}")
+                        self._raise_for_status(response)
+                        
+                        async for line in response.aiter_lines():
+                            data = parse_sse_data(line)
+                            if not data:
+                                continue
+                            payload = json.loads(data)
+                            output = payload.get("output")
+                            if not isinstance(output, dict):
+                                # 服务端在流中返回的错误事件
+                                message = payload.get("message") or payload.get("code") or data
+                                raise AIServiceError(f"AI stream error: {message}")
+                            text = output.get("text") or ""
+                            if text:
+                                received = True
+                                yield text
+                return
+            except (RateLimitError, APIConnectionError) as e:
+                if received or attempt >= self.settings.QWEN_MAX_RETRIES:
+                    raise
+                delay = self._retry_delay(attempt, getattr(e, "retry_after", None))
+                attempt += 1
+                logger.warning(f"流式AI API请求失败({e.detail})，{delay:.2f}秒后进行第{attempt}次重试")
+                await asyncio.sleep(delay)
+            except AIServiceError:
+                raise
+            except (httpx.ConnectError, httpx.TimeoutException) as e:
+                if received or attempt >= self.settings.QWEN_MAX_RETRIES:
+                    logger.error(f"流式AI API请求失败: {str(e)}")
+                    raise APIConnectionError("AI API stream interrupted")
+                delay = self._retry_delay(attempt)
+                attempt += 1
+                logger.warning(f"流式AI API连接失败({str(e)})，{delay:.2f}秒后进行第{attempt}次重试")
+                await asyncio.sleep(delay)
+            except (ValueError, json.JSONDecodeError) as e:
+                logger.error(f"解析流式API响应失败: {str(e)}")
+                raise InvalidResponseError("Failed to parse API stream")
+    
+    def _build_recipe_prompt(self, recipe_params: Dict[str, Any]) -> str:
         """
-        logger.info(f"=== 开始生成食谱，API提供商: {self.api_provider} ===")
-        logger.info(f"食谱参数类型: {type(recipe_params)}")
-        logger.info(f"食谱参数详情: {recipe_params}")
-        logger.info(f"食谱参数包含的键: {list(recipe_params.keys())}")
+        预处理食谱生成参数并格式化提示词
         
-        # 检查cuisine参数是否存在
-        cuisine_value = recipe_params.get("cuisine")
-        logger.info(f"cuisine参数值: {cuisine_value}, 类型: {type(cuisine_value)}")
+        Args:
+            recipe_params: 食谱生成参数
         
+        Returns:
+            用户提示词
+        """
         # 预处理参数，确保所有枚举值都被转换为字符串
         processed_params = {}
         for key, value in recipe_params.items():
@@ -211,12 +410,85 @@ class AIClient:
         # 格式化提示词
         prompt = self.settings.RECIPE_GENERATION_PROMPT_TEMPLATE.format(**processed_params)
         logger.info(f"构建提示词完成，提示词长度: {len(prompt)} 字符")
+        return prompt
+    
+    async def _finalize_recipe(
+        self,
+        recipe_params: Dict[str, Any],
+        recipe_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        为解析后的食谱补充配图、菜系和标签字段
         
-        # 准备请求
-        request_body = self._prepare_chat_completion_request(prompt)
-        logger.info(f"准备请求体完成，请求体结构: {list(request_body.keys())}")
+        Args:
+            recipe_params: 食谱生成参数
+            recipe_data: 解析并验证后的食谱数据
         
-        try:
+        Returns:
+            最终食谱数据
+        """
+        # 生成食谱配图
+        logger.info("=== 开始生成食谱配图 ===")
+        cuisine = recipe_params.get("cuisine", "")
+        title = recipe_data.get("title", "")
+        logger.info(f"使用食谱标题: '{title}'，菜系: '{cuisine}' 生成配图")
+        
+        # 调用generate_recipe_image方法
+        image_url = await self.generate_recipe_image(cuisine, title)
+        logger.info(f"generate_recipe_image返回结果: {image_url}")
+        
+        if image_url:
+            recipe_data["image_url"] = image_url
+            logger.info(f"✅ 成功为食谱生成配图，图片URL: {image_url}")
+        else:
+            logger.warning("❌ 未生成食谱配图")
+        
+        # 确保食谱数据包含cuisine字段
+        recipe_data["cuisine"] = cuisine
+        
+        # 确保食谱数据包含tags字段
+        if "tags" not in recipe_data:
+            recipe_data["tags"] = []
+        
+        # 添加最终食谱数据的日志记录
+        logger.info(f"最终食谱数据结构: {list(recipe_data.keys())}")
+        logger.info(f"食谱数据是否包含image_url: {'image_url' in recipe_data}")
+        logger.info(f"食谱数据是否包含cuisine: {'cuisine' in recipe_data}")
+        logger.info(f"食谱数据是否包含tags: {'tags' in recipe_data}")
+        return recipe_data
+    
+    async def generate_recipe(
+        self,
+        recipe_params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        生成个性化食谱
+        
+        Args:
+            recipe_params: 食谱生成参数
+        
+        Returns:
+            生成的食谱数据，包含食谱内容和配图URL
+        
+        Raises:
+            AIServiceError: AI服务错误
+        """
+        logger.info(f"=== 开始生成食谱，API提供商: {self.api_provider} ===")
+        logger.info(f"食谱参数类型: {type(recipe_params)}")
+        logger.info(f"食谱参数详情: {recipe_params}")
+        logger.info(f"食谱参数包含的键: {list(recipe_params.keys())}")
+        
+        # 检查cuisine参数是否存在
+        cuisine_value = recipe_params.get("cuisine")
+        logger.info(f"cuisine参数值: {cuisine_value}, 类型: {type(cuisine_value)}")
+        
+        prompt = self._build_recipe_prompt(recipe_params)
+        
+        async def request_recipe() -> Dict[str, Any]:
+            # 准备请求
+            request_body = self._prepare_chat_completion_request(prompt)
+            logger.info(f"准备请求体完成，请求体结构: {list(request_body.keys())}")
+            
             # 调用API
             logger.info("开始发送API请求到AI服务")
             response = await self._make_async_request(request_body)
@@ -228,35 +500,13 @@ class AIClient:
           
             # 验证食谱数据
             self._validate_recipe_data(recipe_data)
-            
-            # 生成食谱配图
-            logger.info("=== 开始生成食谱配图 ===")
-            cuisine = recipe_params.get("cuisine", "")
-            title = recipe_data.get("title", "")
-            logger.info(f"使用食谱标题: '{title}'，菜系: '{cuisine}' 生成配图")
-            
-            # 调用generate_recipe_image方法
-            image_url = await self.generate_recipe_image(cuisine, title)
-            logger.info(f"generate_recipe_image返回结果: {image_url}")
-            
-            if image_url:
-                recipe_data["image_url"] = image_url
-                logger.info(f"✅ 成功为食谱生成配图，图片URL: {image_url}")
-            else:
-                logger.warning("❌ 未生成食谱配图")
-            
-            # 确保食谱数据包含cuisine字段
-            recipe_data["cuisine"] = cuisine
-            
-            # 确保食谱数据包含tags字段
-            if "tags" not in recipe_data:
-                recipe_data["tags"] = []
-            
-            # 添加最终食谱数据的日志记录
-            logger.info(f"最终食谱数据结构: {list(recipe_data.keys())}")
-            logger.info(f"食谱数据是否包含image_url: {'image_url' in recipe_data}")
-            logger.info(f"食谱数据是否包含cuisine: {'cuisine' in recipe_data}")
-            logger.info(f"食谱数据是否包含tags: {'tags' in recipe_data}")
+            return recipe_data
+        
+        try:
+            # 相同参数的请求直接复用缓存结果，未命中时才调用AI服务
+            cache_key = recipe_cache_key(recipe_params)
+            recipe_data = await ai_recipe_cache.get_or_create(cache_key, request_recipe)
+            recipe_data = await self._finalize_recipe(recipe_params, recipe_data)
             
             logger.info(f"食谱生成成功，标题: {recipe_data.get('title', '未命名')}")
             return recipe_data
@@ -267,6 +517,68 @@ class AIClient:
                 raise
             raise AIServiceError(f"Failed to generate recipe: {str(e)}")
     
+    async def stream_recipe(
+        self,
+        recipe_params: Dict[str, Any]
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        流式生成个性化食谱
+        
+        依次产生以下事件:
+          - ("delta", 文本片段): 模型新生成的原始文本
+          - ("field", {"name": 字段名, "value": 字段值}): 顶层字段已完整
+          - ("recipe", 食谱数据): 解析验证并补充配图后的完整食谱（最后一个事件）
+        命中缓存时不产生delta事件，直接依次给出各字段。
+        
+        Args:
+            recipe_params: 食谱生成参数
+        
+        Yields:
+            (事件名, 事件数据)元组
+        
+        Raises:
+            AIServiceError: AI服务错误
+        """
+        logger.info(f"=== 开始流式生成食谱，API提供商: {self.api_provider} ===")
+        cache_key = recipe_cache_key(recipe_params)
+        
+        try:
+            recipe_data = await ai_recipe_cache.get(cache_key) if ai_recipe_cache.enabled else None
+            if recipe_data is not None:
+                logger.info("流式生成命中缓存")
+                for name, value in recipe_data.items():
+                    yield "field", {"name": name, "value": value}
+            else:
+                prompt = self._build_recipe_prompt(recipe_params)
+                request_body = self._prepare_chat_completion_request(prompt, stream=True)
+                
+                parser = IncrementalJSONParser()
+                chunks = []
+                async for text in self._stream_request(request_body):
+                    chunks.append(text)
+                    yield "delta", text
+                    for name, value in parser.feed(text):
+                        yield "field", {"name": name, "value": value}
+                
+                content = "".join(chunks)
+                logger.info(f"流式响应结束，文本长度: {len(content)} 字符")
+                
+                # 与非流式模式使用同一套解析和验证逻辑
+                recipe_data = self._parse_response({"output": {"text": content}})
+                self._validate_recipe_data(recipe_data)
+                if ai_recipe_cache.enabled:
+                    await ai_recipe_cache.set(cache_key, recipe_data)
+            
+            recipe_data = await self._finalize_recipe(recipe_params, recipe_data)
+            logger.info(f"流式食谱生成成功，标题: {recipe_data.get('title', '未命名')}")
+            yield "recipe", recipe_data
+            
+        except Exception as e:
+            logger.error(f"Error streaming recipe: {str(e)}", exc_info=True)
+            if isinstance(e, AIServiceError):
+                raise
+            raise AIServiceError(f"Failed to generate recipe: {str(e)}")
+    
     async def enhance_recipe(
         self,
         recipe_data: Dict[str, Any],
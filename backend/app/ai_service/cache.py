@@ -0,0 +1,323 @@
+"""
+AI食谱生成结果缓存
+
+缓存键是规范化后的生成参数（枚举取值、列表去重排序、字符串去空白并转小写）
+与模型、温度、最大令牌数和提示词模板一起计算的SHA-256哈希，
+参数顺序不同但语义相同的请求会命中同一条缓存。
+
+缓存分两层:
+  - 进程内LRU缓存，按TTL过期
+  - PostgreSQL缓存表(ai_recipe_cache)，多个worker共享且重启后保留
+读取时先查内存，再查数据库（命中后回填内存）。数据库层出错只记录日志，
+不影响食谱生成。同一进程内相同键的并发未命中请求只调用一次AI接口。
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from sqlalchemy import text
+
+from app.ai_service.config import get_ai_settings
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+CACHE_GET_SQL = text("""
+    UPDATE app_schema.ai_recipe_cache
+    SET hit_count = hit_count + 1, last_hit_at = now()
+    WHERE cache_key = :cache_key AND expires_at > now()
+    RETURNING response
+""")
+
+CACHE_SET_SQL = text("""
+    INSERT INTO app_schema.ai_recipe_cache (cache_key, model, response, expires_at)
+    VALUES (:cache_key, :model, CAST(:response AS jsonb), :expires_at)
+    ON CONFLICT (cache_key) DO UPDATE
+    SET response = EXCLUDED.response, model = EXCLUDED.model,
+        expires_at = EXCLUDED.expires_at, last_hit_at = now()
+""")
+
+CACHE_PRUNE_SQL = (
+    text("DELETE FROM app_schema.ai_recipe_cache WHERE expires_at <= now()"),
+    text("""
+        DELETE FROM app_schema.ai_recipe_cache
+        WHERE cache_key IN (
+            SELECT cache_key FROM app_schema.ai_recipe_cache
+            ORDER BY last_hit_at DESC
+            OFFSET :max_rows
+        )
+    """),
+)
+
+
+def _canonical_value(value: Any) -> Any:
+    if hasattr(value, "value"):
+        value = value.value
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, (list, tuple, set)):
+        items = {_canonical_value(item) for item in value}
+        items.discard("")
+        return sorted(items, key=str)
+    return value
+
+
+def canonical_recipe_params(recipe_params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    规范化食谱生成参数
+
+    Args:
+        recipe_params: 食谱生成参数
+
+    Returns:
+        规范化后的参数字典，空列表、空字符串和None统一为None
+    """
+    canonical = {}
+    for key, value in recipe_params.items():
+        value = _canonical_value(value)
+        canonical[key] = value if value not in ("", []) else None
+    return canonical
+
+
+def recipe_cache_key(recipe_params: Dict[str, Any]) -> str:
+    """
+    计算食谱生成请求的缓存键
+
+    Args:
+        recipe_params: 食谱生成参数
+
+    Returns:
+        64位十六进制的SHA-256哈希
+    """
+    settings = get_ai_settings()
+    payload = {
+        "params": canonical_recipe_params(recipe_params),
+        "model": settings.QWEN_MODEL,
+        "temperature": settings.QWEN_TEMPERATURE,
+        "max_tokens": settings.QWEN_MAX_TOKENS,
+        "template": hashlib.sha256(
+            (settings.SYSTEM_PROMPT + settings.RECIPE_GENERATION_PROMPT_TEMPLATE).encode("utf-8")
+        ).hexdigest()
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class AIRecipeCache:
+    """
+    两级AI食谱生成结果缓存
+    """
+    def __init__(
+        self,
+        enabled: bool = True,
+        ttl: int = 7 * 24 * 3600,
+        max_size: int = 1000,
+        db_enabled: bool = True,
+        db_max_rows: int = 100000,
+        db_prune_every: int = 100
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_size = max_size
+        self.db_enabled = db_enabled
+        self.db_max_rows = db_max_rows
+        self.db_prune_every = db_prune_every
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._writes = 0
+        self.stats = {
+            "memory_hits": 0,
+            "db_hits": 0,
+            "misses": 0,
+            "shared_in_flight": 0,
+            "writes": 0,
+            "db_errors": 0
+        }
+
+    @staticmethod
+    def _async_engine():
+        # 异步引擎在lifespan中初始化，需要在调用时读取模块属性
+        from app.core import database
+        return database.async_engine
+
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _memory_set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    async def _db_get(self, key: str) -> Optional[Dict[str, Any]]:
+        engine = self._async_engine()
+        if not self.db_enabled or engine is None:
+            return None
+        try:
+            async with engine.begin() as conn:
+                result = await conn.execute(CACHE_GET_SQL, {"cache_key": key})
+                return result.scalar()
+        except Exception as e:
+            self.stats["db_errors"] += 1
+            logger.warning(f"读取AI缓存数据库层失败: {str(e)}")
+            return None
+
+    async def _db_set(self, key: str, value: Dict[str, Any]) -> None:
+        engine = self._async_engine()
+        if not self.db_enabled or engine is None:
+            return
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(CACHE_SET_SQL, {
+                    "cache_key": key,
+                    "model": get_ai_settings().QWEN_MODEL,
+                    "response": json.dumps(value, ensure_ascii=False),
+                    "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+                })
+                self._writes += 1
+                if self._writes % self.db_prune_every == 0:
+                    await conn.execute(CACHE_PRUNE_SQL[0])
+                    await conn.execute(CACHE_PRUNE_SQL[1], {"max_rows": self.db_max_rows})
+        except Exception as e:
+            self.stats["db_errors"] += 1
+            logger.warning(f"写入AI缓存数据库层失败: {str(e)}")
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的食谱数据
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            食谱数据的副本，未命中时返回None
+        """
+        value = self._memory_get(key)
+        if value is not None:
+            self.stats["memory_hits"] += 1
+            return copy.deepcopy(value)
+
+        value = await self._db_get(key)
+        if value is not None:
+            self.stats["db_hits"] += 1
+            self._memory_set(key, value, self.ttl)
+            return copy.deepcopy(value)
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        写入两级缓存
+
+        Args:
+            key: 缓存键
+            value: 食谱数据
+        """
+        value = copy.deepcopy(value)
+        self.stats["writes"] += 1
+        self._memory_set(key, value, self.ttl)
+        await self._db_set(key, value)
+
+    async def get_or_create(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        读取缓存，未命中时调用factory生成并写入缓存
+
+        同一键的并发未命中只调用一次factory，其余请求等待同一结果。
+
+        Args:
+            key: 缓存键
+            factory: 生成食谱数据的协程函数
+
+        Returns:
+            食谱数据（调用方可自由修改）
+        """
+        if not self.enabled:
+            return await factory()
+
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.stats["shared_in_flight"] += 1
+            return copy.deepcopy(await asyncio.shield(in_flight))
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await factory()
+            future.set_result(copy.deepcopy(value))
+            await self.set(key, value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            # 避免没有其他等待者时出现"exception was never retrieved"警告
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        清空进程内缓存
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存命中统计
+
+        Returns:
+            统计信息字典
+        """
+        hits = self.stats["memory_hits"] + self.stats["db_hits"] + self.stats["shared_in_flight"]
+        lookups = hits + self.stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "db_enabled": self.db_enabled and self._async_engine() is not None,
+            **self.stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_size": len(self._entries),
+            "memory_max_size": self.max_size,
+            "ttl_seconds": self.ttl
+        }
+
+
+def _create_cache() -> AIRecipeCache:
+    settings = get_ai_settings()
+    return AIRecipeCache(
+        enabled=settings.AI_CACHE_ENABLED,
+        ttl=settings.AI_CACHE_TTL_SECONDS,
+        max_size=settings.AI_CACHE_MAX_SIZE,
+        db_enabled=settings.AI_CACHE_DB_ENABLED,
+        db_max_rows=settings.AI_CACHE_DB_MAX_ROWS,
+        db_prune_every=settings.AI_CACHE_DB_PRUNE_EVERY
+    )
+
+
+# 全局AI食谱缓存实例
+ai_recipe_cache = _create_cache()
@@ -19,6 +19,35 @@ class AIServiceSettings(BaseSettings):
     QWEN_MAX_TOKENS: int = 2000
     QWEN_TEMPERATURE: float = 0.7
     
+    # HTTP连接池配置（客户端在应用生命周期内复用）
+    QWEN_TIMEOUT: float = 30.0  # 读写超时（秒）
+    QWEN_CONNECT_TIMEOUT: float = 5.0  # 建立连接超时（秒）
+    QWEN_MAX_CONNECTIONS: int = 20  # 连接池最大连接数
+    QWEN_MAX_KEEPALIVE_CONNECTIONS: int = 10  # 保持长连接的最大数量
+    QWEN_KEEPALIVE_EXPIRY: float = 30.0  # 空闲长连接的保持时间（秒）
+    QWEN_HTTP2: bool = False  # 启用HTTP/2（需要安装h2包）
+    QWEN_MAX_CONCURRENCY: int = 8  # 同时进行的API请求上限
+    
+    # 重试配置（速率限制、超时和连接错误时按指数退避重试）
+    QWEN_MAX_RETRIES: int = 3
+    QWEN_RETRY_BACKOFF_BASE: float = 0.5  # 首次重试等待时间（秒）
+    QWEN_RETRY_BACKOFF_MAX: float = 8.0  # 单次重试最长等待时间（秒）
+    
+    # 食谱生成结果缓存配置
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_TTL_SECONDS: int = 7 * 24 * 3600  # 缓存有效期
+    AI_CACHE_MAX_SIZE: int = 1000  # 进程内缓存最大条目数
+    AI_CACHE_DB_ENABLED: bool = True  # 启用PostgreSQL缓存层（多worker共享、重启后保留）
+    AI_CACHE_DB_MAX_ROWS: int = 100000  # PostgreSQL缓存层最大条目数，超出时淘汰最久未命中的条目
+    AI_CACHE_DB_PRUNE_EVERY: int = 100  # 每写入多少次清理一次PostgreSQL缓存层
+    
+    # 后台生成任务队列配置
+    AI_JOB_BACKEND: str = "postgres"  # 任务队列后端(postgres/memory)，memory仅用于测试和单进程开发
+    AI_JOB_CONCURRENCY: int = 4  # 每个进程同时执行的任务数
+    AI_JOB_POLL_SECONDS: float = 1.0  # 空闲时轮询队列表的间隔（秒）
+    AI_JOB_STALE_SECONDS: int = 600  # 执行超过该时间的任务视为worker已退出，重新排队
+    AI_JOB_MAX_ATTEMPTS: int = 3  # 任务最多执行次数
+    
     # 系统提示词
     SYSTEM_PROMPT: str = """
 你是一个专业的营养师和厨师，擅长根据用户的饮食偏好、健康状况和目标生成个性化食谱。
@@ -0,0 +1,474 @@
+"""
+AI食谱生成后台任务队列
+
+POST请求只负责入队并立即返回任务ID，由worker协程调用AI服务生成食谱并保存，
+客户端轮询任务状态获取结果。等待AI服务期间不占用请求和数据库连接池中的连接。
+
+队列后端:
+  - PostgresJobStore: ai_jobs表，worker用FOR UPDATE SKIP LOCKED领取任务，
+    多个进程可以同时消费同一个队列；执行超时（worker退出）的任务会重新排队
+  - InMemoryJobStore: 进程内队列，用于测试和没有数据库的单进程开发环境
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import asyncio
+import copy
+import json
+import logging
+import os
+import socket
+import uuid
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from app.ai_service.config import get_ai_settings
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+JOB_KIND_GENERATE_RECIPE = "generate_recipe"
+
+JOB_COLUMNS = """
+    job_id, user_id, kind, status, params, result, error, recipe_id,
+    attempts, created_at, started_at, finished_at
+"""
+
+ENQUEUE_SQL = text(f"""
+    INSERT INTO app_schema.ai_jobs (job_id, user_id, kind, status, params)
+    VALUES (:job_id, :user_id, :kind, 'queued', CAST(:params AS jsonb))
+    RETURNING {JOB_COLUMNS}
+""")
+
+CLAIM_SQL = text(f"""
+    UPDATE app_schema.ai_jobs
+    SET status = 'running', started_at = now(), attempts = attempts + 1, worker_id = :worker_id
+    WHERE job_id = (
+        SELECT job_id FROM app_schema.ai_jobs
+        WHERE status = 'queued'
+        ORDER BY created_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING {JOB_COLUMNS}
+""")
+
+COMPLETE_SQL = text("""
+    UPDATE app_schema.ai_jobs
+    SET status = 'succeeded', result = CAST(:result AS jsonb), recipe_id = :recipe_id,
+        error = NULL, finished_at = now()
+    WHERE job_id = :job_id
+""")
+
+FAIL_SQL = text("""
+    UPDATE app_schema.ai_jobs
+    SET status = CASE WHEN :retry AND attempts < :max_attempts THEN 'queued' ELSE 'failed' END,
+        error = :error,
+        finished_at = CASE WHEN :retry AND attempts < :max_attempts THEN NULL ELSE now() END
+    WHERE job_id = :job_id
+""")
+
+REQUEUE_STALE_SQL = text("""
+    UPDATE app_schema.ai_jobs
+    SET status = CASE WHEN attempts < :max_attempts THEN 'queued' ELSE 'failed' END,
+        error = 'worker timed out',
+        finished_at = CASE WHEN attempts < :max_attempts THEN NULL ELSE now() END
+    WHERE status = 'running' AND started_at < now() - make_interval(secs => CAST(:stale_seconds AS double precision))
+""")
+
+GET_SQL = text(f"""
+    SELECT {JOB_COLUMNS}
+    FROM app_schema.ai_jobs
+    WHERE job_id = :job_id AND user_id = :user_id
+""")
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def job_to_dict(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将任务记录转换为响应字典
+
+    Args:
+        row: 任务记录
+
+    Returns:
+        符合AIJobResponse的字典
+    """
+    return {
+        "job_id": str(row["job_id"]),
+        "status": row["status"],
+        "attempts": row["attempts"],
+        "recipe_id": str(row["recipe_id"]) if row.get("recipe_id") else None,
+        "result": row.get("result"),
+        "error": row.get("error"),
+        "created_at": _isoformat(row.get("created_at")),
+        "started_at": _isoformat(row.get("started_at")),
+        "finished_at": _isoformat(row.get("finished_at"))
+    }
+
+
+def save_generated_recipe_data(db, user_id, recipe_data: Dict[str, Any]):
+    """
+    将AI生成的食谱保存到公共食谱列表
+
+    Args:
+        db: 数据库会话
+        user_id: 作者ID
+        recipe_data: AI生成的食谱数据
+
+    Returns:
+        保存后的食谱
+    """
+    from app.recipes.services import RecipeService
+
+    # 准备食谱数据用于保存
+    save_data = {
+        "title": recipe_data.get("title"),
+        "description": recipe_data.get("description"),
+        "instructions": "\n".join(recipe_data.get("instructions", [])),
+        "ingredients": recipe_data.get("ingredients", []),
+        "cooking_time": recipe_data.get("cooking_time", 0),
+        "servings": recipe_data.get("servings", 1),
+        "difficulty": recipe_data.get("difficulty", "easy"),
+        "tags": recipe_data.get("tags", []),
+        "image_url": recipe_data.get("image_url"),
+        "nutrition_info": recipe_data.get("nutrition_info")
+    }
+    return RecipeService.create_recipe(db, user_id, save_data)
+
+
+def persist_generated_recipe(user_id, recipe_data: Dict[str, Any]) -> str:
+    """
+    使用独立的数据库会话保存AI生成的食谱（在线程池中调用）
+
+    Args:
+        user_id: 作者ID
+        recipe_data: AI生成的食谱数据
+
+    Returns:
+        保存后的食谱ID
+    """
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return str(save_generated_recipe_data(db, user_id, recipe_data).recipe_id)
+    finally:
+        db.close()
+
+
+class InMemoryJobStore:
+    """
+    进程内任务队列（测试和单进程开发环境使用）
+    """
+    name = "memory"
+
+    def __init__(self, max_attempts: int = 3):
+        self.max_attempts = max_attempts
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.pending: List[str] = []
+
+    async def enqueue(self, user_id, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        job = {
+            "job_id": uuid.uuid4(),
+            "user_id": user_id,
+            "kind": kind,
+            "status": "queued",
+            "params": copy.deepcopy(params),
+            "result": None,
+            "error": None,
+            "recipe_id": None,
+            "attempts": 0,
+            "created_at": datetime.now(timezone.utc),
+            "started_at": None,
+            "finished_at": None
+        }
+        self.jobs[str(job["job_id"])] = job
+        self.pending.append(str(job["job_id"]))
+        return dict(job)
+
+    async def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        if not self.pending:
+            return None
+        job = self.jobs[self.pending.pop(0)]
+        job.update(status="running", started_at=datetime.now(timezone.utc), attempts=job["attempts"] + 1)
+        return dict(job)
+
+    async def complete(self, job_id, result: Dict[str, Any], recipe_id: Optional[str]) -> None:
+        self.jobs[str(job_id)].update(
+            status="succeeded", result=result, recipe_id=recipe_id,
+            error=None, finished_at=datetime.now(timezone.utc)
+        )
+
+    async def fail(self, job_id, error: str, retry: bool) -> None:
+        job = self.jobs[str(job_id)]
+        job["error"] = error
+        if retry and job["attempts"] < self.max_attempts:
+            job["status"] = "queued"
+            self.pending.append(str(job_id))
+        else:
+            job.update(status="failed", finished_at=datetime.now(timezone.utc))
+
+    async def requeue_stale(self, stale_seconds: int) -> int:
+        # 进程内任务随进程一起结束，不存在被遗弃的执行中任务
+        return 0
+
+    async def get(self, job_id, user_id) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(str(job_id))
+        if job is None or str(job["user_id"]) != str(user_id):
+            return None
+        return dict(job)
+
+
+class PostgresJobStore:
+    """
+    基于ai_jobs表的任务队列
+    """
+    name = "postgres"
+
+    def __init__(self, engine, max_attempts: int = 3):
+        self.engine = engine
+        self.max_attempts = max_attempts
+
+    async def enqueue(self, user_id, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        async with self.engine.begin() as conn:
+            result = await conn.execute(ENQUEUE_SQL, {
+                "job_id": uuid.uuid4(),
+                "user_id": user_id,
+                "kind": kind,
+                "params": json.dumps(params, ensure_ascii=False)
+            })
+            return dict(result.mappings().one())
+
+    async def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        async with self.engine.begin() as conn:
+            result = await conn.execute(CLAIM_SQL, {"worker_id": worker_id})
+            row = result.mappings().first()
+            return dict(row) if row else None
+
+    async def complete(self, job_id, result: Dict[str, Any], recipe_id: Optional[str]) -> None:
+        async with self.engine.begin() as conn:
+            await conn.execute(COMPLETE_SQL, {
+                "job_id": job_id,
+                "result": json.dumps(result, ensure_ascii=False, default=str),
+                "recipe_id": recipe_id
+            })
+
+    async def fail(self, job_id, error: str, retry: bool) -> None:
+        async with self.engine.begin() as conn:
+            await conn.execute(FAIL_SQL, {
+                "job_id": job_id,
+                "error": error[:2000],
+                "retry": retry,
+                "max_attempts": self.max_attempts
+            })
+
+    async def requeue_stale(self, stale_seconds: int) -> int:
+        async with self.engine.begin() as conn:
+            result = await conn.execute(REQUEUE_STALE_SQL, {
+                "stale_seconds": float(stale_seconds),
+                "max_attempts": self.max_attempts
+            })
+            return result.rowcount
+
+    async def get(self, job_id, user_id) -> Optional[Dict[str, Any]]:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(GET_SQL, {"job_id": job_id, "user_id": user_id})
+            row = result.mappings().first()
+            return dict(row) if row else None
+
+
+class AIJobQueue:
+    """
+    AI生成任务队列及其worker池
+    """
+    def __init__(
+        self,
+        backend: str = "postgres",
+        concurrency: int = 4,
+        poll_seconds: float = 1.0,
+        stale_seconds: int = 600,
+        max_attempts: int = 3
+    ):
+        self.backend = backend
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max_attempts
+        self.store = None
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self.stats = {"processed": 0, "succeeded": 0, "failed": 0, "retried": 0}
+
+    def _create_store(self):
+        if self.backend == "postgres":
+            # 异步引擎在lifespan中初始化，需要在调用时读取模块属性
+            from app.core import database
+            if database.async_engine is not None:
+                return PostgresJobStore(database.async_engine, self.max_attempts)
+            logger.warning("异步数据库引擎未初始化，AI任务队列回退到进程内队列")
+        return InMemoryJobStore(self.max_attempts)
+
+    def start(self, store=None) -> None:
+        """
+        创建任务存储并启动worker协程（由应用lifespan调用）
+
+        Args:
+            store: 指定的任务存储（测试时传入InMemoryJobStore）
+        """
+        if self._workers:
+            return
+        self.store = store or self._create_store()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._workers = [
+            asyncio.create_task(self._worker(index), name=f"ai-job-worker-{index}")
+            for index in range(self.concurrency)
+        ]
+        if self.store.name == "postgres":
+            self._workers.append(asyncio.create_task(self._reaper(), name="ai-job-reaper"))
+        logger.info(f"AI任务队列已启动，后端: {self.store.name}，并发数: {self.concurrency}")
+
+    async def stop(self) -> None:
+        """
+        停止worker协程；正在执行的任务被取消，Postgres后端中的任务超时后会被重新排队
+        """
+        self._stopping = True
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("AI任务队列已停止")
+
+    def _ensure_store(self):
+        if self.store is None:
+            self.store = self._create_store()
+        return self.store
+
+    async def enqueue(self, user_id, params: Dict[str, Any], kind: str = JOB_KIND_GENERATE_RECIPE) -> Dict[str, Any]:
+        """
+        提交任务
+
+        Args:
+            user_id: 提交任务的用户ID
+            params: 任务参数（可JSON序列化）
+            kind: 任务类型
+
+        Returns:
+            任务字典
+        """
+        job = await self._ensure_store().enqueue(user_id, kind, params)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        logger.info(f"AI任务已入队，ID: {job['job_id']}，类型: {kind}")
+        return job_to_dict(job)
+
+    async def get(self, job_id, user_id) -> Optional[Dict[str, Any]]:
+        """
+        查询任务状态（只能查询自己提交的任务）
+
+        Args:
+            job_id: 任务ID
+            user_id: 当前用户ID
+
+        Returns:
+            任务字典，不存在时返回None
+        """
+        job = await self._ensure_store().get(job_id, user_id)
+        return job_to_dict(job) if job else None
+
+    async def _wait_for_work(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _worker(self, index: int) -> None:
+        worker_id = f"{self.worker_id}-{index}"
+        while not self._stopping:
+            try:
+                job = await self.store.claim(worker_id)
+            except Exception as e:
+                logger.error(f"领取AI任务失败: {str(e)}")
+                job = None
+            if job is None:
+                await self._wait_for_work()
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        from app.ai_service.ai_client import ai_client
+        from app.ai_service.exceptions import APIConnectionError, RateLimitError
+
+        job_id = job["job_id"]
+        self.stats["processed"] += 1
+        logger.info(f"开始执行AI任务，ID: {job_id}，第{job['attempts']}次")
+        try:
+            if job["kind"] != JOB_KIND_GENERATE_RECIPE:
+                raise ValueError(f"未知的任务类型: {job['kind']}")
+            recipe_data = await ai_client.generate_recipe(job["params"])
+            recipe_id = await run_in_threadpool(persist_generated_recipe, job["user_id"], recipe_data)
+            recipe_data["recipe_id"] = recipe_id
+            await self.store.complete(job_id, recipe_data, recipe_id)
+            self.stats["succeeded"] += 1
+            logger.info(f"AI任务执行成功，ID: {job_id}，食谱ID: {recipe_id}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 限流和连接问题是暂时性的，任务重新排队；其他错误直接失败
+            retry = isinstance(e, (RateLimitError, APIConnectionError))
+            detail = getattr(e, "detail", None) or str(e)
+            logger.error(f"AI任务执行失败，ID: {job_id}，错误: {detail}")
+            try:
+                await self.store.fail(job_id, str(detail), retry)
+            except Exception as store_error:
+                logger.error(f"记录AI任务失败状态时出错: {str(store_error)}")
+            self.stats["retried" if retry and job["attempts"] < self.max_attempts else "failed"] += 1
+
+    async def _reaper(self) -> None:
+        # 定期把worker退出后遗留的执行中任务重新排队
+        interval = max(self.poll_seconds, self.stale_seconds / 4)
+        while not self._stopping:
+            await asyncio.sleep(interval)
+            try:
+                count = await self.store.requeue_stale(self.stale_seconds)
+                if count:
+                    logger.warning(f"{count}个执行超时的AI任务已重新排队或标记失败")
+                    self._wakeup.set()
+            except Exception as e:
+                logger.error(f"回收超时AI任务失败: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取任务队列统计
+
+        Returns:
+            统计信息字典
+        """
+        return {
+            "backend": self.store.name if self.store else self.backend,
+            "concurrency": self.concurrency,
+            "running": bool(self._workers),
+            **self.stats
+        }
+
+
+def _create_queue() -> AIJobQueue:
+    settings = get_ai_settings()
+    return AIJobQueue(
+        backend=settings.AI_JOB_BACKEND,
+        concurrency=settings.AI_JOB_CONCURRENCY,
+        poll_seconds=settings.AI_JOB_POLL_SECONDS,
+        stale_seconds=settings.AI_JOB_STALE_SECONDS,
+        max_attempts=settings.AI_JOB_MAX_ATTEMPTS
+    )
+
+
+# 全局AI任务队列实例
+ai_job_queue = _create_queue()
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import Any, AsyncIterator, Dict
 from app.core.database import get_db
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_user_short_session
 from app.models.user import User
 from app.ai_service.schemas import (
     RecipeGenerationRequest,
@@ -10,9 +12,16 @@ from app.ai_service.schemas import (
     RecipeEnhancementRequest,
     SaveRecipeRequest,
     AIServiceStatus,
+    AIJobResponse,
+    NutritionBatchRequest,
+    NutritionBatchResponse,
+    NutritionAnalysis,
     Cuisine
 )
 from app.ai_service.ai_client import ai_client
+from app.ai_service.cache import ai_recipe_cache
+from app.ai_service.jobs import ai_job_queue, persist_generated_recipe
+from app.ai_service.streaming import format_sse_event
 from app.ai_service.exceptions import (
     AIServiceError,
     InvalidRecipeParametersError,
@@ -20,9 +29,12 @@ from app.ai_service.exceptions import (
     RecipeEnhancementError
 )
 from app.recipes.services import RecipeService
+from app.recipes.nutrition import nutrition_engine
+from app.core.config import settings
 from app.ai_service.config import get_ai_settings
 from app.models.recipe import Recipe
 import logging
+import uuid
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -46,19 +58,68 @@ async def get_ai_service_status():
         status=status,
         provider=settings.API_PROVIDER,
         version="1.0.0",
-        message=message
+        message=message,
+        cache=ai_recipe_cache.get_stats()
     )
 
 
+async def stream_generated_recipe(recipe_params: Dict[str, Any], user_id) -> AsyncIterator[str]:
+    """
+    以Server-Sent Events形式输出食谱生成过程
+    
+    事件依次为delta（原始文本片段）、field（已完整的顶层字段）、
+    recipe（完整食谱）和saved（保存后的食谱ID，最后一个事件）；
+    出错时输出error事件并结束。
+    
+    Args:
+        recipe_params: 食谱生成参数
+        user_id: 当前用户ID
+    
+    Yields:
+        SSE文本
+    """
+    try:
+        recipe_data = None
+        async for event, data in ai_client.stream_recipe(recipe_params):
+            if event == "delta":
+                yield format_sse_event("delta", {"text": data})
+            else:
+                yield format_sse_event(event, data)
+            if event == "recipe":
+                recipe_data = data
+        
+        recipe_id = await run_in_threadpool(persist_generated_recipe, user_id, recipe_data)
+        logger.info(f"流式生成的食谱已保存到公共列表，ID: {recipe_id}")
+        yield format_sse_event("saved", {"recipe_id": recipe_id})
+        
+    except AIServiceError as e:
+        logger.error(f"流式生成食谱时AI服务错误: {e.detail}")
+        yield format_sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+    except Exception as e:
+        logger.error(f"流式食谱生成失败: {str(e)}", exc_info=True)
+        yield format_sse_event("error", {"status_code": 500, "detail": f"Failed to generate recipe: {str(e)}"})
+
+
 @router.post("/generate-recipe", response_model=RecipeResponse)
 async def generate_recipe(
     request: RecipeGenerationRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    stream: bool = Query(False, description="以Server-Sent Events流式返回生成过程"),
+    current_user: User = Depends(get_current_user_short_session)
 ):
     """
     生成个性化食谱并自动保存到公共食谱列表
+    
+    stream=true时返回text/event-stream，最后一个事件为保存后的食谱ID。
+    生成期间不占用数据库连接：用户查询的会话在认证后立即关闭，
+    保存食谱时再使用独立的会话。
     """
+    if stream:
+        return StreamingResponse(
+            stream_generated_recipe(request.model_dump(), current_user.user_id),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
     try:
         # 记录完整请求参数，包括具体的值
         logger.info(f"接收到食谱生成请求: {request.model_dump(exclude_none=True)}")
@@ -78,26 +139,12 @@ async def generate_recipe(
         # 自动将生成的食谱保存到公共食谱列表
         logger.info("自动保存生成的食谱到公共食谱列表")
         
-        # 准备食谱数据用于保存
-        save_data = {
-            "title": recipe_data.get("title"),
-            "description": recipe_data.get("description"),
-            "instructions": "\n".join(recipe_data.get("instructions", [])),
-            "ingredients": recipe_data.get("ingredients", []),
-            "cooking_time": recipe_data.get("cooking_time", 0),
-            "servings": recipe_data.get("servings", 1),
-            "difficulty": recipe_data.get("difficulty", "easy"),
-            "tags": recipe_data.get("tags", []),
-            "image_url": recipe_data.get("image_url"),
-            "nutrition_info": recipe_data.get("nutrition_info")
-        }
-        
         # 保存食谱到数据库（作为公共食谱）
-        new_recipe = RecipeService.create_recipe(db, current_user.user_id, save_data)
-        logger.info(f"食谱已成功保存到公共列表，ID: {new_recipe.recipe_id}")
+        recipe_id = await run_in_threadpool(persist_generated_recipe, current_user.user_id, recipe_data)
+        logger.info(f"食谱已成功保存到公共列表，ID: {recipe_id}")
         
         # 更新响应中的recipe_id为保存后的ID
-        recipe_data["recipe_id"] = str(new_recipe.recipe_id)
+        recipe_data["recipe_id"] = recipe_id
         
         # 转换为响应模型
         response = RecipeResponse(**recipe_data)
@@ -112,6 +159,35 @@ async def generate_recipe(
         raise RecipeGenerationError(f"Failed to generate recipe: {str(e)}")
 
 
+@router.post("/jobs/generate-recipe", response_model=AIJobResponse, status_code=202)
+async def enqueue_generate_recipe(
+    request: RecipeGenerationRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    提交后台食谱生成任务，立即返回任务ID
+    
+    任务由worker调用AI服务生成食谱并保存到公共食谱列表，
+    通过GET /ai/jobs/{job_id}轮询状态和结果。
+    """
+    job = await ai_job_queue.enqueue(current_user.user_id, request.model_dump(mode="json"))
+    return AIJobResponse(**job)
+
+
+@router.get("/jobs/{job_id}", response_model=AIJobResponse)
+async def get_job(
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    查询后台生成任务的状态和结果
+    """
+    job = await ai_job_queue.get(job_id, current_user.user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return AIJobResponse(**job)
+
+
 @router.post("/enhance-recipe", response_model=RecipeResponse)
 async def enhance_recipe(
     request: RecipeEnhancementRequest,
@@ -219,61 +295,65 @@ async def analyze_nutrition(
 ) -> Dict[str, Any]:
     """
     分析食材的营养成分
+    
+    使用食材库中的营养数据本地计算，只有未知食材才调用AI服务估算。
     """
     try:
-        # 构建提示词
-        ingredients_text = "\n".join([
-            f"- {ing['quantity']} {ing['unit']} {ing['name']}"
-            for ing in ingredients
-        ])
-        
-        prompt = f"""
-请分析以下食材的总营养成分：
+        results, _ = await nutrition_engine.analyze([ingredients])
+        return results[0]
+    except Exception as e:
+        logger.error(f"营养分析失败: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"营养分析失败: {str(e)}"
+        )
 
-{ingredients_text}
 
-请以JSON格式输出，包含以下字段：
-- calories: 总卡路里(千卡)
-- protein: 总蛋白质(克)
-- carbs: 总碳水化合物(克)
-- fat: 总脂肪(克)
-- fiber: 总膳食纤维(克)
-- summary: 简短的营养评估
-"""
-        
-        # 调用AI客户端进行分析
-        import json
-        from app.ai_service.config import get_ai_settings
-        settings = get_ai_settings()
-        
-        request_body = ai_client._prepare_chat_completion_request(prompt)
-        # 修复：移除URL参数，直接调用_make_async_request
-        response = await ai_client._make_async_request(request_body)
-        
-        # 根据不同的API提供商获取响应内容
-        if settings.API_PROVIDER == "alipan":
-            content = response.get("output", {}).get("text", "")
-        else:
-            content = response.get("choices", [{}])[0].get("message", {}).get("content", "")
-        
-        # 尝试提取和解析JSON
-        try:
-            # 尝试直接解析
-            nutrition_data = json.loads(content)
-        except json.JSONDecodeError:
-            # 尝试提取JSON格式的部分
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                nutrition_data = json.loads(json_match.group())
-            else:
-                raise ValueError("无法从AI响应中提取有效的JSON数据")
+@router.post("/analyze-nutrition/batch", response_model=NutritionBatchResponse)
+async def analyze_nutrition_batch(
+    request: NutritionBatchRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    批量分析多个食谱的营养成分
+    
+    每项可以直接提供食材列表，也可以提供已保存食谱的recipe_id。
+    所有食谱的食材只查询一次食材库，未知食材合并后批量调用AI服务估算。
+    """
+    max_recipes = settings.NUTRITION_BATCH_MAX_RECIPES
+    if len(request.recipes) > max_recipes:
+        raise InvalidRecipeParametersError(f"At most {max_recipes} recipes per request")
+    
+    try:
+        recipe_ids = [item.recipe_id for item in request.recipes if item.recipe_id and not item.ingredients]
+        stored = {}
+        if recipe_ids:
+            stored = await run_in_threadpool(nutrition_engine.load_recipe_ingredients, recipe_ids)
         
-        return nutrition_data
+        recipes = [
+            [ingredient.model_dump() for ingredient in item.ingredients]
+            if item.ingredients or not item.recipe_id
+            else stored.get(str(item.recipe_id), [])
+            for item in request.recipes
+        ]
+        results, estimated = await nutrition_engine.analyze(recipes, use_llm=request.use_llm)
         
+        return NutritionBatchResponse(
+            results=[
+                NutritionAnalysis(
+                    key=item.key,
+                    recipe_id=str(item.recipe_id) if item.recipe_id else None,
+                    **result
+                )
+                for item, result in zip(request.recipes, results)
+            ],
+            estimated_ingredients=estimated
+        )
+    except AIServiceError:
+        raise
     except Exception as e:
-        logger.error(f"营养分析失败: {str(e)}")
+        logger.error(f"批量营养分析失败: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"营养分析失败: {str(e)}"
-        )
\ No newline at end of file
+        )
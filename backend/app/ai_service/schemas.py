@@ -151,4 +151,82 @@ class AIServiceStatus(BaseModel):
     status: str = Field(..., description="服务状态(available/unavailable)")
     provider: str = Field(..., description="服务提供商")
     version: str = Field(..., description="API版本")
-    message: Optional[str] = Field(None, description="状态消息")
\ No newline at end of file
+    message: Optional[str] = Field(None, description="状态消息")
+    cache: Optional[Dict[str, Any]] = Field(None, description="食谱生成缓存命中统计")
+
+
+class AIJobStatus(str, Enum):
+    """
+    后台生成任务状态枚举
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class AIJobResponse(BaseModel):
+    """
+    后台生成任务响应模型
+    """
+    job_id: str = Field(..., description="任务ID")
+    status: AIJobStatus = Field(..., description="任务状态")
+    attempts: int = Field(0, description="已执行次数")
+    recipe_id: Optional[str] = Field(None, description="生成并保存的食谱ID")
+    result: Optional[Dict[str, Any]] = Field(None, description="生成的食谱数据（任务成功后）")
+    error: Optional[str] = Field(None, description="失败原因")
+    created_at: Optional[str] = Field(None, description="提交时间")
+    started_at: Optional[str] = Field(None, description="开始执行时间")
+    finished_at: Optional[str] = Field(None, description="完成时间")
+
+
+class NutritionIngredientInput(BaseModel):
+    """
+    营养分析食材输入模型
+    """
+    name: str = Field(..., description="食材名称")
+    quantity: Optional[Any] = Field(1, description="数量，支持数字、分数和范围")
+    unit: Optional[str] = Field(None, description="单位，为空时按克计算")
+
+
+class NutritionBatchItem(BaseModel):
+    """
+    批量营养分析的单个食谱，提供recipe_id时从数据库读取食材
+    """
+    key: Optional[str] = Field(None, description="调用方自定义标识，原样返回")
+    recipe_id: Optional[uuid.UUID] = Field(None, description="已保存食谱的ID")
+    ingredients: List[NutritionIngredientInput] = Field(default=[], description="食材列表")
+
+
+class NutritionBatchRequest(BaseModel):
+    """
+    批量营养分析请求模型
+    """
+    recipes: List[NutritionBatchItem] = Field(..., description="待分析的食谱")
+    use_llm: Optional[bool] = Field(None, description="为false时不调用AI服务估算未知食材；服务配置关闭AI估算时无法开启")
+
+
+class NutritionAnalysis(BaseModel):
+    """
+    营养分析结果模型
+    """
+    key: Optional[str] = Field(None, description="调用方自定义标识")
+    recipe_id: Optional[str] = Field(None, description="食谱ID")
+    calories: float = Field(..., description="总卡路里(千卡)")
+    protein: float = Field(..., description="总蛋白质(克)")
+    carbs: float = Field(..., description="总碳水化合物(克)")
+    fat: float = Field(..., description="总脂肪(克)")
+    fiber: float = Field(..., description="总膳食纤维(克)")
+    sugar: float = Field(..., description="总糖(克)")
+    sodium: float = Field(..., description="总钠(毫克)")
+    total_grams: float = Field(..., description="食材总重量(克)")
+    unresolved: List[str] = Field(default=[], description="没有营养数据、未计入总量的食材")
+    summary: Optional[str] = Field(None, description="简短的营养评估")
+
+
+class NutritionBatchResponse(BaseModel):
+    """
+    批量营养分析响应模型
+    """
+    results: List[NutritionAnalysis] = Field(..., description="与请求顺序一致的分析结果")
+    estimated_ingredients: int = Field(0, description="本次由AI服务估算的食材数（只有食材库中已存在的食材会写回数据库）")
@@ -0,0 +1,137 @@
+"""
+AI流式输出工具
+
+包括增量JSON解析器和Server-Sent Events格式化函数。
+模型按片段返回食谱JSON文本时，解析器在每个顶层字段（title、ingredients、
+instructions等）的值完整后立即给出该字段，前端不必等待整个响应结束。
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import json
+
+
+class IncrementalJSONParser:
+    """
+    顶层JSON对象的增量解析器
+
+    逐字符扫描新到达的文本，只记录嵌套深度、字符串和转义状态，
+    每个字符只扫描一次。第一个'{'之前的内容（如Markdown代码块标记）会被忽略。
+    """
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.started = False
+        self.finished = False
+        self.current_key: Optional[str] = None
+        self.key_start: Optional[int] = None
+        self.value_start: Optional[int] = None
+        self.fields: Dict[str, Any] = {}
+
+    def _complete_value(self, end: int) -> Optional[Tuple[str, Any]]:
+        key, start = self.current_key, self.value_start
+        self.current_key = None
+        self.value_start = None
+        if key is None or start is None:
+            return None
+        try:
+            value = json.loads(self.buffer[start:end])
+        except json.JSONDecodeError:
+            return None
+        self.fields[key] = value
+        return key, value
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        输入一段文本
+
+        Args:
+            chunk: 新到达的文本片段
+
+        Returns:
+            本次新完成的(字段名, 字段值)列表
+        """
+        completed = []
+        if self.finished:
+            return completed
+
+        self.buffer += chunk
+        buffer = self.buffer
+        while self.position < len(buffer):
+            index = self.position
+            char = buffer[index]
+            self.position += 1
+
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self.depth = 1
+                continue
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.key_start is not None:
+                        try:
+                            self.current_key = json.loads(buffer[self.key_start:index + 1])
+                        except json.JSONDecodeError:
+                            self.current_key = None
+                        self.key_start = None
+                continue
+
+            if char == '"':
+                self.in_string = True
+                # 顶层尚未进入值的字符串就是字段名
+                if self.depth == 1 and self.value_start is None and self.current_key is None:
+                    self.key_start = index
+            elif char == ":" and self.depth == 1 and self.value_start is None:
+                self.value_start = index + 1
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    field = self._complete_value(index)
+                    if field:
+                        completed.append(field)
+                    self.finished = True
+                    break
+            elif char == "," and self.depth == 1:
+                field = self._complete_value(index)
+                if field:
+                    completed.append(field)
+        return completed
+
+
+def format_sse_event(event: str, data: Any) -> str:
+    """
+    格式化一条Server-Sent Event
+
+    Args:
+        event: 事件名
+        data: 可JSON序列化的事件数据
+
+    Returns:
+        SSE文本
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def parse_sse_data(line: str) -> Optional[str]:
+    """
+    提取SSE行中的data内容
+
+    Args:
+        line: SSE响应中的一行
+
+    Returns:
+        data字段内容，不是data行时返回None
+    """
+    if not line.startswith("data:"):
+        return None
+    return line[5:].lstrip(" ")
@@ -2,7 +2,9 @@ from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.user import User
-from app.auth.jwt import get_current_user, get_current_active_user, optional_get_current_active_user
+from app.auth.jwt import (
+    get_current_user, get_current_user_short_session, get_current_active_user, optional_get_current_active_user
+)
 
 
 async def get_current_superuser(current_user: User = Depends(get_current_active_user)) -> User:
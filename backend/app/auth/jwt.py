@@ -10,6 +10,7 @@ import traceback
 from app.core.config import settings
 from app.core.database import get_db
 from app.models.user import User
+from app.auth.user_cache import get_user_by_username_cached
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -69,7 +70,7 @@ def verify_token(token: str) -> Dict[str, Any]:
         if username is None:
             logger.warning("令牌验证失败 - 用户名不存在于令牌中")
             raise JWTError("用户名不存在于令牌中")
-        logger.info(f"令牌验证成功 - 用户名: {username}")
+        logger.debug(f"令牌验证成功 - 用户名: {username}")
         return payload
     except JWTError as e:
         logger.warning(f"令牌验证失败 - JWT错误: {str(e)}")
@@ -84,6 +85,50 @@ async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)
     """
     获取当前用户
     
+    Args:
+        request: HTTP请求对象
+        token: JWT令牌
+        db: 数据库会话
+        
+    Returns:
+        User: 当前登录用户对象
+        
+    Raises:
+        HTTPException: 认证失败时抛出
+    """
+    return authenticate_user(request, token, db)
+
+
+async def get_current_user_short_session(request: Request, token: str = Depends(oauth2_scheme)) -> User:
+    """
+    获取当前用户，查询使用独立的数据库会话并在返回前关闭
+    
+    get_db依赖的会话在响应发送完毕后才关闭，流式响应等长时间运行的路由使用
+    get_current_user时，用户缓存未命中的查询会让连接在整个响应期间被占用。
+    
+    Args:
+        request: HTTP请求对象
+        token: JWT令牌
+        
+    Returns:
+        User: 当前登录用户对象（已脱离会话）
+        
+    Raises:
+        HTTPException: 认证失败时抛出
+    """
+    from app.core.database import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        return authenticate_user(request, token, db)
+    finally:
+        db.close()
+
+
+def authenticate_user(request: Request, token: str, db: Session) -> User:
+    """
+    验证令牌并加载用户，检查锁定和激活状态
+    
     Args:
         request: HTTP请求对象
         token: JWT令牌
@@ -113,8 +158,8 @@ async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)
         logger.warning(f"获取用户失败 - 令牌验证错误, IP: {client_ip}")
         raise credentials_exception
     
-    # 查询用户
-    user = db.query(User).filter(User.username == username).first()
+    # 查询用户（优先读取用户缓存）
+    user = get_user_by_username_cached(db, username)
     if user is None:
         logger.warning(f"获取用户失败 - 用户不存在: {username}, IP: {client_ip}")
         raise credentials_exception
@@ -135,7 +180,7 @@ async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)
             detail="用户已被停用"
         )
     
-    logger.info(f"获取用户成功 - 用户名: {username}, IP: {client_ip}")
+    logger.debug(f"获取用户成功 - 用户名: {username}, IP: {client_ip}")
     return user
 
 
@@ -150,7 +195,7 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
         User: 当前活跃用户对象
     """
     try:
-        logger.info(f"获取活动用户成功 - 用户名: {current_user.username}")
+        logger.debug(f"获取活动用户成功 - 用户名: {current_user.username}")
         return current_user
     except Exception as e:
         logger.error(f"获取活动用户失败: {str(e)}")
@@ -179,7 +224,7 @@ async def optional_get_current_active_user(request: Request, db: Session = Depen
         # 尝试从请求头中获取令牌
         authorization = request.headers.get("Authorization")
         if not authorization or not authorization.startswith("Bearer "):
-            logger.info("未提供有效的Authorization头")
+            logger.debug("未提供有效的Authorization头")
             return None
         
         token = authorization.split(" ")[1]
@@ -190,8 +235,8 @@ async def optional_get_current_active_user(request: Request, db: Session = Depen
             logger.warning("令牌中用户名不存在")
             return None
         
-        # 查询用户
-        user = db.query(User).filter(User.username == username).first()
+        # 查询用户（优先读取用户缓存）
+        user = get_user_by_username_cached(db, username)
         if user is None:
             logger.warning(f"用户不存在: {username}")
             return None
@@ -206,7 +251,7 @@ async def optional_get_current_active_user(request: Request, db: Session = Depen
             logger.warning(f"用户已被停用: {username}")
             return None
         
-        logger.info(f"获取用户成功 - 用户名: {username}")
+        logger.debug(f"获取用户成功 - 用户名: {username}")
         return user
     except JWTError:
         logger.info("令牌验证错误，返回None")
@@ -1,13 +1,153 @@
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
 import logging
+import threading
+import time
 import traceback
 
+from app.core.config import settings
+
 # 配置日志
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+
+def _create_pwd_context() -> CryptContext:
+    """
+    创建密码上下文
+
+    配置了PASSWORD_HASH_ROUNDS时，迭代次数与其不一致的哈希会被视为需要更新。
+    """
+    if settings.PASSWORD_HASH_ROUNDS:
+        rounds = settings.PASSWORD_HASH_ROUNDS
+        return CryptContext(
+            schemes=["pbkdf2_sha256"],
+            deprecated="auto",
+            pbkdf2_sha256__default_rounds=rounds,
+            pbkdf2_sha256__min_rounds=rounds,
+            pbkdf2_sha256__max_rounds=rounds
+        )
+    return CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+
+
 # 创建密码上下文，用于密码哈希和验证
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+pwd_context = _create_pwd_context()
+
+
+class PasswordHashingBusyError(HTTPException):
+    """
+    密码哈希线程池已满
+    """
+    def __init__(self, detail: str = "服务器繁忙，请稍后再试"):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": "1"}
+        )
+
+
+class PasswordHasherPool:
+    """
+    密码哈希专用线程池
+
+    pbkdf2计算耗时数百毫秒，放在线程池中执行以免阻塞事件循环
+    （hashlib在计算期间会释放GIL）。排队任务数超过上限时立即拒绝，
+    由调用方返回429，避免登录洪峰拖垮整个worker。
+    """
+    def __init__(self, max_workers: int = 4, max_queue: int = 32):
+        self.max_workers = max_workers
+        self.max_pending = max_workers + max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_hash_time = 0.0
+        self._max_hash_time = 0.0
+        self._total_queue_wait = 0.0
+        self._max_queue_wait = 0.0
+
+    def _record(self, queue_wait: float, hash_time: float) -> None:
+        with self._lock:
+            self._completed += 1
+            self._total_queue_wait += queue_wait
+            self._max_queue_wait = max(self._max_queue_wait, queue_wait)
+            self._total_hash_time += hash_time
+            self._max_hash_time = max(self._max_hash_time, hash_time)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        在线程池中执行哈希函数
+
+        Args:
+            func: 要执行的同步函数
+            *args: 函数参数
+
+        Returns:
+            函数返回值
+
+        Raises:
+            PasswordHashingBusyError: 排队任务数已达上限
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                logger.warning(f"密码哈希线程池已满，拒绝请求 - 进行中: {self._pending}")
+                raise PasswordHashingBusyError()
+            self._pending += 1
+
+        submitted_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self._record(started_at - submitted_at, time.perf_counter() - started_at)
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, job)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        获取哈希延迟和排队等待指标
+
+        Returns:
+            指标字典，时间单位为毫秒
+        """
+        with self._lock:
+            completed = self._completed or 1
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_hash_ms": round(self._total_hash_time / completed * 1000, 2),
+                "max_hash_ms": round(self._max_hash_time * 1000, 2),
+                "avg_queue_wait_ms": round(self._total_queue_wait / completed * 1000, 2),
+                "max_queue_wait_ms": round(self._max_queue_wait * 1000, 2)
+            }
+
+    def shutdown(self) -> None:
+        """
+        关闭线程池
+        """
+        self._executor.shutdown(wait=False)
+
+
+# 全局密码哈希线程池
+password_hasher = PasswordHasherPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
 
 
 def get_password_hash(password: str) -> str:
@@ -59,3 +199,55 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         logger.error(f"密码验证失败: {str(e)}")
         logger.error(f"错误堆栈: {traceback.format_exc()}")
         return False  # 验证过程出错时，安全起见返回False
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    验证密码，并在哈希参数过期时生成新哈希
+    
+    Args:
+        plain_password: 明文密码
+        hashed_password: 哈希后的密码
+    
+    Returns:
+        Tuple[bool, Optional[str]]: (密码是否匹配, 需要更新时的新哈希)
+    """
+    try:
+        truncated_password = plain_password[:72]
+        is_verified, new_hash = pwd_context.verify_and_update(truncated_password, hashed_password)
+        logger.info(f"密码验证结果: {'成功' if is_verified else '失败'}")
+        return is_verified, new_hash
+    except Exception as e:
+        logger.error(f"密码验证失败: {str(e)}")
+        logger.error(f"错误堆栈: {traceback.format_exc()}")
+        return False, None
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    在密码哈希线程池中生成密码哈希
+    
+    Raises:
+        PasswordHashingBusyError: 线程池已满
+    """
+    return await password_hasher.run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    在密码哈希线程池中验证密码
+    
+    Raises:
+        PasswordHashingBusyError: 线程池已满
+    """
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    在密码哈希线程池中验证密码并按需生成新哈希
+    
+    Raises:
+        PasswordHashingBusyError: 线程池已满
+    """
+    return await password_hasher.run(verify_and_update_password, plain_password, hashed_password)
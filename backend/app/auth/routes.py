@@ -11,9 +11,10 @@ from app.core.database import get_db
 from app.core.config import settings
 from app.models.user import User
 from app.auth.schemas import UserCreate, UserLogin, UserResponse, TokenResponse, RegisterResponse, LoginResponse
-from app.auth.password import get_password_hash, verify_password
+from app.auth.password import get_password_hash_async, verify_and_update_password_async
 from app.auth.jwt import create_access_token, get_current_user
 from app.auth.dependencies import get_current_active_user
+from app.auth.user_cache import user_cache
 
 # 创建路由器
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -98,8 +99,8 @@ async def register(user_data: UserCreate, request: Request, db: Session = Depend
                     detail="手机号已被注册"
                 )
         
-        # 创建新用户
-        hashed_password = get_password_hash(user_data.password)
+        # 创建新用户（哈希计算在专用线程池中执行，不阻塞事件循环）
+        hashed_password = await get_password_hash_async(user_data.password)
         new_user = User(
             username=user_data.username,
             email=user_data.email,
@@ -180,8 +181,11 @@ async def login(login_data: UserLogin, request: Request, db: Session = Depends(g
                 detail="账户已被锁定，请稍后再试"
             )
         
-        # 验证密码
-        if not verify_password(login_data.password, user.password_hash):
+        # 验证密码（哈希计算在专用线程池中执行，不阻塞事件循环）
+        is_verified, new_password_hash = await verify_and_update_password_async(
+            login_data.password, user.password_hash
+        )
+        if not is_verified:
             # 增加登录失败次数
             user.failed_login_attempts += 1
             logger.warning(f"登录失败 - 密码错误, 失败次数: {user.failed_login_attempts}, 标识符: {identifier}, IP: {client_ip}")
@@ -192,6 +196,7 @@ async def login(login_data: UserLogin, request: Request, db: Session = Depends(g
                 # 这里可以添加锁定逻辑，例如设置锁定时间
             
             db.commit()
+            user_cache.invalidate(user.username)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="用户名或密码错误"
@@ -207,8 +212,17 @@ async def login(login_data: UserLogin, request: Request, db: Session = Depends(g
         
         # 重置登录失败次数
         user.failed_login_attempts = 0
+        
+        # 哈希参数与当前配置不一致时透明升级
+        if new_password_hash and settings.PASSWORD_REHASH_ON_LOGIN:
+            user.password_hash = new_password_hash
+            logger.info(f"密码哈希已升级 - 用户ID: {user.user_id}")
+        
         db.commit()
         
+        # 登录成功后刷新认证缓存，确保后续请求读取到最新的用户状态
+        user_cache.invalidate(user.username)
+        
         # 创建访问令牌
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
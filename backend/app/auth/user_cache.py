@@ -0,0 +1,301 @@
+"""
+认证用户缓存
+
+get_current_user在每个需要认证的请求上都会按用户名查询用户。此模块提供
+一个短TTL、容量有限的用户快照缓存，命中时无需访问数据库即可完成
+锁定/激活状态检查。缓存后端可插拔：默认为进程内LRU缓存，配置
+USER_CACHE_REDIS_URL后使用Redis，多个worker共享同一份缓存。
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import UUID
+import json
+import logging
+import threading
+import time
+
+from sqlalchemy import DateTime
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from app.core.config import settings
+from app.models.user import User
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 缓存键前缀
+USER_CACHE_KEY_PREFIX = "auth:user:"
+
+# 不写入缓存的敏感字段，需要时由ORM按需加载
+USER_CACHE_EXCLUDED_FIELDS = {"password_hash"}
+
+
+class UserCacheBackend:
+    """
+    用户缓存后端接口，值为JSON字符串
+    """
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class InMemoryUserCacheBackend(UserCacheBackend):
+    """
+    进程内LRU缓存后端，条目按TTL过期，超过容量时淘汰最久未使用的条目
+    """
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class InMemoryRedis:
+    """
+    兼容redis-py常用接口(get/setex/delete/flushdb)的内存实现，用于测试
+    """
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def setex(self, key: str, ttl: int, value: Any) -> bool:
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def flushdb(self) -> bool:
+        with self._lock:
+            self._data.clear()
+        return True
+
+
+class RedisUserCacheBackend(UserCacheBackend):
+    """
+    Redis缓存后端，接受任意兼容redis-py接口的客户端
+    """
+    def __init__(self, client: Any):
+        self.client = client
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(key)
+        if value is None:
+            return None
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        self.client.setex(key, ttl, value)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(key)
+
+    def clear(self) -> None:
+        self.client.flushdb()
+
+
+def _encode_value(value: Any) -> Any:
+    """
+    将列值转换为可JSON序列化的值
+    """
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(column: Any, value: Any) -> Any:
+    """
+    根据列类型将JSON值还原为Python值
+    """
+    if value is None:
+        return None
+    if isinstance(column.type, PG_UUID):
+        return UUID(value)
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    return value
+
+
+class UserCache:
+    """
+    认证用户缓存，按令牌中的用户名(sub)缓存用户快照
+    """
+    def __init__(self, backend: UserCacheBackend, ttl: int = 30):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return f"{USER_CACHE_KEY_PREFIX}{username}"
+
+    def get(self, username: str) -> Optional[Dict[str, Any]]:
+        """
+        获取用户快照
+
+        Args:
+            username: 用户名
+
+        Returns:
+            用户字段字典，未命中时返回None
+        """
+        try:
+            value = self.backend.get(self._key(username))
+        except Exception as e:
+            logger.warning(f"读取用户缓存失败: {str(e)}")
+            return None
+        return json.loads(value) if value is not None else None
+
+    def set(self, user: User) -> None:
+        """
+        写入用户快照（不包含密码哈希）
+
+        Args:
+            user: 用户对象
+        """
+        snapshot = {
+            column.key: _encode_value(getattr(user, column.key))
+            for column in User.__table__.columns
+            if column.key not in USER_CACHE_EXCLUDED_FIELDS
+        }
+        try:
+            self.backend.set(self._key(user.username), json.dumps(snapshot), self.ttl)
+        except Exception as e:
+            logger.warning(f"写入用户缓存失败: {str(e)}")
+
+    def invalidate(self, username: Optional[str]) -> None:
+        """
+        使用户缓存失效
+
+        Args:
+            username: 用户名
+        """
+        if not username:
+            return
+        try:
+            self.backend.delete(self._key(username))
+            logger.debug(f"用户缓存已失效: {username}")
+        except Exception as e:
+            logger.warning(f"清除用户缓存失败: {str(e)}")
+
+    def clear(self) -> None:
+        """
+        清空所有用户缓存
+        """
+        self.backend.clear()
+
+    @staticmethod
+    def restore(db: Session, snapshot: Dict[str, Any]) -> User:
+        """
+        将快照还原为绑定到当前会话的用户对象，不发出SQL查询
+
+        未缓存的字段（如password_hash）会在首次访问时由ORM加载。
+
+        Args:
+            db: 数据库会话
+            snapshot: 用户字段字典
+
+        Returns:
+            User: 当前会话中的持久化用户对象
+        """
+        columns = User.__table__.columns
+        user = User(**{
+            key: _decode_value(columns[key], value)
+            for key, value in snapshot.items()
+            if key in columns
+        })
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+
+def _create_backend() -> UserCacheBackend:
+    """
+    根据配置创建缓存后端，Redis不可用时回退到进程内缓存
+    """
+    if settings.USER_CACHE_REDIS_URL:
+        try:
+            import redis
+            client = redis.Redis.from_url(settings.USER_CACHE_REDIS_URL)
+            logger.info("用户缓存使用Redis后端")
+            return RedisUserCacheBackend(client)
+        except Exception as e:
+            logger.warning(f"初始化Redis用户缓存失败，回退到进程内缓存: {str(e)}")
+    return InMemoryUserCacheBackend(max_size=settings.USER_CACHE_MAX_SIZE)
+
+
+# 全局用户缓存实例
+user_cache = UserCache(_create_backend(), ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+def get_user_by_username_cached(db: Session, username: str) -> Optional[User]:
+    """
+    按用户名获取用户，优先读取缓存
+
+    Args:
+        db: 数据库会话
+        username: 用户名
+
+    Returns:
+        User: 用户对象，如果不存在则返回None
+    """
+    if settings.USER_CACHE_ENABLED:
+        snapshot = user_cache.get(username)
+        if snapshot is not None:
+            return user_cache.restore(db, snapshot)
+
+    user = db.query(User).filter(User.username == username).first()
+    if user is not None and settings.USER_CACHE_ENABLED:
+        user_cache.set(user)
+    return user
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import EmailStr, validator
 import secrets
@@ -30,6 +30,12 @@ class Settings(BaseSettings):
     PASSWORD_REQUIRE_DIGIT: bool = True
     PASSWORD_REQUIRE_SPECIAL: bool = True
     
+    # 密码哈希配置
+    PASSWORD_HASH_WORKERS: int = 4  # 密码哈希专用线程池大小
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # 等待中的哈希任务上限，超出时返回429
+    PASSWORD_HASH_ROUNDS: Optional[int] = None  # pbkdf2_sha256迭代次数，为空时使用passlib默认值
+    PASSWORD_REHASH_ON_LOGIN: bool = False  # 登录成功时将迭代次数不同的旧哈希透明升级
+    
     # 数据库配置
     DATABASE_URL: str
     DATABASE_SCHEMA: str = "app_schema"
@@ -46,6 +52,50 @@ class Settings(BaseSettings):
     # 限流配置
     RATE_LIMIT_PER_MINUTE: int = 60
     
+    # 认证用户缓存配置
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_TTL_SECONDS: int = 30  # 缓存有效期，锁定/停用状态最多延迟该时间生效
+    USER_CACHE_MAX_SIZE: int = 10000  # 进程内缓存最大条目数
+    USER_CACHE_REDIS_URL: Optional[str] = None  # 配置后使用Redis共享缓存（需要安装redis包）
+    
+    # 食谱详情响应缓存配置
+    RECIPE_CACHE_ENABLED: bool = True
+    RECIPE_CACHE_TTL_SECONDS: int = 300  # 缓存有效期，条目每次使用前都会按版本校验
+    RECIPE_CACHE_MAX_SIZE: int = 2048  # 进程内缓存最大条目数
+    
+    # 食谱批量导入配置
+    BULK_IMPORT_CHUNK_SIZE: int = 1000  # 每块校验并COPY写入的食谱数
+    BULK_IMPORT_MAX_ERRORS: int = 1000  # 响应中返回的逐行错误上限
+    
+    # 趋势排行配置
+    TRENDING_REFRESH_SECONDS: int = 60  # 增量刷新间隔
+    TRENDING_FULL_REFRESH_SECONDS: int = 3600  # 全量重建间隔
+    TRENDING_MAX_ITEMS: int = 1000  # 每个时间窗口保留的排名数量
+    
+    # 个性化推荐配置
+    RECOMMENDER_REBUILD_SECONDS: int = 3600  # 食谱特征矩阵重建间隔
+    RECOMMENDER_MAX_TAGS: int = 200  # 标签特征维数
+    RECOMMENDER_MAX_INGREDIENTS: int = 500  # 食材特征维数
+    RECOMMENDER_PROFILE_CACHE_SIZE: int = 10000  # 缓存的用户画像数量
+    RECOMMENDER_PROFILE_TTL_SECONDS: int = 900  # 用户画像缓存有效期
+    
+    # 食材倒排索引配置
+    INGREDIENT_INDEX_REBUILD_SECONDS: int = 3600  # 全量重建间隔（创建/更新/删除食谱时增量更新）
+    
+    # 营养计算配置
+    NUTRITION_LLM_FALLBACK: bool = True  # 数据库中没有营养数据的食材调用AI服务估算并写回
+    NUTRITION_LLM_BATCH_SIZE: int = 30  # 每次AI估算请求包含的食材数
+    NUTRITION_PROFILE_CACHE_SIZE: int = 10000  # 进程内缓存的食材营养数据条目数
+    NUTRITION_BATCH_MAX_RECIPES: int = 500  # 批量营养分析单次请求的食谱数上限
+    NUTRITION_BACKFILL_CHUNK_SIZE: int = 1000  # 营养信息回填每块处理的食谱数
+    
+    # 饮食计划配置
+    DIET_PLAN_REBUILD_SECONDS: int = 3600  # 饮食计划营养矩阵重建间隔
+    DIET_PLAN_MAX_DAYS: int = 14  # 单个计划的最大天数
+    
+    # 购物清单配置
+    SHOPPING_LIST_MAX_RECIPES: int = 200  # 单次合并的食谱ID数上限
+    
     # 安全HTTP头配置
     SECURE_HTTP_HEADERS: bool = True
     
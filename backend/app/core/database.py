@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from sqlalchemy.exc import SQLAlchemyError, OperationalError, IntegrityError
 import logging
 import traceback
@@ -26,6 +27,38 @@ engine = None
 SessionLocal = None
 Base = None
 
+# 异步数据库引擎（asyncpg），与同步引擎并行存在，供异步路由使用
+async_engine: AsyncEngine = None
+AsyncSessionLocal = None
+
+
+def get_database_url() -> str:
+    """
+    获取当前使用的数据库URL（直连或PgBouncer）
+    
+    Returns:
+        str: 数据库URL
+    """
+    if settings.USE_PGBOUNCER:
+        return settings.PGBOUNCER_URL
+    return settings.DATABASE_URL
+
+
+def to_async_database_url(db_url: str) -> str:
+    """
+    将同步数据库URL转换为asyncpg驱动的URL
+    
+    Args:
+        db_url: 同步数据库URL（postgresql:// 或 postgresql+psycopg2://）
+    
+    Returns:
+        str: postgresql+asyncpg:// 格式的URL
+    """
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if db_url.startswith(prefix):
+            return "postgresql+asyncpg://" + db_url[len(prefix):]
+    return db_url
+
 def init_database():
     """
     初始化数据库连接
@@ -38,10 +71,7 @@ def init_database():
     try:
         # 创建数据库引擎
         logger.info(f"正在连接数据库...")
-        if settings.USE_PGBOUNCER:
-            db_url = settings.PGBOUNCER_URL
-        else:
-            db_url = settings.DATABASE_URL
+        db_url = get_database_url()
         
         engine = create_engine(
             db_url,
@@ -147,6 +177,96 @@ def get_db():
         logger.debug("数据库会话已关闭")
 
 
+def init_async_database():
+    """
+    初始化异步数据库引擎和会话工厂
+    
+    引擎在首次使用时才建立连接，与同步引擎共用连接池参数。
+    
+    Raises:
+        Exception: 异步引擎初始化失败时抛出
+    """
+    global async_engine, AsyncSessionLocal
+    
+    if async_engine is not None:
+        return True
+    
+    try:
+        logger.info("正在初始化异步数据库引擎...")
+        connect_args = {}
+        if settings.USE_PGBOUNCER:
+            # PgBouncer事务池模式不支持服务端预编译语句缓存
+            connect_args["statement_cache_size"] = 0
+        
+        async_engine = create_async_engine(
+            to_async_database_url(get_database_url()),
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            echo=False,
+            connect_args=connect_args
+        )
+        
+        AsyncSessionLocal = async_sessionmaker(
+            bind=async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False
+        )
+        
+        logger.info("异步数据库引擎初始化完成")
+        return True
+    except Exception as e:
+        logger.critical(f"异步数据库引擎初始化失败: {str(e)}")
+        logger.critical(f"错误堆栈: {traceback.format_exc()}")
+        raise Exception(f"异步数据库引擎初始化失败: {str(e)}")
+
+
+async def close_async_database():
+    """
+    关闭异步数据库引擎，释放连接池
+    """
+    global async_engine, AsyncSessionLocal
+    
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+        AsyncSessionLocal = None
+        logger.info("异步数据库引擎已关闭")
+
+
+async def get_async_db():
+    """
+    获取异步数据库会话（用于FastAPI依赖注入）
+    
+    查询在等待数据库时不会阻塞事件循环。
+    
+    Yields:
+        AsyncSession: 异步数据库会话
+    """
+    if AsyncSessionLocal is None:
+        init_async_database()
+    
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+            logger.debug("异步数据库事务提交成功")
+        except Exception as e:
+            await db.rollback()
+            # 只回滚事务，不捕获HTTPException等业务异常
+            # 让业务异常正常传播给FastAPI的异常处理器
+            if isinstance(e, (HTTPException, APIException)):
+                logger.debug(f"业务异常 - 异步事务已回滚: {str(e)}")
+                raise
+            else:
+                logger.error(f"异步数据库事务回滚 - 错误: {str(e)}")
+                logger.error(f"错误堆栈: {traceback.format_exc()}")
+                raise Exception(f"数据库操作错误: {str(e)}")
+
+
 def create_tables():
     """
     创建数据库表
@@ -0,0 +1,60 @@
+"""
+基于orjson的JSON响应
+
+orjson原生支持datetime、UUID和numpy类型，序列化速度明显快于标准库json，
+适合直接输出查询行组成的字典，不需要先构建pydantic模型再转换。
+FastJSONResponse在main.py中设为应用的默认响应类。
+
+路由返回pydantic模型时，FastAPI会先model_dump，再按response_model重新校验，
+最后经jsonable_encoder转换后才交给响应类序列化。已经构建好响应模型的路由
+可以直接返回ModelJSONResponse，由模型类上预编译的pydantic-core序列化器
+一次输出JSON字节，跳过重复校验和转换。
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# UTC时间输出为"Z"结尾，与pydantic的序列化结果保持一致
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    使用orjson序列化的JSON响应
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def dump_model_json(model: BaseModel) -> bytes:
+    """
+    用模型类预编译的序列化器输出JSON字节（不重新校验）
+
+    Args:
+        model: 已构建的pydantic模型
+
+    Returns:
+        JSON字节，与model_dump_json的结果一致
+    """
+    return model.__pydantic_serializer__.to_json(model)
+
+
+class ModelJSONResponse(JSONResponse):
+    """
+    直接序列化已校验pydantic模型的JSON响应
+
+    返回Response对象时FastAPI不再应用路由上的status_code，需要显式传入。
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return dump_model_json(content)
+        # 模型列表逐个序列化后拼接，其他内容交给orjson
+        if isinstance(content, list) and all(isinstance(item, BaseModel) for item in content):
+            return b"[" + b",".join(dump_model_json(item) for item in content) + b"]"
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
@@ -0,0 +1,338 @@
+"""
+饮食计划生成
+
+离线构建食谱营养矩阵（每行一个有营养信息的食谱，列为每份的卡路里、蛋白质、
+碳水化合物、脂肪，即nutrition_info总量除以servings），生成计划时不再查询食谱。
+
+每天按MEAL_SLOTS分为早、午、晚三餐，每餐的卡路里目标为每日目标乘以占比。
+每餐只在卡路里落在MEAL_CALORIE_RANGE范围内的食谱中选择，目标函数为全天
+四项营养总量与每日目标的加权相对误差平方和:
+  1. 每餐从与该餐目标最接近的INITIAL_CANDIDATES个食谱中随机取一个作为初始解
+  2. 坐标下降：依次固定其他两餐，在整个候选集中为当前餐选出使全天误差最小的
+     食谱（一次向量化计算），直到没有改进或达到MAX_PASSES轮
+一周内同一食谱不重复，候选食谱用完时才允许重复。
+"""
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import asyncio
+import logging
+import threading
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.nutrition_info import NutritionInfo
+from app.models.recipe import Recipe
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 营养矩阵的列顺序
+PLAN_NUTRIENTS = ("calories", "protein", "carbs", "fat")
+
+# 误差权重，卡路里偏差的影响是宏量营养素的两倍
+NUTRIENT_WEIGHTS = np.array([2.0, 1.0, 1.0, 1.0])
+
+# 每日餐次及其卡路里占比
+MEAL_SLOTS = (("breakfast", 0.25), ("lunch", 0.40), ("dinner", 0.35))
+
+# 每克宏量营养素的热量（千卡）
+MACRO_KCAL_PER_GRAM = {"protein": 4.0, "carbs": 4.0, "fat": 9.0}
+
+# 未指定宏量营养素目标时的供能比
+DEFAULT_MACRO_RATIO = {"protein": 0.20, "carbs": 0.50, "fat": 0.30}
+
+# 每餐候选食谱的卡路里范围（相对于该餐卡路里目标）
+MEAL_CALORIE_RANGE = (0.5, 1.6)
+
+# 初始解从每餐最接近目标的若干个食谱中随机选择，使每天的计划有变化
+INITIAL_CANDIDATES = 20
+
+# 坐标下降的最大轮数
+MAX_PASSES = 4
+
+
+def daily_targets(
+    calories: float,
+    protein: Optional[float] = None,
+    carbs: Optional[float] = None,
+    fat: Optional[float] = None
+) -> Dict[str, float]:
+    """
+    计算每日营养目标，未指定的宏量营养素按DEFAULT_MACRO_RATIO从卡路里换算
+
+    Args:
+        calories: 每日卡路里目标
+        protein: 每日蛋白质目标(g)
+        carbs: 每日碳水化合物目标(g)
+        fat: 每日脂肪目标(g)
+
+    Returns:
+        各营养素的每日目标
+    """
+    given = {"protein": protein, "carbs": carbs, "fat": fat}
+    targets = {"calories": float(calories)}
+    for name, value in given.items():
+        if value is None:
+            value = calories * DEFAULT_MACRO_RATIO[name] / MACRO_KCAL_PER_GRAM[name]
+        targets[name] = round(float(value), 1)
+    return targets
+
+
+def optimize_meal_plan(
+    values: np.ndarray,
+    target: np.ndarray,
+    days: int,
+    excluded: Optional[np.ndarray] = None,
+    seed: Optional[int] = None
+) -> np.ndarray:
+    """
+    为每天的每个餐次选择食谱
+
+    Args:
+        values: 营养矩阵，形状为(食谱数, len(PLAN_NUTRIENTS))
+        target: 每日营养目标向量
+        days: 天数
+        excluded: 不参与选择的行下标
+        seed: 随机种子
+
+    Returns:
+        形状为(days, len(MEAL_SLOTS))的行下标矩阵
+    """
+    n = len(values)
+    allowed = np.ones(n, dtype=bool)
+    if excluded is not None and excluded.size:
+        allowed[excluded] = False
+    if not allowed.any():
+        raise ValueError("没有可用于生成饮食计划的食谱")
+
+    # 误差 sum(w * ((x - t) / t)^2) 写成 |x * r - t * r|^2，r = sqrt(w) / t，
+    # 展开后每次只需一次矩阵-向量乘法: |x * r|^2 - 2 (x * r)·(t * r) + 常数
+    target = target.astype(np.float64)
+    ratio = np.sqrt(NUTRIENT_WEIGHTS) / np.maximum(target, 1.0)
+    scaled_target = target * ratio
+    scaled = values * ratio
+    calories = values[:, 0]
+
+    slots = []
+    for _, share in MEAL_SLOTS:
+        low, high = MEAL_CALORIE_RANGE
+        mask = allowed & (calories >= target[0] * share * low) & (calories <= target[0] * share * high)
+        rows = np.flatnonzero(mask if mask.any() else allowed)
+        block = np.ascontiguousarray(scaled[rows])
+        slots.append((rows, block, (block ** 2).sum(axis=1)))
+
+    rng = np.random.default_rng(seed)
+    used = np.zeros(n, dtype=bool)
+    plan = np.empty((days, len(MEAL_SLOTS)), dtype=np.int64)
+
+    def errors(slot: int, goal: np.ndarray, keep: int = -1) -> np.ndarray:
+        rows, block, norms = slots[slot]
+        result = norms - 2.0 * (block @ goal)
+        taken = used[rows]
+        if keep >= 0:
+            taken &= rows != keep
+        # 候选食谱用完时允许重复
+        if not taken.all():
+            result[taken] = np.inf
+        return result
+
+    for day in range(days):
+        # 初始解：每餐从与该餐目标最接近的食谱中随机选择
+        for slot, (_, share) in enumerate(MEAL_SLOTS):
+            rows = slots[slot][0]
+            meal_errors = errors(slot, scaled_target * share)
+            k = min(INITIAL_CANDIDATES, int(np.isfinite(meal_errors).sum()))
+            best = np.argpartition(meal_errors, k - 1)[:k]
+            plan[day, slot] = rows[rng.choice(best)]
+            used[plan[day, slot]] = True
+
+        # 坐标下降：逐餐替换为使全天误差最小的食谱
+        totals = scaled[plan[day]].sum(axis=0)
+        for _ in range(MAX_PASSES):
+            improved = False
+            for slot in range(len(MEAL_SLOTS)):
+                current = plan[day, slot]
+                rest = totals - scaled[current]
+                choice = slots[slot][0][int(np.argmin(errors(slot, scaled_target - rest, keep=current)))]
+                if choice != current:
+                    used[current] = False
+                    used[choice] = True
+                    plan[day, slot] = choice
+                    totals = rest + scaled[choice]
+                    improved = True
+            if not improved:
+                break
+    return plan
+
+
+class NutritionMatrix:
+    """
+    每份营养矩阵及对应的食谱
+    """
+    def __init__(self, recipe_ids: List[str], titles: List[str], values: np.ndarray, generation: int = 0):
+        self.recipe_ids = recipe_ids
+        self.titles = titles
+        self.row_index = {recipe_id: row for row, recipe_id in enumerate(recipe_ids)}
+        self.values = values
+        self.generation = generation
+
+    def rows(self, recipe_ids: Iterable[Any]) -> np.ndarray:
+        indexes = [self.row_index.get(str(recipe_id)) for recipe_id in recipe_ids]
+        return np.array([index for index in indexes if index is not None], dtype=np.int64)
+
+    @classmethod
+    def build(cls, db: Session, generation: int = 0) -> "NutritionMatrix":
+        """
+        从数据库加载有营养信息的食谱并构建每份营养矩阵
+
+        Args:
+            db: 数据库会话
+            generation: 矩阵版本号
+
+        Returns:
+            NutritionMatrix: 营养矩阵
+        """
+        rows = db.query(
+            Recipe.recipe_id, Recipe.title, Recipe.servings,
+            NutritionInfo.calories, NutritionInfo.protein, NutritionInfo.carbs, NutritionInfo.fat
+        ).join(NutritionInfo, NutritionInfo.recipe_id == Recipe.recipe_id).filter(NutritionInfo.calories > 0).all()
+
+        values = np.array(
+            [(row.calories, row.protein, row.carbs, row.fat) for row in rows], dtype=np.float64
+        ).reshape(len(rows), len(PLAN_NUTRIENTS))
+        servings = np.array([max(row.servings or 1, 1) for row in rows], dtype=np.float64)
+        values = np.nan_to_num(values) / servings[:, None]
+        return cls([str(row.recipe_id) for row in rows], [row.title for row in rows], values, generation)
+
+
+class DietPlanner:
+    """
+    基于营养矩阵的饮食计划生成器
+    """
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None, rebuild_interval: int = 3600):
+        self.session_factory = session_factory
+        self.rebuild_interval = rebuild_interval
+        self.matrix: Optional[NutritionMatrix] = None
+        self._rebuild_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _session(self) -> Session:
+        factory = self.session_factory
+        if factory is None:
+            from app.core.database import SessionLocal
+            factory = SessionLocal
+        return factory()
+
+    def rebuild(self, db: Optional[Session] = None) -> NutritionMatrix:
+        """
+        重建营养矩阵
+
+        Args:
+            db: 数据库会话，为空时自行创建
+
+        Returns:
+            NutritionMatrix: 新的营养矩阵
+        """
+        with self._rebuild_lock:
+            owns_session = db is None
+            db = db or self._session()
+            try:
+                started = time.perf_counter()
+                generation = self.matrix.generation + 1 if self.matrix else 1
+                matrix = NutritionMatrix.build(db, generation)
+            finally:
+                if owns_session:
+                    db.close()
+            self.matrix = matrix
+            logger.info(
+                f"饮食计划营养矩阵已重建: {len(matrix.recipe_ids)}个食谱，"
+                f"耗时{time.perf_counter() - started:.2f}秒"
+            )
+            return matrix
+
+    def generate(
+        self,
+        targets: Dict[str, float],
+        days: int = 7,
+        start_date: Optional[date] = None,
+        exclude_recipe_ids: Optional[Iterable[Any]] = None,
+        seed: Optional[int] = None,
+        matrix: Optional[NutritionMatrix] = None
+    ) -> Dict[str, Any]:
+        """
+        生成饮食计划
+
+        Args:
+            targets: 每日营养目标（见daily_targets）
+            days: 天数
+            start_date: 开始日期，为空时为今天
+            exclude_recipe_ids: 不使用的食谱ID
+            seed: 随机种子，相同的种子和目录生成相同的计划
+            matrix: 营养矩阵，为空时使用当前矩阵
+
+        Returns:
+            可直接保存到DietPlan.meal_plan的计划数据
+        """
+        matrix = matrix or self.matrix or self.rebuild()
+        target = np.array([targets[name] for name in PLAN_NUTRIENTS], dtype=np.float64)
+        plan = optimize_meal_plan(matrix.values, target, days, matrix.rows(exclude_recipe_ids or []), seed)
+
+        start_date = start_date or date.today()
+        plan_days = []
+        for day, rows in enumerate(plan):
+            totals = matrix.values[rows].sum(axis=0)
+            plan_days.append({
+                "day": day + 1,
+                "date": (start_date + timedelta(days=day)).isoformat(),
+                "meals": [
+                    {
+                        "meal": meal,
+                        "recipe_id": matrix.recipe_ids[row],
+                        "title": matrix.titles[row],
+                        **{name: round(float(value), 1) for name, value in zip(PLAN_NUTRIENTS, matrix.values[row])}
+                    }
+                    for (meal, _), row in zip(MEAL_SLOTS, rows)
+                ],
+                "totals": {name: round(float(value), 1) for name, value in zip(PLAN_NUTRIENTS, totals)},
+                # 相对每日目标的偏差百分比
+                "deviation": {
+                    name: round(float((value - goal) / goal * 100), 1) if goal else 0.0
+                    for name, value, goal in zip(PLAN_NUTRIENTS, totals, target)
+                }
+            })
+        return {"targets": targets, "days": plan_days}
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await run_in_threadpool(self.rebuild)
+            except Exception as e:
+                logger.error(f"重建饮食计划营养矩阵失败: {str(e)}")
+            await asyncio.sleep(self.rebuild_interval)
+
+    def start(self) -> None:
+        """
+        启动后台定时重建任务
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        停止后台定时重建任务
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# 全局饮食计划生成器实例
+diet_planner = DietPlanner(rebuild_interval=settings.DIET_PLAN_REBUILD_SECONDS)
@@ -0,0 +1,137 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List
+from app.core.database import get_db
+from app.core.responses import ModelJSONResponse
+from app.auth.dependencies import get_current_user
+from app.models.diet_plan import DietPlan
+from app.models.user import User
+from app.diet_plans.schemas import (
+    DietPlanGenerateRequest, DietPlanCreate, DietPlanUpdate, DietPlanListItem, DietPlanResponse
+)
+from app.diet_plans.services import DietPlanService
+from starlette.concurrency import run_in_threadpool
+
+router = APIRouter(prefix="/diet-plans", tags=["饮食计划"])
+
+
+def build_plan_list_item(plan: DietPlan) -> DietPlanListItem:
+    """
+    构建饮食计划列表项
+    """
+    return DietPlanListItem(
+        plan_id=str(plan.plan_id),
+        name=plan.name,
+        description=plan.description,
+        start_date=plan.start_date,
+        end_date=plan.end_date,
+        goal=plan.goal,
+        created_at=plan.created_at,
+        updated_at=plan.updated_at
+    )
+
+
+def build_plan_response(plan: DietPlan) -> DietPlanResponse:
+    """
+    构建饮食计划响应
+    """
+    return DietPlanResponse(
+        **build_plan_list_item(plan).model_dump(),
+        user_id=str(plan.user_id),
+        meal_plan=plan.meal_plan
+    )
+
+
+def get_user_plan_or_404(db: Session, plan_id: str, current_user: User) -> DietPlan:
+    plan = DietPlanService.get_plan(db, plan_id, current_user.user_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Diet plan not found")
+    return plan
+
+
+@router.post("/generate", response_model=DietPlanResponse, status_code=201)
+async def generate_diet_plan(
+    request: DietPlanGenerateRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    按每日卡路里和宏量营养素目标生成饮食计划并保存
+
+    食谱从内存中的营养矩阵选择，每天早、午、晚各一个食谱，一周内不重复。
+    """
+    try:
+        plan = await run_in_threadpool(
+            DietPlanService.generate_plan, db, current_user.user_id, request.model_dump()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ModelJSONResponse(build_plan_response(plan), status_code=201)
+
+
+@router.post("", response_model=DietPlanResponse, status_code=201)
+async def create_diet_plan(
+    plan: DietPlanCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    保存自定义饮食计划
+    """
+    new_plan = DietPlanService.create_plan(db, current_user.user_id, plan.model_dump())
+    return ModelJSONResponse(build_plan_response(new_plan), status_code=201)
+
+
+@router.get("", response_model=List[DietPlanListItem])
+async def get_diet_plans(
+    skip: int = Query(0, ge=0, description="跳过的记录数"),
+    limit: int = Query(20, ge=1, le=100, description="返回的记录数"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    获取当前用户的饮食计划列表（不含餐食详情）
+    """
+    plans = DietPlanService.get_user_plans(db, current_user.user_id, skip, limit)
+    return ModelJSONResponse([build_plan_list_item(plan) for plan in plans])
+
+
+@router.get("/{plan_id}", response_model=DietPlanResponse)
+async def get_diet_plan(
+    plan_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    获取饮食计划详情
+    """
+    return ModelJSONResponse(build_plan_response(get_user_plan_or_404(db, plan_id, current_user)))
+
+
+@router.put("/{plan_id}", response_model=DietPlanResponse)
+async def update_diet_plan(
+    plan_id: str,
+    plan_update: DietPlanUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    更新饮食计划
+    """
+    plan = get_user_plan_or_404(db, plan_id, current_user)
+    updated_plan = DietPlanService.update_plan(db, plan, plan_update.model_dump(exclude_unset=True))
+    return ModelJSONResponse(build_plan_response(updated_plan))
+
+
+@router.delete("/{plan_id}", status_code=204)
+async def delete_diet_plan(
+    plan_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    删除饮食计划
+    """
+    plan = get_user_plan_or_404(db, plan_id, current_user)
+    DietPlanService.delete_plan(db, plan)
+    return None
@@ -0,0 +1,52 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any
+from datetime import date, datetime
+from app.core.config import settings
+
+# 饮食计划生成请求模型
+class DietPlanGenerateRequest(BaseModel):
+    name: Optional[str] = Field(None, max_length=255, description="计划名称，为空时按天数生成")
+    description: Optional[str] = Field(None, description="计划描述")
+    goal: Optional[str] = Field(None, max_length=255, description="目标")
+    start_date: Optional[date] = Field(None, description="开始日期，为空时为今天")
+    days: int = Field(7, ge=1, le=settings.DIET_PLAN_MAX_DAYS, description="天数")
+    daily_calories: float = Field(2000, ge=800, le=6000, description="每日卡路里目标")
+    protein: Optional[float] = Field(None, gt=0, description="每日蛋白质目标(g)，为空时按20%供能换算")
+    carbs: Optional[float] = Field(None, gt=0, description="每日碳水化合物目标(g)，为空时按50%供能换算")
+    fat: Optional[float] = Field(None, gt=0, description="每日脂肪目标(g)，为空时按30%供能换算")
+    exclude_recipe_ids: List[str] = Field([], description="不使用的食谱ID")
+    seed: Optional[int] = Field(None, description="随机种子，相同的种子和食谱目录生成相同的计划")
+
+# 饮食计划创建模型
+class DietPlanCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255, description="计划名称")
+    description: Optional[str] = Field(None, description="计划描述")
+    start_date: datetime = Field(..., description="开始日期")
+    end_date: Optional[datetime] = Field(None, description="结束日期")
+    meal_plan: Dict[str, Any] = Field(..., description="每日餐食计划")
+    goal: Optional[str] = Field(None, max_length=255, description="目标")
+
+# 饮食计划更新模型
+class DietPlanUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=255, description="计划名称")
+    description: Optional[str] = Field(None, description="计划描述")
+    start_date: Optional[datetime] = Field(None, description="开始日期")
+    end_date: Optional[datetime] = Field(None, description="结束日期")
+    meal_plan: Optional[Dict[str, Any]] = Field(None, description="每日餐食计划")
+    goal: Optional[str] = Field(None, max_length=255, description="目标")
+
+# 饮食计划列表项模型（不含餐食计划）
+class DietPlanListItem(BaseModel):
+    plan_id: str = Field(..., description="饮食计划ID")
+    name: str = Field(..., description="计划名称")
+    description: Optional[str] = Field(None, description="计划描述")
+    start_date: datetime = Field(..., description="开始日期")
+    end_date: Optional[datetime] = Field(None, description="结束日期")
+    goal: Optional[str] = Field(None, description="目标")
+    created_at: Optional[datetime] = Field(None, description="创建时间")
+    updated_at: Optional[datetime] = Field(None, description="更新时间")
+
+# 饮食计划响应模型
+class DietPlanResponse(DietPlanListItem):
+    user_id: str = Field(..., description="用户ID")
+    meal_plan: Dict[str, Any] = Field(..., description="每日餐食计划")
@@ -0,0 +1,138 @@
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime, time as datetime_time, timedelta, timezone
+from uuid import UUID
+from app.models.diet_plan import DietPlan
+from app.diet_plans.planner import daily_targets, diet_planner
+
+class DietPlanService:
+    """
+    饮食计划服务类，处理饮食计划的生成和存储
+    """
+
+    @staticmethod
+    def get_user_plans(db: Session, user_id: Any, skip: int = 0, limit: int = 20) -> List[DietPlan]:
+        """
+        获取用户的饮食计划列表，按开始日期倒序
+
+        Args:
+            db: 数据库会话
+            user_id: 用户ID
+            skip: 跳过的记录数
+            limit: 返回的记录数
+
+        Returns:
+            饮食计划列表
+        """
+        return db.query(DietPlan).filter(DietPlan.user_id == user_id).order_by(
+            DietPlan.start_date.desc(), DietPlan.created_at.desc()
+        ).offset(skip).limit(limit).all()
+
+    @staticmethod
+    def get_plan(db: Session, plan_id: Any, user_id: Any) -> Optional[DietPlan]:
+        """
+        获取用户的饮食计划
+
+        Args:
+            db: 数据库会话
+            plan_id: 饮食计划ID
+            user_id: 用户ID
+
+        Returns:
+            饮食计划对象，不存在或不属于该用户时返回None
+        """
+        try:
+            plan_uuid = plan_id if isinstance(plan_id, UUID) else UUID(str(plan_id))
+        except ValueError:
+            return None
+        return db.query(DietPlan).filter(DietPlan.plan_id == plan_uuid, DietPlan.user_id == user_id).first()
+
+    @staticmethod
+    def create_plan(db: Session, user_id: Any, plan_data: Dict[str, Any]) -> DietPlan:
+        """
+        创建饮食计划
+
+        Args:
+            db: 数据库会话
+            user_id: 用户ID
+            plan_data: 饮食计划数据
+
+        Returns:
+            创建的饮食计划对象
+        """
+        plan = DietPlan(user_id=user_id, **plan_data)
+        db.add(plan)
+        db.commit()
+        db.refresh(plan)
+        return plan
+
+    @staticmethod
+    def update_plan(db: Session, plan: DietPlan, plan_data: Dict[str, Any]) -> DietPlan:
+        """
+        更新饮食计划
+
+        Args:
+            db: 数据库会话
+            plan: 饮食计划对象
+            plan_data: 更新数据（只包含需要修改的字段）
+
+        Returns:
+            更新后的饮食计划对象
+        """
+        for field, value in plan_data.items():
+            if hasattr(plan, field):
+                setattr(plan, field, value)
+        db.commit()
+        db.refresh(plan)
+        return plan
+
+    @staticmethod
+    def delete_plan(db: Session, plan: DietPlan) -> None:
+        """
+        删除饮食计划
+
+        Args:
+            db: 数据库会话
+            plan: 饮食计划对象
+        """
+        db.delete(plan)
+        db.commit()
+
+    @staticmethod
+    def generate_plan(db: Session, user_id: Any, options: Dict[str, Any]) -> DietPlan:
+        """
+        按营养目标生成饮食计划并保存
+
+        Args:
+            db: 数据库会话
+            user_id: 用户ID
+            options: 生成参数（见DietPlanGenerateRequest）
+
+        Returns:
+            创建的饮食计划对象
+        """
+        days = options.get("days", 7)
+        start_date = options.get("start_date") or date.today()
+        targets = daily_targets(
+            options.get("daily_calories", 2000),
+            options.get("protein"),
+            options.get("carbs"),
+            options.get("fat")
+        )
+        meal_plan = diet_planner.generate(
+            targets,
+            days=days,
+            start_date=start_date,
+            exclude_recipe_ids=options.get("exclude_recipe_ids"),
+            seed=options.get("seed")
+        )
+
+        start = datetime.combine(start_date, datetime_time.min, tzinfo=timezone.utc)
+        return DietPlanService.create_plan(db, user_id, {
+            "name": options.get("name") or f"{days}天饮食计划",
+            "description": options.get("description"),
+            "goal": options.get("goal"),
+            "start_date": start,
+            "end_date": start + timedelta(days=days - 1),
+            "meal_plan": meal_plan
+        })
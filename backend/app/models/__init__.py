@@ -6,6 +6,8 @@ from .favorite import Favorite
 from .rating import Rating
 from .nutrition_info import NutritionInfo
 from .diet_plan import DietPlan
+from .ai_recipe_cache import AIRecipeCache
+from .ai_job import AIJob
 
 __all__ = [
     "User",
@@ -15,5 +17,7 @@ __all__ = [
     "Favorite",
     "Rating",
     "NutritionInfo",
-    "DietPlan"
+    "DietPlan",
+    "AIRecipeCache",
+    "AIJob"
 ]
\ No newline at end of file
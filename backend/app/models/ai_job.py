@@ -0,0 +1,33 @@
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+from app.core.database import Base
+import uuid
+
+class AIJob(Base):
+    __tablename__ = "ai_jobs"
+
+    job_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, comment="任务ID")
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, comment="提交任务的用户ID")
+    kind = Column(String(50), nullable=False, default="generate_recipe", comment="任务类型")
+    status = Column(String(20), nullable=False, default="queued", server_default="queued", comment="任务状态(queued/running/succeeded/failed)")
+    params = Column(JSONB, nullable=False, comment="任务参数")
+    result = Column(JSONB, comment="任务结果")
+    error = Column(Text, comment="失败原因")
+    recipe_id = Column(UUID(as_uuid=True), ForeignKey("recipes.recipe_id", ondelete="SET NULL"), comment="生成并保存的食谱ID")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0", comment="已执行次数")
+    worker_id = Column(String(100), comment="执行任务的worker")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="提交时间")
+    started_at = Column(DateTime(timezone=True), comment="开始执行时间")
+    finished_at = Column(DateTime(timezone=True), comment="完成时间")
+
+    __table_args__ = (
+        # worker按提交顺序领取排队中的任务（FOR UPDATE SKIP LOCKED）
+        Index("ix_ai_jobs_queued_created_at", "created_at", postgresql_where=text("status = 'queued'")),
+        # 回收执行超时的任务
+        Index("ix_ai_jobs_running_started_at", "started_at", postgresql_where=text("status = 'running'")),
+        Index("ix_ai_jobs_user_id_created_at", "user_id", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<AIJob(job_id={self.job_id}, kind={self.kind}, status={self.status})>"
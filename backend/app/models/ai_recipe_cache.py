@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, Integer, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class AIRecipeCache(Base):
+    __tablename__ = "ai_recipe_cache"
+    
+    cache_key = Column(String(64), primary_key=True, comment="规范化请求参数的SHA-256哈希")
+    model = Column(String(100), nullable=False, comment="生成所用模型")
+    response = Column(JSONB, nullable=False, comment="解析后的食谱数据")
+    hit_count = Column(Integer, nullable=False, default=0, server_default="0", comment="命中次数")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
+    last_hit_at = Column(DateTime(timezone=True), server_default=func.now(), comment="最近命中时间")
+    expires_at = Column(DateTime(timezone=True), nullable=False, comment="过期时间")
+    
+    __table_args__ = (
+        # 清理过期条目和按最近使用时间淘汰
+        Index("ix_ai_recipe_cache_expires_at", "expires_at"),
+        Index("ix_ai_recipe_cache_last_hit_at", "last_hit_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey
+from sqlalchemy import Column, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -21,6 +21,11 @@ class Favorite(Base):
     user = relationship("User", back_populates="favorites")
     recipe = relationship("Recipe", back_populates="favorites")
     
+    __table_args__ = (
+        # 趋势排行按时间范围增量读取收藏事件
+        Index("ix_favorites_created_at_recipe_id", "created_at", "recipe_id"),
+    )
+    
     def __repr__(self):
         return f"<Favorite(favorite_id={self.favorite_id}, user_id={self.user_id}, recipe_id={self.recipe_id})>"
     
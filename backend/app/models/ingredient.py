@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -14,4 +14,9 @@ class Ingredient(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     
     # 关系
-    recipe_ingredients = relationship("RecipeIngredient", back_populates="ingredient", cascade="all, delete-orphan")
\ No newline at end of file
+    recipe_ingredients = relationship("RecipeIngredient", back_populates="ingredient", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # 名称唯一索引，支持INSERT ... ON CONFLICT (name)批量写入
+        Index("ux_ingredients_name", "name", unique=True),
+    )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -21,4 +21,6 @@ class Rating(Base):
     # 唯一约束，确保用户不会重复评分同一食谱
     __table_args__ = (
         UniqueConstraint('user_id', 'recipe_id', name='_user_recipe_rating_uc'),
+        # 趋势排行按时间范围增量读取评分事件
+        Index("ix_ratings_created_at_recipe_id", "created_at", "recipe_id", "score"),
     )
\ No newline at end of file
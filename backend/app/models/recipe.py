@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, Integer, Float, DateTime, ForeignKey, JSON, Index, Computed, DDL, event
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR, JSONB
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.core.database import Base
 import uuid
 
@@ -17,13 +17,89 @@ class Recipe(Base):
     difficulty = Column(String(50), nullable=False, index=True, comment="难度")
     author_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, comment="作者ID")
     ingredients = Column(JSON, nullable=True, comment="食材列表(JSON)")
-    tags = Column(JSON, nullable=True, index=True, comment="标签列表(JSON)")
+    tags = Column(JSONB, nullable=True, comment="标签列表(JSONB)")
     image_url = Column(String(500), nullable=True, comment="图片URL")
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="更新时间")
+    # 由数据库触发器维护（建表时随表创建，已有数据库见add_recipe_search.py），覆盖标题、描述、步骤和食材名称。
+    # 只在检索条件和排序表达式中使用，延迟加载以免每次select(Recipe)都读取整个向量；
+    # 访问属性时直接报错，避免在异步会话中触发隐式加载
+    search_vector = deferred(Column(TSVECTOR, nullable=True, comment="全文检索向量"), raiseload=True)
+    # 评分聚合，由RecipeService.rate_recipe增量维护，可用reconcile_rating_stats重建
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0", comment="评分人数")
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0", comment="评分总和")
+    rating_avg = Column(
+        Float,
+        Computed("CASE WHEN rating_count > 0 THEN rating_sum::float8 / rating_count END", persisted=True),
+        comment="平均评分"
+    )
     
     # 关系
     author = relationship("User", back_populates="recipes")
     nutrition_info = relationship("NutritionInfo", back_populates="recipe", uselist=False, cascade="all, delete-orphan")
     ratings = relationship("Rating", back_populates="recipe", cascade="all, delete-orphan")
-    favorites = relationship("Favorite", back_populates="recipe", cascade="all, delete-orphan")
\ No newline at end of file
+    favorites = relationship("Favorite", back_populates="recipe", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # 复合索引，支持按(created_at, recipe_id)进行键集分页
+        Index("ix_recipes_created_at_recipe_id", "created_at", "recipe_id"),
+        # 全文检索索引
+        Index("ix_recipes_search_vector", "search_vector", postgresql_using="gin"),
+        # 三元组索引，支持中文等未分词文本的ILIKE匹配（需要pg_trgm扩展）
+        Index("ix_recipes_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index(
+            "ix_recipes_description_trgm", "description",
+            postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}
+        ),
+        # 标签包含查询(@>)索引
+        Index("ix_recipes_tags_gin", "tags", postgresql_using="gin", postgresql_ops={"tags": "jsonb_path_ops"}),
+        # 按评分排序索引
+        Index(
+            "ix_recipes_rating",
+            rating_avg.desc().nullslast(), rating_count.desc(), created_at.desc(), recipe_id.desc()
+        ),
+    )
+
+
+# 全文检索向量计算函数：标题(A) > 描述和食材名称(B) > 烹饪步骤(C)
+# 中文内容没有内置分词器，统一使用simple配置；未分词的中文由pg_trgm三元组索引补充
+SEARCH_VECTOR_FUNCTION = """
+    CREATE OR REPLACE FUNCTION app_schema.recipe_search_vector(
+        p_title TEXT, p_description TEXT, p_instructions TEXT, p_ingredients JSONB
+    ) RETURNS tsvector AS $$
+        SELECT
+            setweight(to_tsvector('simple', coalesce(p_title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(p_description, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce((
+                SELECT string_agg(elem->>'name', ' ')
+                FROM jsonb_array_elements(
+                    CASE WHEN jsonb_typeof(p_ingredients) = 'array' THEN p_ingredients ELSE '[]'::jsonb END
+                ) AS elem
+            ), '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(p_instructions, '')), 'C')
+    $$ LANGUAGE sql IMMUTABLE
+"""
+
+SEARCH_VECTOR_TRIGGER_FUNCTION = """
+    CREATE OR REPLACE FUNCTION app_schema.recipes_search_vector_trigger() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := app_schema.recipe_search_vector(
+            NEW.title, NEW.description, NEW.instructions, to_jsonb(NEW.ingredients)
+        );
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+SEARCH_VECTOR_TRIGGER = """
+    CREATE TRIGGER trg_recipes_search_vector
+    BEFORE INSERT OR UPDATE OF title, description, instructions, ingredients
+    ON app_schema.recipes
+    FOR EACH ROW EXECUTE FUNCTION app_schema.recipes_search_vector_trigger()
+"""
+
+# create_all建表时一并安装检索所需的扩展、函数和触发器：
+# 三元组索引随表创建，扩展必须在建表之前启用
+event.listen(Recipe.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+for statement in (SEARCH_VECTOR_FUNCTION, SEARCH_VECTOR_TRIGGER_FUNCTION, SEARCH_VECTOR_TRIGGER):
+    event.listen(Recipe.__table__, "after_create", DDL(statement))
@@ -0,0 +1,283 @@
+"""
+食谱批量导入
+
+按块校验NDJSON格式的RecipeCreate数据，通过PostgreSQL COPY写入临时暂存表，
+再用集合SQL合并到recipes、nutrition_info、ingredients和recipe_ingredients。
+POST /api/recipes/bulk 接口和 scripts/import_recipes.py 命令行工具共用此模块。
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import io
+import json
+import logging
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.utils import generate_recipe_id
+from app.recipes.schemas import RecipeCreate
+from app.recipes.services import RecipeService, normalize_ingredient_name
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 暂存表在连接内复用，事务提交时自动清空
+STAGING_TABLES_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS stg_recipes
+    (LIKE app_schema.recipes INCLUDING DEFAULTS) ON COMMIT DELETE ROWS;
+CREATE TEMP TABLE IF NOT EXISTS stg_nutrition_info (
+    recipe_id uuid NOT NULL,
+    calories float8,
+    protein float8,
+    carbs float8,
+    fat float8,
+    fiber float8,
+    sugar float8,
+    sodium float8,
+    additional_nutrients json
+) ON COMMIT DELETE ROWS;
+CREATE TEMP TABLE IF NOT EXISTS stg_recipe_ingredients (
+    recipe_id uuid NOT NULL,
+    name varchar(255) NOT NULL,
+    quantity float8,
+    unit varchar(50)
+) ON COMMIT DELETE ROWS;
+"""
+
+RECIPE_COPY_COLUMNS = (
+    "recipe_id", "author_id", "title", "description", "instructions",
+    "cooking_time", "servings", "difficulty", "ingredients", "tags",
+    "image_url", "steps"
+)
+
+NUTRITION_COPY_COLUMNS = (
+    "recipe_id", "calories", "protein", "carbs", "fat",
+    "fiber", "sugar", "sodium", "additional_nutrients"
+)
+
+RECIPE_INGREDIENT_COPY_COLUMNS = ("recipe_id", "name", "quantity", "unit")
+
+MERGE_STATEMENTS = (
+    f"""
+    INSERT INTO app_schema.recipes ({", ".join(RECIPE_COPY_COLUMNS)})
+    SELECT {", ".join(RECIPE_COPY_COLUMNS)} FROM stg_recipes
+    """,
+    f"""
+    INSERT INTO app_schema.nutrition_info ({", ".join(NUTRITION_COPY_COLUMNS)})
+    SELECT {", ".join(NUTRITION_COPY_COLUMNS)} FROM stg_nutrition_info
+    """,
+    """
+    INSERT INTO app_schema.ingredients (name, unit)
+    SELECT DISTINCT ON (name) name, unit FROM stg_recipe_ingredients
+    ORDER BY name
+    ON CONFLICT (name) DO NOTHING
+    """,
+    """
+    INSERT INTO app_schema.recipe_ingredients (recipe_id, ingredient_id, quantity, unit)
+    SELECT s.recipe_id, i.ingredient_id, s.quantity, s.unit
+    FROM stg_recipe_ingredients s
+    JOIN app_schema.ingredients i ON i.name = s.name
+    """,
+)
+
+
+def _copy_value(value: Any) -> str:
+    """
+    将Python值编码为COPY文本格式的字段
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_rows(cursor: Any, table: str, columns: Tuple[str, ...], rows: List[Tuple[Any, ...]]) -> None:
+    """
+    使用COPY FROM STDIN将行写入暂存表
+    """
+    if not rows:
+        return
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """
+    将pydantic校验错误格式化为单行描述
+    """
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'body'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+class BulkImportResult:
+    """
+    批量导入进度计数和逐行错误
+    """
+    def __init__(self, max_errors: int = 1000):
+        self.max_errors = max_errors
+        self.total = 0
+        self.imported = 0
+        self.failed = 0
+        self.chunks = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.errors_truncated = False
+
+    def add_error(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": error})
+        else:
+            self.errors_truncated = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "imported": self.imported,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "errors": self.errors,
+            "errors_truncated": self.errors_truncated
+        }
+
+
+class RecipeBulkImporter:
+    """
+    食谱批量导入器
+
+    调用add逐行送入NDJSON数据，缓冲区满时add返回True，调用方随后调用flush
+    （接口中在线程池里执行）。全部送入后调用finish写入剩余数据。
+    """
+    def __init__(
+        self,
+        db: Session,
+        author_id: Any,
+        chunk_size: int = 1000,
+        max_errors: int = 1000,
+        progress_callback: Optional[Callable[[BulkImportResult], None]] = None
+    ):
+        self.db = db
+        self.author_id = str(author_id)
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+        self.result = BulkImportResult(max_errors=max_errors)
+        self._pending: List[Tuple[int, RecipeCreate]] = []
+
+    def add(self, line_no: int, raw: Any) -> bool:
+        """
+        校验一行NDJSON数据并加入缓冲区
+
+        Args:
+            line_no: 行号（从1开始）
+            raw: 行内容（str或bytes）
+
+        Returns:
+            缓冲区是否已满，需要调用flush
+        """
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8", errors="replace")
+        if not raw.strip():
+            return False
+
+        self.result.total += 1
+        try:
+            self._pending.append((line_no, RecipeCreate.model_validate_json(raw)))
+        except ValidationError as e:
+            self.result.add_error(line_no, format_validation_error(e))
+        return len(self._pending) >= self.chunk_size
+
+    def flush(self) -> None:
+        """
+        将缓冲区中的食谱写入数据库，每块一个事务
+        """
+        if not self._pending:
+            return
+        chunk, self._pending = self._pending, []
+        self.result.chunks += 1
+
+        try:
+            self._load_chunk(chunk)
+            self.db.commit()
+            self.result.imported += len(chunk)
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"批量导入第{self.result.chunks}块失败，逐行重试以定位错误: {str(e)}")
+            self._load_rows_individually(chunk)
+
+        logger.info(
+            f"批量导入进度: 已处理{self.result.total}行，"
+            f"成功{self.result.imported}，失败{self.result.failed}"
+        )
+        if self.progress_callback:
+            self.progress_callback(self.result)
+
+    def finish(self) -> BulkImportResult:
+        """
+        写入剩余数据并返回导入结果
+        """
+        self.flush()
+        return self.result
+
+    def _load_chunk(self, chunk: List[Tuple[int, RecipeCreate]]) -> None:
+        """
+        通过COPY写入暂存表并合并到正式表
+        """
+        recipe_rows = []
+        nutrition_rows = []
+        ingredient_rows = []
+        for _, recipe in chunk:
+            recipe_id = generate_recipe_id()
+            ingredients = [ing.model_dump() for ing in recipe.ingredients or []]
+            steps = [step.strip() for step in recipe.instructions.split('\n') if step.strip()]
+            recipe_rows.append((
+                recipe_id, self.author_id, recipe.title, recipe.description, recipe.instructions,
+                recipe.cooking_time, recipe.servings, recipe.difficulty, ingredients, recipe.tags or [],
+                recipe.image_url, steps
+            ))
+            if recipe.nutrition_info:
+                nutrition = recipe.nutrition_info
+                nutrition_rows.append((
+                    recipe_id, nutrition.calories, nutrition.protein, nutrition.carbs, nutrition.fat,
+                    nutrition.fiber, nutrition.sugar, nutrition.sodium, nutrition.additional_nutrients
+                ))
+            for ing in ingredients:
+                name = normalize_ingredient_name(ing["name"])
+                if name:
+                    ingredient_rows.append((recipe_id, name, ing["quantity"], ing.get("unit")))
+
+        connection = self.db.connection()
+        connection.execute(text(STAGING_TABLES_DDL))
+        cursor = connection.connection.cursor()
+        try:
+            _copy_rows(cursor, "stg_recipes", RECIPE_COPY_COLUMNS, recipe_rows)
+            _copy_rows(cursor, "stg_nutrition_info", NUTRITION_COPY_COLUMNS, nutrition_rows)
+            _copy_rows(cursor, "stg_recipe_ingredients", RECIPE_INGREDIENT_COPY_COLUMNS, ingredient_rows)
+        finally:
+            cursor.close()
+
+        for statement in MERGE_STATEMENTS:
+            connection.execute(text(statement))
+
+    def _load_rows_individually(self, chunk: List[Tuple[int, RecipeCreate]]) -> None:
+        """
+        块写入失败时逐行写入，记录导致失败的具体行
+        """
+        for line_no, recipe in chunk:
+            try:
+                RecipeService.create_recipe(self.db, self.author_id, recipe.model_dump())
+                self.result.imported += 1
+            except Exception as e:
+                self.db.rollback()
+                self.result.add_error(line_no, str(e).split("\n")[0])
@@ -0,0 +1,170 @@
+"""
+食谱详情响应缓存
+
+缓存序列化后的RecipeResponse字节，按recipe_id索引并记录生成时的版本
+（食谱的updated_at、营养信息行版本和作者名称，见RecipeService.get_recipe_version_async）。
+每次请求先用一次按主键的轻量查询读取当前版本，与缓存条目一致时直接返回缓存
+或304，无需加载ORM对象；版本不一致的条目视为未命中。因此其他worker进程的
+更新和RecipeService之外的写入（如营养信息回填）不会导致返回陈旧内容。
+食谱更新、删除和评分时RecipeService仍会主动失效本进程的条目以尽早释放内存。
+"""
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Optional
+from uuid import UUID
+import hashlib
+import logging
+import threading
+import time
+
+from app.core.config import settings
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class CachedRecipeResponse:
+    """
+    缓存的食谱详情响应
+    """
+    __slots__ = ("body", "etag", "last_modified", "updated_at", "version", "expires_at")
+
+    def __init__(self, body: bytes, updated_at: Optional[datetime], expires_at: float, version: Any = None):
+        self.body = body
+        self.updated_at = updated_at
+        self.version = version
+        self.expires_at = expires_at
+        # ETag由版本号和内容摘要组成，评分等不改变updated_at的变化也会反映到ETag
+        version = updated_at.timestamp() if updated_at else 0
+        digest = hashlib.sha1(body).hexdigest()[:16]
+        self.etag = f'"{version:.6f}-{digest}"'
+        self.last_modified = format_datetime(
+            (updated_at or datetime.now(timezone.utc)).astimezone(timezone.utc), usegmt=True
+        )
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """
+        判断If-None-Match请求头是否与当前ETag匹配
+
+        Args:
+            if_none_match: If-None-Match请求头的值
+
+        Returns:
+            是否匹配
+        """
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            # 弱比较：忽略W/前缀
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == self.etag:
+                return True
+        return False
+
+
+class RecipeResponseCache:
+    """
+    进程内LRU食谱详情缓存，条目按TTL过期以限制多worker之间的陈旧时间
+    """
+    def __init__(self, max_size: int = 1024, ttl: int = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CachedRecipeResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(recipe_id: Any) -> Optional[str]:
+        try:
+            return str(recipe_id if isinstance(recipe_id, UUID) else UUID(str(recipe_id)))
+        except ValueError:
+            return None
+
+    def get(self, recipe_id: Any, version: Any = None) -> Optional[CachedRecipeResponse]:
+        """
+        获取缓存的响应
+
+        Args:
+            recipe_id: 食谱ID
+            version: 食谱当前版本，与缓存条目的版本不一致时视为未命中
+
+        Returns:
+            缓存条目，未命中、已过期或版本不一致时返回None
+        """
+        key = self._key(recipe_id)
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic() or entry.version != version:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(
+        self,
+        recipe_id: Any,
+        body: bytes,
+        updated_at: Optional[datetime],
+        version: Any = None
+    ) -> CachedRecipeResponse:
+        """
+        写入序列化后的响应
+
+        Args:
+            recipe_id: 食谱ID
+            body: 序列化后的RecipeResponse JSON字节
+            updated_at: 食谱更新时间
+            version: 生成响应前读取的食谱版本
+
+        Returns:
+            新的缓存条目
+        """
+        entry = CachedRecipeResponse(body, updated_at, time.monotonic() + self.ttl, version)
+        key = self._key(recipe_id)
+        if key is None:
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, recipe_id: Any) -> None:
+        """
+        使指定食谱的缓存失效
+
+        Args:
+            recipe_id: 食谱ID
+        """
+        key = self._key(recipe_id)
+        if key is None:
+            return
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                logger.debug(f"食谱详情缓存已失效: {key}")
+
+    def clear(self) -> None:
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+# 全局食谱详情缓存实例
+recipe_response_cache = RecipeResponseCache(
+    max_size=settings.RECIPE_CACHE_MAX_SIZE,
+    ttl=settings.RECIPE_CACHE_TTL_SECONDS
+)
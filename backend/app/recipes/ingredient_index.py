@@ -0,0 +1,413 @@
+"""
+按现有食材查找食谱（"我能做什么"）
+
+内存中的倒排索引：每个有食材的食谱对应一个整数行号，每种食材（ingredient_id）
+对应一个升序的行号数组（int32）。查询时把用户食材的倒排数组拼接后用一次
+bincount得到每个食谱命中的食材数，再与食谱的食材总数比较:
+  - coverage: 按覆盖率（命中数 / 食材总数）降序，其次缺少的食材数升序
+  - missing:  按缺少的食材数升序，其次命中数降序
+只有命中至少一种食材的食谱参与排序，排序用argpartition只对前skip + limit个
+做完整排序。
+
+食谱创建、更新食材和删除时由RecipeService增量更新索引；批量导入等直接写表的
+改动由后台定时全量重建体现，重建同时回收已删除食谱占用的行号。
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.ingredient import Ingredient
+from app.models.recipe_ingredient import RecipeIngredient
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 支持的排序方式
+COOKABLE_SORT_MODES = ("coverage", "missing")
+
+# coverage排序中缺少食材数的次要权重，远小于不同覆盖率之间的差距
+MISSING_TIEBREAK = 1e-8
+
+
+class IngredientInvertedIndex:
+    """
+    食材到食谱行号的倒排索引
+    """
+    def __init__(
+        self,
+        recipe_ids: List[Optional[str]],
+        row_ptr: np.ndarray,
+        row_ingredients: np.ndarray,
+        ingredient_names: Dict[int, str],
+        generation: int = 0
+    ):
+        # 行号 -> 食谱ID（已删除的行为None）
+        self.recipe_ids = recipe_ids
+        self.row_index = {recipe_id: row for row, recipe_id in enumerate(recipe_ids) if recipe_id is not None}
+        # 构建时每行的食材（CSR格式），构建后修改过的行保存在_overrides中
+        self.row_ptr = row_ptr
+        self.row_ingredients = row_ingredients
+        self._overrides: Dict[int, np.ndarray] = {}
+        # 每行的食材数，容量按倍数增长
+        self.sizes = np.diff(row_ptr).astype(np.int32)
+        self.count = len(recipe_ids)
+        self.ingredient_names = ingredient_names
+        self.name_index = {name: ingredient_id for ingredient_id, name in ingredient_names.items()}
+        self.postings = self._build_postings()
+        self.generation = generation
+
+    def _build_postings(self) -> Dict[int, np.ndarray]:
+        rows = np.repeat(np.arange(self.count, dtype=np.int32), np.diff(self.row_ptr))
+        # 稳定排序保证每种食材内部的行号仍为升序
+        order = np.argsort(self.row_ingredients, kind="stable")
+        ingredient_ids, starts = np.unique(self.row_ingredients[order], return_index=True)
+        chunks = np.split(rows[order], starts[1:]) if len(ingredient_ids) else []
+        return {int(ingredient_id): chunk for ingredient_id, chunk in zip(ingredient_ids, chunks)}
+
+    @classmethod
+    def from_lists(
+        cls,
+        recipe_ids: List[str],
+        ingredient_lists: Sequence[Sequence[int]],
+        ingredient_names: Dict[int, str],
+        generation: int = 0
+    ) -> "IngredientInvertedIndex":
+        """
+        从每个食谱的食材ID列表构建索引
+
+        Args:
+            recipe_ids: 食谱ID列表
+            ingredient_lists: 与recipe_ids一一对应的食材ID列表（不重复）
+            ingredient_names: 食材ID到规范化名称的映射
+            generation: 索引版本号
+
+        Returns:
+            IngredientInvertedIndex: 倒排索引
+        """
+        lengths = np.fromiter((len(ids) for ids in ingredient_lists), dtype=np.int64, count=len(ingredient_lists))
+        row_ptr = np.zeros(len(recipe_ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=row_ptr[1:])
+        row_ingredients = np.fromiter(
+            (ingredient_id for ids in ingredient_lists for ingredient_id in ids),
+            dtype=np.int32,
+            count=int(row_ptr[-1])
+        )
+        return cls(list(recipe_ids), row_ptr, row_ingredients, ingredient_names, generation)
+
+    @classmethod
+    def build(cls, db: Session, generation: int = 0) -> "IngredientInvertedIndex":
+        """
+        从recipe_ingredients构建索引
+
+        Args:
+            db: 数据库会话
+            generation: 索引版本号
+
+        Returns:
+            IngredientInvertedIndex: 倒排索引
+        """
+        rows = db.execute(
+            select(RecipeIngredient.recipe_id, func.array_agg(func.distinct(RecipeIngredient.ingredient_id)))
+            .group_by(RecipeIngredient.recipe_id)
+        ).all()
+        ingredient_names = dict(db.execute(select(Ingredient.ingredient_id, Ingredient.name)).all())
+        return cls.from_lists(
+            [str(recipe_id) for recipe_id, _ in rows],
+            [ingredient_ids for _, ingredient_ids in rows],
+            ingredient_names,
+            generation
+        )
+
+    def recipe_ingredients(self, row: int) -> np.ndarray:
+        override = self._overrides.get(row)
+        if override is not None:
+            return override
+        return self.row_ingredients[self.row_ptr[row]:self.row_ptr[row + 1]]
+
+    def resolve(self, names: Iterable[str]) -> Tuple[List[int], List[str]]:
+        """
+        将规范化的食材名称转换为食材ID
+
+        Returns:
+            (食材ID列表（去重）, 索引中不存在的名称)
+        """
+        ingredient_ids: List[int] = []
+        unknown: List[str] = []
+        for name in names:
+            ingredient_id = self.name_index.get(name)
+            if ingredient_id is None:
+                unknown.append(name)
+            elif ingredient_id not in ingredient_ids:
+                ingredient_ids.append(ingredient_id)
+        return ingredient_ids, unknown
+
+    def search(
+        self,
+        ingredient_ids: Sequence[int],
+        mode: str = "coverage",
+        limit: int = 20,
+        skip: int = 0,
+        max_missing: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        按现有食材查找食谱
+
+        Args:
+            ingredient_ids: 现有食材ID
+            mode: 排序方式（见COOKABLE_SORT_MODES）
+            limit: 返回数量
+            skip: 跳过的数量
+            max_missing: 最多缺少的食材数，为空时不限制
+
+        Returns:
+            按排序方式排列的食谱匹配信息
+        """
+        # 先取快照，并发的增量更新只会追加行号或替换整个数组
+        count = self.count
+        sizes = self.sizes
+        postings = [self.postings.get(ingredient_id) for ingredient_id in ingredient_ids]
+        postings = [posting for posting in postings if posting is not None and len(posting)]
+        if not postings or limit <= 0:
+            return []
+
+        matched = np.bincount(np.concatenate(postings), minlength=count)[:count]
+        rows = np.flatnonzero(matched)
+        hits = matched[rows]
+        missing = sizes[rows] - hits
+        if max_missing is not None:
+            keep = missing <= max_missing
+            rows, hits, missing = rows[keep], hits[keep], missing[keep]
+
+        k = min(skip + limit, len(rows))
+        if k <= skip:
+            return []
+        if mode == "missing":
+            # 缺少的食材数升序，其次命中数降序
+            keys = missing.astype(np.int64) * (int(hits.max()) + 1) - hits
+        else:
+            # 覆盖率降序，其次缺少的食材数升序
+            keys = -(hits / np.maximum(hits + missing, 1)) + missing * MISSING_TIEBREAK
+        top = np.argpartition(keys, k - 1)[:k] if k < len(keys) else np.arange(len(keys))
+        top = top[np.lexsort((rows[top], keys[top]))][skip:]
+
+        available = set(int(ingredient_id) for ingredient_id in ingredient_ids)
+        return [
+            {
+                "recipe_id": self.recipe_ids[rows[index]],
+                "matched_count": int(hits[index]),
+                "missing_count": int(missing[index]),
+                "coverage": float(hits[index] / max(hits[index] + missing[index], 1)),
+                "missing_ingredients": [
+                    self.ingredient_names.get(int(ingredient_id), str(ingredient_id))
+                    for ingredient_id in self.recipe_ingredients(int(rows[index]))
+                    if int(ingredient_id) not in available
+                ]
+            }
+            for index in top
+            if self.recipe_ids[rows[index]] is not None
+        ]
+
+    def _remove_postings(self, row: int) -> None:
+        for ingredient_id in self.recipe_ingredients(row):
+            posting = self.postings.get(int(ingredient_id))
+            if posting is None:
+                continue
+            position = int(np.searchsorted(posting, row))
+            if position < len(posting) and posting[position] == row:
+                self.postings[int(ingredient_id)] = np.delete(posting, position)
+
+    def set_recipe(self, recipe_id: str, ingredients: Sequence[Tuple[int, str]]) -> None:
+        """
+        新增或替换一个食谱的食材（调用方负责加锁）
+
+        Args:
+            recipe_id: 食谱ID
+            ingredients: (食材ID, 规范化名称)列表
+        """
+        for ingredient_id, name in ingredients:
+            if ingredient_id not in self.ingredient_names:
+                self.ingredient_names[ingredient_id] = name
+                self.name_index[name] = ingredient_id
+        ingredient_ids = np.unique(np.array([ingredient_id for ingredient_id, _ in ingredients], dtype=np.int32))
+
+        row = self.row_index.get(recipe_id)
+        if row is None:
+            if not len(ingredient_ids):
+                return
+            row = self.count
+            if row >= len(self.sizes):
+                sizes = np.zeros(max(len(self.sizes) * 2, 1024), dtype=np.int32)
+                sizes[:len(self.sizes)] = self.sizes
+                self.sizes = sizes
+            self.recipe_ids.append(recipe_id)
+            self.row_index[recipe_id] = row
+        else:
+            self._remove_postings(row)
+
+        self._overrides[row] = ingredient_ids
+        self.sizes[row] = len(ingredient_ids)
+        for ingredient_id in ingredient_ids:
+            posting = self.postings.get(int(ingredient_id))
+            if posting is None:
+                self.postings[int(ingredient_id)] = np.array([row], dtype=np.int32)
+            else:
+                position = int(np.searchsorted(posting, row))
+                self.postings[int(ingredient_id)] = np.insert(posting, position, row)
+        # 新行的所有数据就绪后才对查询可见
+        self.count = max(self.count, row + 1)
+
+    def remove_recipe(self, recipe_id: str) -> None:
+        """
+        删除一个食谱（调用方负责加锁）
+        """
+        row = self.row_index.pop(recipe_id, None)
+        if row is None:
+            return
+        self._remove_postings(row)
+        self._overrides[row] = np.empty(0, dtype=np.int32)
+        self.sizes[row] = 0
+        self.recipe_ids[row] = None
+
+
+class CookableRecipeFinder:
+    """
+    维护食材倒排索引并提供按现有食材查找食谱
+    """
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None, rebuild_interval: int = 3600):
+        self.session_factory = session_factory
+        self.rebuild_interval = rebuild_interval
+        self.index: Optional[IngredientInvertedIndex] = None
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _session(self) -> Session:
+        factory = self.session_factory
+        if factory is None:
+            from app.core.database import SessionLocal
+            factory = SessionLocal
+        return factory()
+
+    def rebuild(self, db: Optional[Session] = None) -> IngredientInvertedIndex:
+        """
+        全量重建倒排索引
+
+        Args:
+            db: 数据库会话，为空时自行创建
+
+        Returns:
+            IngredientInvertedIndex: 新的倒排索引
+        """
+        with self._rebuild_lock:
+            owns_session = db is None
+            db = db or self._session()
+            try:
+                started = time.perf_counter()
+                generation = self.index.generation + 1 if self.index else 1
+                index = IngredientInvertedIndex.build(db, generation)
+            finally:
+                if owns_session:
+                    db.close()
+            with self._lock:
+                self.index = index
+            logger.info(
+                f"食材倒排索引已重建: {index.count}个食谱，{len(index.postings)}种食材，"
+                f"耗时{time.perf_counter() - started:.2f}秒"
+            )
+            return index
+
+    def find(
+        self,
+        names: Sequence[str],
+        mode: str = "coverage",
+        limit: int = 20,
+        skip: int = 0,
+        max_missing: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        按现有食材查找食谱
+
+        Args:
+            names: 现有食材名称
+            mode: 排序方式（见COOKABLE_SORT_MODES）
+            limit: 返回数量
+            skip: 跳过的数量
+            max_missing: 最多缺少的食材数
+
+        Returns:
+            (食谱匹配信息列表, 索引中不存在的食材名称)
+        """
+        from app.recipes.services import normalize_ingredient_name
+
+        index = self.index or self.rebuild()
+        ingredient_ids, unknown = index.resolve(normalize_ingredient_name(name) for name in names if str(name).strip())
+        return index.search(ingredient_ids, mode, limit, skip, max_missing), unknown
+
+    def refresh_recipe(self, db: Session, recipe_id: Any) -> None:
+        """
+        食谱创建或食材更新后，从recipe_ingredients重新读取该食谱的食材
+
+        Args:
+            db: 数据库会话
+            recipe_id: 食谱ID
+        """
+        if self.index is None:
+            return
+        ingredients = db.execute(
+            select(Ingredient.ingredient_id, Ingredient.name)
+            .join(RecipeIngredient, RecipeIngredient.ingredient_id == Ingredient.ingredient_id)
+            .where(RecipeIngredient.recipe_id == recipe_id)
+        ).all()
+        with self._lock:
+            if self.index is not None:
+                self.index.set_recipe(str(recipe_id), [(ingredient_id, name) for ingredient_id, name in ingredients])
+
+    def remove_recipe(self, recipe_id: Any) -> None:
+        """
+        食谱删除后从索引中移除
+
+        Args:
+            recipe_id: 食谱ID
+        """
+        with self._lock:
+            if self.index is not None:
+                self.index.remove_recipe(str(recipe_id))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await run_in_threadpool(self.rebuild)
+            except Exception as e:
+                logger.error(f"重建食材倒排索引失败: {str(e)}")
+            await asyncio.sleep(self.rebuild_interval)
+
+    def start(self) -> None:
+        """
+        启动后台定时重建任务
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        停止后台定时重建任务
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# 全局实例
+cookable_recipe_finder = CookableRecipeFinder(rebuild_interval=settings.INGREDIENT_INDEX_REBUILD_SECONDS)
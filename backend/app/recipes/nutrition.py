@@ -0,0 +1,587 @@
+"""
+本地营养计算引擎
+
+每种食材的营养数据保存在ingredients.nutrition_data中，格式为:
+    {
+        "per_100g": {"calories": 144, "protein": 13.3, ..., "sodium": 131.5},
+        "unit_grams": {"个": 50},   # 可选，计数单位（个、片、根等）对应的克数
+        "source": "seed"           # seed/llm/manual
+    }
+计算时先把所有食谱的食材行展开成数组，单位换算为克（质量/体积单位查表，
+计数单位优先使用食材自己的unit_grams），再用一次矩阵运算得到各食谱的营养总量。
+
+数据库中没有营养数据的食材才会调用AI服务估算。估算结果只写回食材库中已存在
+但缺少营养数据的食材，之后同一食材不再调用AI服务；食材库中不存在的名称
+（可能来自任意用户输入）只用于本次计算，不会新增到食材库。
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import logging
+import re
+import threading
+
+import numpy as np
+from sqlalchemy import JSON, String, Text, any_, bindparam, cast, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.ingredient import Ingredient
+from app.models.recipe_ingredient import RecipeIngredient
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 营养向量的分量顺序（钠的单位为毫克，卡路里为千卡，其余为克）
+NUTRIENTS = ("calories", "protein", "carbs", "fat", "fiber", "sugar", "sodium")
+
+# 质量和体积单位对应的克数（液体和调味料按水的密度近似）
+UNIT_GRAMS = {
+    "g": 1.0, "克": 1.0, "kg": 1000.0, "千克": 1000.0, "公斤": 1000.0,
+    "斤": 500.0, "两": 50.0, "mg": 0.001, "毫克": 0.001,
+    "oz": 28.35, "盎司": 28.35, "lb": 453.6, "磅": 453.6,
+    "ml": 1.0, "毫升": 1.0, "l": 1000.0, "升": 1000.0,
+    "勺": 15.0, "汤匙": 15.0, "大勺": 15.0, "tbsp": 15.0,
+    "小勺": 5.0, "茶匙": 5.0, "小匙": 5.0, "tsp": 5.0,
+    "杯": 240.0, "cup": 240.0, "碗": 250.0,
+    "适量": 5.0, "少许": 2.0, "少量": 2.0,
+}
+
+# 计数单位的默认克数，食材的unit_grams中有对应单位时优先使用
+COUNT_UNIT_GRAMS = {
+    "个": 100.0, "只": 100.0, "颗": 50.0, "枚": 50.0, "片": 10.0, "瓣": 5.0,
+    "根": 50.0, "块": 50.0, "条": 200.0, "把": 50.0, "朵": 15.0, "份": 100.0,
+    "piece": 100.0, "pcs": 100.0,
+}
+
+# 无法识别的单位按每单位该克数估算
+UNKNOWN_UNIT_GRAMS = 100.0
+
+NUTRITION_ESTIMATE_PROMPT = """
+请估算以下食材每100克可食部分的营养成分：
+
+{names}
+
+请只输出一个JSON对象，键为上面的食材名称（保持原样），值包含以下字段：
+- calories: 卡路里(千卡)
+- protein: 蛋白质(克)
+- carbs: 碳水化合物(克)
+- fat: 脂肪(克)
+- fiber: 膳食纤维(克)
+- sugar: 糖(克)
+- sodium: 钠(毫克)
+- unit_grams: 常用计数单位对应的克数，如{{"个": 50}}，没有则为空对象
+"""
+
+
+def normalize_unit(unit: Any) -> str:
+    """
+    规范化单位：去除空白并转为小写
+    """
+    if unit is None:
+        return ""
+    return re.sub(r"\s+", "", str(unit)).lower()
+
+
+def parse_quantity(quantity: Any) -> float:
+    """
+    解析数量，支持数字、分数（1/2）、范围（2-3取平均）和包含数字的文本
+
+    Args:
+        quantity: 原始数量
+
+    Returns:
+        数量，无法解析时为1
+    """
+    if isinstance(quantity, (int, float)) and not isinstance(quantity, bool):
+        return max(float(quantity), 0.0)
+    text = str(quantity or "").strip()
+    fraction = re.fullmatch(r"(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)", text)
+    if fraction and float(fraction.group(2)) > 0:
+        return float(fraction.group(1)) / float(fraction.group(2))
+    numbers = [float(value) for value in re.findall(r"\d+(?:\.\d+)?", text)]
+    if len(numbers) >= 2 and re.search(r"\d\s*[-~～至到]\s*\d", text):
+        return (numbers[0] + numbers[1]) / 2
+    return numbers[0] if numbers else 1.0
+
+
+def base_unit_grams(unit: str) -> float:
+    """
+    不考虑具体食材时，单位对应的克数
+
+    Args:
+        unit: 规范化后的单位，空字符串表示克
+
+    Returns:
+        每单位克数
+    """
+    if not unit:
+        return 1.0
+    if unit in UNIT_GRAMS:
+        return UNIT_GRAMS[unit]
+    return COUNT_UNIT_GRAMS.get(unit, UNKNOWN_UNIT_GRAMS)
+
+
+class IngredientProfile:
+    """
+    单个食材的营养向量（每100克）和计数单位克数
+    """
+    __slots__ = ("vector", "unit_grams")
+
+    def __init__(self, vector: np.ndarray, unit_grams: Dict[str, float]):
+        self.vector = vector
+        self.unit_grams = unit_grams
+
+    @classmethod
+    def from_nutrition_data(cls, data: Any) -> Optional["IngredientProfile"]:
+        """
+        从ingredients.nutrition_data解析，数据不完整时返回None
+        """
+        if not isinstance(data, dict):
+            return None
+        # 兼容直接保存营养字段、没有per_100g层级的数据
+        per_100g = data.get("per_100g", data)
+        if not isinstance(per_100g, dict) or "calories" not in per_100g:
+            return None
+        try:
+            vector = np.array(
+                [max(float(per_100g.get(name) or 0.0), 0.0) for name in NUTRIENTS],
+                dtype=np.float64
+            )
+            unit_grams = {
+                normalize_unit(unit): float(grams)
+                for unit, grams in (data.get("unit_grams") or {}).items()
+                if float(grams) > 0
+            }
+        except (TypeError, ValueError, AttributeError):
+            return None
+        return cls(vector, unit_grams)
+
+
+def to_nutrition_data(values: Dict[str, Any], source: str) -> Optional[Dict[str, Any]]:
+    """
+    将营养值字典转换为nutrition_data格式，缺少卡路里或数值无效时返回None
+
+    Args:
+        values: 包含NUTRIENTS字段和可选unit_grams的字典
+        source: 数据来源
+
+    Returns:
+        nutrition_data字典
+    """
+    if not isinstance(values, dict) or values.get("calories") is None:
+        return None
+    try:
+        per_100g = {name: round(max(float(values.get(name) or 0.0), 0.0), 3) for name in NUTRIENTS}
+        unit_grams = {
+            str(unit): float(grams)
+            for unit, grams in (values.get("unit_grams") or {}).items()
+            if float(grams) > 0
+        }
+    except (TypeError, ValueError, AttributeError):
+        return None
+    return {"per_100g": per_100g, "unit_grams": unit_grams, "source": source}
+
+
+def nutrition_summary(totals: Dict[str, float]) -> Optional[str]:
+    """
+    根据三大营养素的供能比生成简短评估
+    """
+    energy = {
+        "蛋白质": totals["protein"] * 4,
+        "碳水化合物": totals["carbs"] * 4,
+        "脂肪": totals["fat"] * 9,
+    }
+    total_energy = sum(energy.values())
+    if total_energy <= 0:
+        return None
+    ratios = "、".join(f"{name}{value / total_energy:.0%}" for name, value in energy.items())
+    return f"总热量约{totals['calories']:.0f}千卡，供能比为{ratios}"
+
+
+class NutritionEngine:
+    """
+    基于ingredients.nutrition_data的营养计算引擎
+    """
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        llm_fallback: bool = True,
+        llm_batch_size: int = 30,
+        cache_size: int = 10000
+    ):
+        self.session_factory = session_factory
+        self.llm_fallback = llm_fallback
+        self.llm_batch_size = llm_batch_size
+        self.cache_size = cache_size
+        self._profiles: "OrderedDict[str, IngredientProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _session(self) -> Session:
+        factory = self.session_factory
+        if factory is None:
+            from app.core.database import SessionLocal
+            factory = SessionLocal
+        return factory()
+
+    def _cache_profiles(self, profiles: Dict[str, IngredientProfile]) -> None:
+        with self._lock:
+            for name, profile in profiles.items():
+                self._profiles[name] = profile
+                self._profiles.move_to_end(name)
+            while len(self._profiles) > self.cache_size:
+                self._profiles.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        """
+        清空进程内的食材营养缓存
+        """
+        with self._lock:
+            self._profiles.clear()
+
+    def load_profiles(self, db: Session, names: Iterable[str]) -> Dict[str, IngredientProfile]:
+        """
+        加载食材营养数据，缓存未命中的名称用一次查询读取
+
+        Args:
+            db: 数据库会话
+            names: 规范化后的食材名称
+
+        Returns:
+            名称到IngredientProfile的映射，没有营养数据的食材不在其中
+        """
+        profiles: Dict[str, IngredientProfile] = {}
+        missing = []
+        with self._lock:
+            for name in set(names):
+                profile = self._profiles.get(name)
+                if profile is None:
+                    missing.append(name)
+                else:
+                    profiles[name] = profile
+        if not missing:
+            return profiles
+
+        from app.recipes.services import normalize_ingredient_name
+
+        names_param = bindparam("names", missing, type_=ARRAY(String))
+        loaded = {}
+        rows = db.execute(
+            select(Ingredient.name, Ingredient.nutrition_data)
+            .where(Ingredient.name == any_(names_param))
+            .where(Ingredient.nutrition_data.isnot(None))
+        ).all()
+        for name, nutrition_data in rows:
+            profile = IngredientProfile.from_nutrition_data(nutrition_data)
+            if profile is not None:
+                loaded[normalize_ingredient_name(name)] = profile
+        self._cache_profiles(loaded)
+        profiles.update(loaded)
+        return profiles
+
+    def store_profiles(
+        self,
+        db: Session,
+        nutrition_data: Dict[str, Dict[str, Any]],
+        overwrite: bool = False,
+        create_missing: bool = False
+    ) -> int:
+        """
+        写入食材营养数据
+
+        默认只更新食材库中已存在的食材，AI估算等不可信来源的名称不会新增到食材库；
+        初始化脚本等可信数据源可以用create_missing创建不存在的食材。
+
+        Args:
+            db: 数据库会话
+            nutrition_data: 规范化名称到nutrition_data的映射
+            overwrite: 是否覆盖已有的营养数据（默认只填充为空的）
+            create_missing: 食材不存在时是否创建
+
+        Returns:
+            写入的食材数量
+        """
+        if not nutrition_data:
+            return 0
+        if create_missing:
+            stmt = pg_insert(Ingredient).values([
+                {"name": name, "nutrition_data": data} for name, data in nutrition_data.items()
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Ingredient.name],
+                set_={"nutrition_data": stmt.excluded.nutrition_data},
+                where=None if overwrite else Ingredient.nutrition_data.is_(None)
+            ).returning(Ingredient.name)
+        else:
+            # UPDATE ... FROM unnest(名称数组, JSON文本数组)，一条语句更新所有已存在的食材
+            data = func.unnest(
+                bindparam("names", list(nutrition_data), type_=ARRAY(String)),
+                bindparam("data", [json.dumps(value, ensure_ascii=False) for value in nutrition_data.values()], type_=ARRAY(Text))
+            ).table_valued("name", "nutrition_data").render_derived(name="data")
+            stmt = (
+                update(Ingredient)
+                .where(Ingredient.name == data.c.name)
+                .values(nutrition_data=cast(data.c.nutrition_data, JSON))
+                .returning(Ingredient.name)
+            )
+            if not overwrite:
+                stmt = stmt.where(Ingredient.nutrition_data.is_(None))
+        written = [name for (name,) in db.execute(stmt).all()]
+        db.commit()
+
+        profiles = {}
+        for name in written:
+            profile = IngredientProfile.from_nutrition_data(nutrition_data.get(name))
+            if profile is not None:
+                profiles[name] = profile
+        self._cache_profiles(profiles)
+        return len(written)
+
+    def load_recipe_ingredients(
+        self,
+        recipe_ids: Sequence[Any],
+        db: Optional[Session] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        一次查询读取多个食谱的食材
+
+        Args:
+            recipe_ids: 食谱ID列表
+            db: 数据库会话，为空时自行创建
+
+        Returns:
+            食谱ID字符串到食材列表（name、quantity、unit）的映射
+        """
+        ingredients: Dict[str, List[Dict[str, Any]]] = {str(recipe_id): [] for recipe_id in recipe_ids}
+        if not recipe_ids:
+            return ingredients
+        owns_session = db is None
+        db = db or self._session()
+        try:
+            rows = db.execute(
+                select(RecipeIngredient.recipe_id, Ingredient.name, RecipeIngredient.quantity, RecipeIngredient.unit)
+                .join(Ingredient, Ingredient.ingredient_id == RecipeIngredient.ingredient_id)
+                .where(RecipeIngredient.recipe_id.in_(list(recipe_ids)))
+            ).all()
+        finally:
+            if owns_session:
+                db.close()
+        for recipe_id, name, quantity, unit in rows:
+            ingredients[str(recipe_id)].append({"name": name, "quantity": quantity, "unit": unit})
+        return ingredients
+
+    async def estimate_with_llm(self, names: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        调用AI服务估算食材营养，按llm_batch_size分批并发请求
+
+        Args:
+            names: 规范化后的食材名称
+
+        Returns:
+            名称到nutrition_data的映射，估算失败的名称不在其中
+        """
+        from app.ai_service.ai_client import ai_client
+
+        async def estimate_batch(batch: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+            prompt = NUTRITION_ESTIMATE_PROMPT.format(names="\n".join(f"- {name}" for name in batch))
+            try:
+                response = await ai_client._make_async_request(ai_client._prepare_chat_completion_request(prompt))
+                content = (response.get("output") or {}).get("text", "")
+                start, end = content.find("{"), content.rfind("}")
+                parsed = json.loads(content[start:end + 1]) if start != -1 and end > start else {}
+            except Exception as e:
+                logger.warning(f"AI估算食材营养失败（{len(batch)}种食材）: {str(e)}")
+                return {}
+            from app.recipes.services import normalize_ingredient_name
+
+            wanted = set(batch)
+            estimates = {}
+            for name, values in (parsed.items() if isinstance(parsed, dict) else []):
+                name = normalize_ingredient_name(name)
+                data = to_nutrition_data(values, "llm")
+                if name in wanted and data is not None:
+                    estimates[name] = data
+            return estimates
+
+        names = list(names)
+        batches = [names[i:i + self.llm_batch_size] for i in range(0, len(names), self.llm_batch_size)]
+        estimates: Dict[str, Dict[str, Any]] = {}
+        for result in await asyncio.gather(*(estimate_batch(batch) for batch in batches)):
+            estimates.update(result)
+        logger.info(f"AI估算食材营养: 请求{len(names)}种，成功{len(estimates)}种")
+        return estimates
+
+    @staticmethod
+    def compute(
+        recipes: Sequence[Sequence[Dict[str, Any]]],
+        profiles: Dict[str, IngredientProfile]
+    ) -> List[Dict[str, Any]]:
+        """
+        计算多个食谱的营养总量
+
+        Args:
+            recipes: 每个食谱的食材列表（name、quantity、unit）
+            profiles: 食材营养数据
+
+        Returns:
+            与recipes一一对应的结果，包含NUTRIENTS各项总量、总克数、
+            没有营养数据的食材（unresolved）和简短评估（summary）
+        """
+        from app.recipes.services import normalize_ingredient_name
+
+        recipe_rows: List[int] = []
+        name_rows: List[int] = []
+        unit_rows: List[int] = []
+        quantities: List[float] = []
+        name_index: Dict[str, int] = {}
+        unit_index: Dict[str, int] = {}
+        unresolved: List[List[str]] = [[] for _ in recipes]
+
+        for position, ingredients in enumerate(recipes):
+            for ingredient in ingredients:
+                name = normalize_ingredient_name(ingredient.get("name") or "")
+                if not name:
+                    continue
+                if name not in profiles:
+                    if name not in unresolved[position]:
+                        unresolved[position].append(name)
+                    continue
+                unit = normalize_unit(ingredient.get("unit"))
+                quantity = ingredient.get("quantity")
+                if not unit and normalize_unit(quantity) in UNIT_GRAMS:
+                    # "盐 适量"之类把单位写在数量里的情况
+                    unit = normalize_unit(quantity)
+                recipe_rows.append(position)
+                name_rows.append(name_index.setdefault(name, len(name_index)))
+                unit_rows.append(unit_index.setdefault(unit, len(unit_index)))
+                quantities.append(parse_quantity(quantity))
+
+        totals = np.zeros((len(recipes), len(NUTRIENTS)), dtype=np.float64)
+        grams_total = np.zeros(len(recipes), dtype=np.float64)
+        if recipe_rows:
+            names = list(name_index)
+            units = list(unit_index)
+            recipe_idx = np.asarray(recipe_rows, dtype=np.intp)
+            name_idx = np.asarray(name_rows, dtype=np.intp)
+            unit_idx = np.asarray(unit_rows, dtype=np.intp)
+
+            # 先按单位查表换算，再用食材自己的计数单位克数覆盖
+            grams_per_unit = np.array([base_unit_grams(unit) for unit in units])[unit_idx]
+            overrides = sorted(
+                (name_position * len(units) + unit_index[unit], grams)
+                for name_position, name in enumerate(names)
+                for unit, grams in profiles[name].unit_grams.items()
+                if unit in unit_index
+            )
+            if overrides:
+                override_keys = np.array([key for key, _ in overrides], dtype=np.intp)
+                override_grams = np.array([grams for _, grams in overrides])
+                keys = name_idx * len(units) + unit_idx
+                positions = np.minimum(np.searchsorted(override_keys, keys), len(override_keys) - 1)
+                hit = override_keys[positions] == keys
+                grams_per_unit[hit] = override_grams[positions[hit]]
+
+            grams = np.asarray(quantities) * grams_per_unit
+            vectors = np.stack([profiles[name].vector for name in names])
+            contributions = vectors[name_idx] * (grams / 100.0)[:, None]
+            for column in range(len(NUTRIENTS)):
+                totals[:, column] = np.bincount(recipe_idx, weights=contributions[:, column], minlength=len(recipes))
+            grams_total = np.bincount(recipe_idx, weights=grams, minlength=len(recipes))
+
+        results = []
+        for position in range(len(recipes)):
+            result = {name: round(float(totals[position, column]), 1) for column, name in enumerate(NUTRIENTS)}
+            result["total_grams"] = round(float(grams_total[position]), 1)
+            result["unresolved"] = unresolved[position]
+            result["summary"] = nutrition_summary(result)
+            results.append(result)
+        return results
+
+    def analyze_sync(self, db: Session, recipes: Sequence[Sequence[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        只使用数据库中已有的营养数据计算（不调用AI服务），供脚本使用
+
+        Args:
+            db: 数据库会话
+            recipes: 每个食谱的食材列表
+
+        Returns:
+            与recipes一一对应的结果
+        """
+        from app.recipes.services import normalize_ingredient_name
+
+        names = {
+            normalize_ingredient_name(ingredient.get("name") or "")
+            for ingredients in recipes for ingredient in ingredients
+        }
+        names.discard("")
+        return self.compute(recipes, self.load_profiles(db, names))
+
+    async def analyze(
+        self,
+        recipes: Sequence[Sequence[Dict[str, Any]]],
+        use_llm: Optional[bool] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        计算多个食谱的营养总量，没有营养数据的食材调用AI服务估算
+
+        估算结果只写回食材库中已存在的食材，不存在的名称只用于本次计算。
+
+        Args:
+            recipes: 每个食谱的食材列表
+            use_llm: 为False时不调用AI服务；配置关闭AI估算时该参数无效
+
+        Returns:
+            (与recipes一一对应的结果, AI估算的食材数量)
+        """
+        from app.recipes.services import normalize_ingredient_name
+
+        names = {
+            normalize_ingredient_name(ingredient.get("name") or "")
+            for ingredients in recipes for ingredient in ingredients
+        }
+        names.discard("")
+
+        def load() -> Dict[str, IngredientProfile]:
+            db = self._session()
+            try:
+                return self.load_profiles(db, names)
+            finally:
+                db.close()
+
+        profiles = await run_in_threadpool(load)
+        estimated = 0
+        unknown = sorted(names - set(profiles))
+        # 请求只能关闭AI估算，不能在配置关闭时开启
+        if unknown and self.llm_fallback and use_llm is not False:
+            estimates = await self.estimate_with_llm(unknown)
+            if estimates:
+                def store() -> None:
+                    db = self._session()
+                    try:
+                        self.store_profiles(db, estimates)
+                    finally:
+                        db.close()
+
+                try:
+                    await run_in_threadpool(store)
+                except Exception as e:
+                    logger.error(f"写回AI估算的食材营养失败: {str(e)}")
+                for name, data in estimates.items():
+                    profile = IngredientProfile.from_nutrition_data(data)
+                    if profile is not None:
+                        profiles[name] = profile
+                estimated = len(estimates)
+
+        return self.compute(recipes, profiles), estimated
+
+
+# 全局营养计算引擎实例
+nutrition_engine = NutritionEngine(
+    llm_fallback=settings.NUTRITION_LLM_FALLBACK,
+    llm_batch_size=settings.NUTRITION_LLM_BATCH_SIZE,
+    cache_size=settings.NUTRITION_PROFILE_CACHE_SIZE
+)
@@ -0,0 +1,288 @@
+"""
+营养信息批量回填
+
+按recipe_id键集分页扫描食谱，根据recipe_ingredients和ingredients.nutrition_data
+计算营养总量，用多行INSERT ... ON CONFLICT (recipe_id)批量写入nutrition_info。
+
+- 默认只处理还没有nutrition_info的食谱；recompute模式重新计算全部食谱，
+  但只覆盖此前由回填写入的行（additional_nutrients.source = "computed"），
+  不覆盖用户或AI生成时提交的营养信息
+- 所有食材都没有营养数据的食谱不写入，食材数据补全后使用新的检查点再次运行即可
+- 进度保存在检查点文件中，中断后从最后一个连续完成的块之后继续
+- 块可以分发到进程池并行计算和写入，每个工作进程使用自己的数据库连接池
+"""
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+import json
+import logging
+import multiprocessing
+import os
+import time
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.nutrition_info import NutritionInfo
+from app.models.recipe import Recipe
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 回填写入的营养信息在additional_nutrients中的来源标记
+COMPUTED_SOURCE = "computed"
+
+
+def build_nutrition_rows(recipe_ids: List[str], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    将营养计算结果转换为nutrition_info行，没有任何可用食材数据的食谱被跳过
+
+    Args:
+        recipe_ids: 食谱ID列表
+        results: 与recipe_ids一一对应的计算结果
+
+    Returns:
+        nutrition_info行列表
+    """
+    rows = []
+    for recipe_id, result in zip(recipe_ids, results):
+        if result["total_grams"] <= 0:
+            continue
+        rows.append({
+            "recipe_id": recipe_id,
+            "calories": result["calories"],
+            "protein": result["protein"],
+            "carbs": result["carbs"],
+            "fat": result["fat"],
+            "fiber": result["fiber"],
+            "sugar": result["sugar"],
+            "sodium": result["sodium"],
+            "additional_nutrients": {
+                "source": COMPUTED_SOURCE,
+                "total_grams": result["total_grams"],
+                "unresolved": result["unresolved"]
+            }
+        })
+    return rows
+
+
+def upsert_nutrition_rows(db: Session, rows: List[Dict[str, Any]], recompute: bool) -> int:
+    """
+    批量写入nutrition_info
+
+    Args:
+        db: 数据库会话
+        rows: nutrition_info行列表
+        recompute: 是否覆盖此前回填写入的行
+
+    Returns:
+        实际写入的行数
+    """
+    if not rows:
+        return 0
+    stmt = pg_insert(NutritionInfo).values(rows)
+    if recompute:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[NutritionInfo.recipe_id],
+            set_={
+                column: stmt.excluded[column]
+                for column in ("calories", "protein", "carbs", "fat", "fiber", "sugar", "sodium", "additional_nutrients")
+            },
+            where=NutritionInfo.additional_nutrients["source"].as_string() == COMPUTED_SOURCE
+        )
+    else:
+        # 扫描之后被其他请求写入的营养信息保持不变
+        stmt = stmt.on_conflict_do_nothing(index_elements=[NutritionInfo.recipe_id])
+    written = db.execute(stmt.returning(NutritionInfo.recipe_id)).all()
+    db.commit()
+    return len(written)
+
+
+def backfill_chunk(recipe_ids: List[str], recompute: bool = False, db: Optional[Session] = None) -> Dict[str, Any]:
+    """
+    计算并写入一块食谱的营养信息（也作为进程池的任务函数）
+
+    Args:
+        recipe_ids: 食谱ID列表
+        recompute: 是否覆盖此前回填写入的行
+        db: 数据库会话，为空时自行创建
+
+    Returns:
+        本块的统计信息
+    """
+    from app.recipes.nutrition import nutrition_engine
+
+    started = time.perf_counter()
+    owns_session = db is None
+    if owns_session:
+        from app.core.database import SessionLocal
+        db = SessionLocal()
+    try:
+        ingredients = nutrition_engine.load_recipe_ingredients(recipe_ids, db)
+        results = nutrition_engine.analyze_sync(db, [ingredients[recipe_id] for recipe_id in recipe_ids])
+        rows = build_nutrition_rows(recipe_ids, results)
+        written = upsert_nutrition_rows(db, rows, recompute)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if owns_session:
+            db.close()
+    return {
+        "last_recipe_id": recipe_ids[-1],
+        "scanned": len(recipe_ids),
+        "computed": len(rows),
+        "written": written,
+        "seconds": time.perf_counter() - started
+    }
+
+
+class BackfillCheckpoint:
+    """
+    回填检查点，记录最后一个连续完成的块的最大recipe_id和累计统计
+    """
+    def __init__(self, path: Optional[str], recompute: bool):
+        self.path = path
+        self.recompute = recompute
+        self.last_recipe_id: Optional[str] = None
+        self.totals = {"scanned": 0, "computed": 0, "written": 0}
+
+    def load(self) -> "BackfillCheckpoint":
+        if not self.path or not os.path.exists(self.path):
+            return self
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("recompute", False) != self.recompute:
+            raise ValueError("检查点的回填模式与本次运行不一致，请删除检查点文件或更换路径")
+        self.last_recipe_id = data.get("last_recipe_id")
+        self.totals.update(data.get("totals", {}))
+        return self
+
+    def advance(self, chunk: Dict[str, Any]) -> None:
+        self.last_recipe_id = chunk["last_recipe_id"]
+        for key in self.totals:
+            self.totals[key] += chunk[key]
+        if not self.path:
+            return
+        # 先写临时文件再替换，避免中断时留下不完整的检查点
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "last_recipe_id": self.last_recipe_id,
+                "recompute": self.recompute,
+                "totals": self.totals
+            }, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+
+class NutritionBackfill:
+    """
+    营养信息回填任务
+    """
+    def __init__(
+        self,
+        db: Session,
+        chunk_size: int = 1000,
+        workers: int = 1,
+        recompute: bool = False,
+        checkpoint_path: Optional[str] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.workers = max(1, workers)
+        self.recompute = recompute
+        self.checkpoint = BackfillCheckpoint(checkpoint_path, recompute).load()
+        self.progress_callback = progress_callback
+        # 从检查点恢复时，本次运行之前已扫描的数量（用于计算本次吞吐量）
+        self.resumed_scanned = self.checkpoint.totals["scanned"]
+
+    def next_chunk(self, after_id: Optional[str]) -> List[str]:
+        """
+        按recipe_id键集分页读取下一块待处理的食谱ID
+
+        Args:
+            after_id: 上一块的最大recipe_id
+
+        Returns:
+            食谱ID字符串列表，处理完毕时为空
+        """
+        query = select(Recipe.recipe_id).order_by(Recipe.recipe_id).limit(self.chunk_size)
+        if after_id is not None:
+            query = query.where(Recipe.recipe_id > after_id)
+        if not self.recompute:
+            query = query.outerjoin(NutritionInfo, NutritionInfo.recipe_id == Recipe.recipe_id).where(
+                NutritionInfo.nutrition_id.is_(None)
+            )
+        recipe_ids = [str(recipe_id) for (recipe_id,) in self.db.execute(query).all()]
+        # 只读扫描，结束事务以免长时间持有快照
+        self.db.rollback()
+        return recipe_ids
+
+    def _report(self, started: float) -> None:
+        if self.progress_callback:
+            elapsed = time.perf_counter() - started
+            self.progress_callback({
+                **self.checkpoint.totals,
+                "last_recipe_id": self.checkpoint.last_recipe_id,
+                "run_scanned": self.checkpoint.totals["scanned"] - self.resumed_scanned,
+                "elapsed": elapsed
+            })
+
+    def run(self, max_chunks: Optional[int] = None) -> Dict[str, Any]:
+        """
+        执行回填
+
+        Args:
+            max_chunks: 最多处理的块数，为空时处理到结束
+
+        Returns:
+            累计统计信息
+        """
+        started = time.perf_counter()
+        if self.workers == 1:
+            after_id = self.checkpoint.last_recipe_id
+            processed = 0
+            while max_chunks is None or processed < max_chunks:
+                recipe_ids = self.next_chunk(after_id)
+                if not recipe_ids:
+                    break
+                self.checkpoint.advance(backfill_chunk(recipe_ids, self.recompute, self.db))
+                after_id = recipe_ids[-1]
+                processed += 1
+                self._report(started)
+        else:
+            self._run_parallel(started, max_chunks)
+        return {
+            **self.checkpoint.totals,
+            "run_scanned": self.checkpoint.totals["scanned"] - self.resumed_scanned,
+            "elapsed": time.perf_counter() - started
+        }
+
+    def _run_parallel(self, started: float, max_chunks: Optional[int]) -> None:
+        # spawn保证工作进程不继承父进程的数据库连接
+        context = multiprocessing.get_context("spawn")
+        after_id = self.checkpoint.last_recipe_id
+        submitted = 0
+        # 按提交顺序排列的块，只有前面的块全部完成后检查点才前进
+        pending: List[Future] = []
+        exhausted = False
+
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+            while True:
+                while not exhausted and len(pending) < self.workers * 2 and (max_chunks is None or submitted < max_chunks):
+                    recipe_ids = self.next_chunk(after_id)
+                    if not recipe_ids:
+                        exhausted = True
+                        break
+                    pending.append(pool.submit(backfill_chunk, recipe_ids, self.recompute))
+                    after_id = recipe_ids[-1]
+                    submitted += 1
+                if not pending:
+                    break
+
+                wait(pending, return_when=FIRST_COMPLETED)
+                while pending and pending[0].done():
+                    # 块失败时异常在这里抛出，检查点停留在最后一个连续完成的块
+                    self.checkpoint.advance(pending.pop(0).result())
+                    self._report(started)
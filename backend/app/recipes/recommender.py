@@ -0,0 +1,584 @@
+"""
+个性化食谱推荐
+
+离线构建食谱特征矩阵（每行一个食谱，已做L2归一化，稀疏的标签和食材块
+按CSR格式保存），特征分为以下几块:
+  - 标签: 最常见的RECOMMENDER_MAX_TAGS个标签的多热编码
+  - 食材: 最常见的RECOMMENDER_MAX_INGREDIENTS种食材的多热编码
+  - 难度: 简单/中等/困难的独热编码
+  - 烹饪时间: 按RECIPE_TIME_BUCKETS分桶的独热编码
+  - 营养: 卡路里、蛋白质、碳水、脂肪取log1p后标准化
+每块先单独归一化再乘以FEATURE_WEIGHTS中的权重，避免维度多的块主导相似度。
+
+用户画像是收藏（权重1）、评分（(score - 3) / 2）对应食谱行向量的加权和，
+再叠加diet_preferences中偏好的食材、难度和烹饪时间。推荐结果为与画像余弦
+相似度最高、未收藏/评分过且不含忌口食材的食谱。收藏和评分发生时，已缓存的
+画像按增量更新；食谱目录的变化由后台定时重建矩阵体现。
+"""
+from collections import OrderedDict, Counter
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+import re
+import threading
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.favorite import Favorite
+from app.models.ingredient import Ingredient
+from app.models.nutrition_info import NutritionInfo
+from app.models.rating import Rating
+from app.models.recipe import Recipe
+from app.models.recipe_ingredient import RecipeIngredient
+from app.models.user import User
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 各特征块的权重
+FEATURE_WEIGHTS = {
+    "tags": 1.0,
+    "ingredients": 1.0,
+    "difficulty": 0.5,
+    "cooking_time": 0.5,
+    "nutrition": 0.5,
+}
+
+# 烹饪时间分桶上界（分钟），超过最后一个上界的归入最后一桶
+RECIPE_TIME_BUCKETS = (15, 30, 60)
+
+# 收藏事件在用户画像中的权重
+FAVORITE_PROFILE_WEIGHT = 1.0
+
+# 饮食偏好在用户画像中的权重
+DIET_PREFERENCE_WEIGHT = 1.0
+
+
+def rating_profile_weight(score: Optional[int]) -> float:
+    """
+    评分在用户画像中的权重：5分为1，3分为0，1分为-1
+    """
+    if score is None:
+        return 0.0
+    return (score - 3) / 2.0
+
+
+def cooking_time_bucket(minutes: Any) -> Optional[int]:
+    """
+    将烹饪时间（分钟数或包含数字的字符串）映射到分桶下标
+    """
+    if minutes is None:
+        return None
+    if not isinstance(minutes, (int, float)):
+        match = re.search(r"\d+", str(minutes))
+        if not match:
+            return None
+        minutes = int(match.group())
+    for index, upper in enumerate(RECIPE_TIME_BUCKETS):
+        if minutes <= upper:
+            return index
+    return len(RECIPE_TIME_BUCKETS)
+
+
+def _normalize_rows(block: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(block, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return block / norms
+
+
+class RecipeFeatureMatrix:
+    """
+    食谱特征矩阵及其词表
+
+    标签和食材的多热编码几乎全为0，按CSR格式只保存非零项（indptr/indices/data，
+    entry_rows为每个非零项所在的行，用于bincount计算相似度）；难度、烹饪时间和
+    营养共11列，按稠密矩阵保存。20万个食谱、平均每个食谱十几个标签和食材时
+    约占40 MB，而完整的稠密float32矩阵（约700列）需要约570 MB。
+    """
+    def __init__(
+        self,
+        recipe_ids: List[str],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray,
+        dense: np.ndarray,
+        tag_vocab: Dict[str, int],
+        ingredient_vocab: Dict[str, int],
+        slices: Dict[str, slice],
+        ingredient_rows: Dict[str, np.ndarray],
+        generation: int
+    ):
+        self.recipe_ids = recipe_ids
+        self.row_index = {recipe_id: row for row, recipe_id in enumerate(recipe_ids)}
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.entry_rows = np.repeat(np.arange(len(recipe_ids), dtype=np.int32), np.diff(indptr))
+        self.dense = dense
+        # 稠密部分在完整特征空间中的起始列
+        self.dense_offset = slices["difficulty"].start
+        self.tag_vocab = tag_vocab
+        self.ingredient_vocab = ingredient_vocab
+        self.slices = slices
+        # 食材名称到包含该食材的行下标，用于排除忌口食材
+        self.ingredient_rows = ingredient_rows
+        self.generation = generation
+
+    @property
+    def dimension(self) -> int:
+        return self.dense_offset + self.dense.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes + self.entry_rows.nbytes + self.dense.nbytes
+
+    def row(self, recipe_id: Any) -> Optional[np.ndarray]:
+        """
+        获取食谱的稠密特征向量
+        """
+        index = self.row_index.get(str(recipe_id))
+        if index is None:
+            return None
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        start, stop = self.indptr[index], self.indptr[index + 1]
+        vector[self.indices[start:stop]] = self.data[start:stop]
+        vector[self.dense_offset:] = self.dense[index]
+        return vector
+
+    def scores(self, vector: np.ndarray) -> np.ndarray:
+        """
+        计算所有食谱与向量的内积（行已归一化，vector归一化后即为余弦相似度）
+        """
+        sparse = np.bincount(
+            self.entry_rows, weights=self.data * vector[self.indices], minlength=len(self.recipe_ids)
+        )
+        return sparse + self.dense @ vector[self.dense_offset:]
+
+    def preference_vector(self, diet_preferences: Optional[Dict[str, Any]]) -> np.ndarray:
+        """
+        将用户饮食偏好转换为与食谱同一空间的向量
+        """
+        from app.recipes.services import DIFFICULTY_ORDER, normalize_ingredient_name
+
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        if not isinstance(diet_preferences, dict):
+            return vector
+
+        ingredient_block = np.zeros(self.slices["ingredients"].stop - self.slices["ingredients"].start, dtype=np.float32)
+        for name in diet_preferences.get("ingredients") or []:
+            column = self.ingredient_vocab.get(normalize_ingredient_name(name))
+            if column is not None:
+                ingredient_block[column] = 1.0
+        if ingredient_block.any():
+            vector[self.slices["ingredients"]] = ingredient_block / np.linalg.norm(ingredient_block) * FEATURE_WEIGHTS["ingredients"]
+
+        preferences = diet_preferences.get("preferences") or {}
+        level = DIFFICULTY_ORDER.get(preferences.get("difficulty"))
+        if level is not None:
+            vector[self.slices["difficulty"].start + level - 1] = FEATURE_WEIGHTS["difficulty"]
+        bucket = cooking_time_bucket(preferences.get("cooking_time"))
+        if bucket is not None:
+            vector[self.slices["cooking_time"].start + bucket] = FEATURE_WEIGHTS["cooking_time"]
+        return vector
+
+    def restricted_rows(self, diet_preferences: Optional[Dict[str, Any]]) -> np.ndarray:
+        """
+        获取包含忌口食材的食谱行下标
+        """
+        from app.recipes.services import normalize_ingredient_name
+
+        if not isinstance(diet_preferences, dict):
+            return np.empty(0, dtype=np.int64)
+        rows = [
+            self.ingredient_rows[name]
+            for name in (normalize_ingredient_name(item) for item in diet_preferences.get("restrictions") or [])
+            if name in self.ingredient_rows
+        ]
+        return np.unique(np.concatenate(rows)) if rows else np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def build(cls, db: Session, max_tags: int, max_ingredients: int, generation: int = 0) -> "RecipeFeatureMatrix":
+        """
+        从数据库加载食谱并构建特征矩阵
+
+        Args:
+            db: 数据库会话
+            max_tags: 标签词表大小
+            max_ingredients: 食材词表大小
+            generation: 矩阵版本号
+
+        Returns:
+            RecipeFeatureMatrix: 特征矩阵
+        """
+        rows = db.query(
+            Recipe.recipe_id, Recipe.tags, Recipe.difficulty, Recipe.cooking_time,
+            NutritionInfo.calories, NutritionInfo.protein, NutritionInfo.carbs, NutritionInfo.fat
+        ).outerjoin(NutritionInfo, NutritionInfo.recipe_id == Recipe.recipe_id).all()
+        recipe_ids = [str(row.recipe_id) for row in rows]
+        row_index = {recipe_id: index for index, recipe_id in enumerate(recipe_ids)}
+
+        ingredient_sets: List[Set[str]] = [set() for _ in recipe_ids]
+        for recipe_id, name in db.query(RecipeIngredient.recipe_id, Ingredient.name).join(
+            Ingredient, Ingredient.ingredient_id == RecipeIngredient.ingredient_id
+        ):
+            index = row_index.get(str(recipe_id))
+            if index is not None:
+                ingredient_sets[index].add(name)
+
+        return cls.from_rows(rows, ingredient_sets, max_tags, max_ingredients, generation)
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: List[Any],
+        ingredient_sets: List[Set[str]],
+        max_tags: int,
+        max_ingredients: int,
+        generation: int = 0
+    ) -> "RecipeFeatureMatrix":
+        """
+        由食谱行和每个食谱的食材集合构建特征矩阵
+
+        Args:
+            rows: 含recipe_id、tags、difficulty、cooking_time及营养列的行
+            ingredient_sets: 与rows一一对应的食材名称集合
+            max_tags: 标签词表大小
+            max_ingredients: 食材词表大小
+            generation: 矩阵版本号
+
+        Returns:
+            RecipeFeatureMatrix: 特征矩阵
+        """
+        from app.recipes.services import DIFFICULTY_ORDER
+
+        recipe_ids = [str(row.recipe_id) for row in rows]
+        n = len(recipe_ids)
+
+        tag_counts = Counter(tag for row in rows for tag in set(row.tags or []) if isinstance(tag, str))
+        ingredient_counts = Counter(name for names in ingredient_sets for name in names)
+        tag_vocab = {tag: i for i, (tag, _) in enumerate(tag_counts.most_common(max_tags))}
+        ingredient_vocab = {name: i for i, (name, _) in enumerate(ingredient_counts.most_common(max_ingredients))}
+
+        slices = {}
+        offset = 0
+        for name, width in (
+            ("tags", len(tag_vocab)),
+            ("ingredients", len(ingredient_vocab)),
+            ("difficulty", 3),
+            ("cooking_time", len(RECIPE_TIME_BUCKETS) + 1),
+            ("nutrition", 4),
+        ):
+            slices[name] = slice(offset, offset + width)
+            offset += width
+
+        # 标签和食材块：多热编码按块归一化后每个非零项为 权重 / sqrt(非零项数)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        indices: List[int] = []
+        values: List[float] = []
+        difficulty = np.zeros((n, 3), dtype=np.float32)
+        cooking_time = np.zeros((n, len(RECIPE_TIME_BUCKETS) + 1), dtype=np.float32)
+        nutrition = np.full((n, 4), np.nan, dtype=np.float32)
+
+        for index, row in enumerate(rows):
+            tag_columns = {tag_vocab[tag] for tag in row.tags or [] if isinstance(tag, str) and tag in tag_vocab}
+            ingredient_columns = {ingredient_vocab[name] for name in ingredient_sets[index] if name in ingredient_vocab}
+            for block, columns in (("tags", tag_columns), ("ingredients", ingredient_columns)):
+                if columns:
+                    value = FEATURE_WEIGHTS[block] / np.sqrt(len(columns))
+                    indices.extend(slices[block].start + column for column in sorted(columns))
+                    values.extend([value] * len(columns))
+            indptr[index + 1] = len(indices)
+
+            level = DIFFICULTY_ORDER.get(row.difficulty)
+            if level is not None:
+                difficulty[index, level - 1] = 1.0
+            bucket = cooking_time_bucket(row.cooking_time)
+            if bucket is not None:
+                cooking_time[index, bucket] = 1.0
+            if row.calories is not None:
+                nutrition[index] = [row.calories, row.protein, row.carbs, row.fat]
+
+        # 营养数据取log1p后按列标准化，缺失值置0（即均值）
+        nutrition = np.log1p(np.clip(nutrition, 0, None))
+        mean = np.nanmean(nutrition, axis=0) if n and not np.isnan(nutrition).all() else np.zeros(4, dtype=np.float32)
+        std = np.nanstd(nutrition, axis=0) if n and not np.isnan(nutrition).all() else np.ones(4, dtype=np.float32)
+        std[std == 0] = 1.0
+        nutrition = np.nan_to_num((nutrition - mean) / std).astype(np.float32)
+
+        dense = np.hstack([
+            _normalize_rows(difficulty) * FEATURE_WEIGHTS["difficulty"],
+            _normalize_rows(cooking_time) * FEATURE_WEIGHTS["cooking_time"],
+            _normalize_rows(nutrition) * FEATURE_WEIGHTS["nutrition"],
+        ]).astype(np.float32)
+        indices = np.array(indices, dtype=np.int32)
+        data = np.array(values, dtype=np.float32)
+
+        # 整行L2归一化
+        entry_rows = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+        norms = np.sqrt(np.bincount(entry_rows, weights=data.astype(np.float64) ** 2, minlength=n) + (dense ** 2).sum(axis=1))
+        norms[norms == 0] = 1.0
+        data = (data / norms[entry_rows]).astype(np.float32)
+        dense = (dense / norms[:, None]).astype(np.float32)
+
+        ingredient_rows: Dict[str, List[int]] = {}
+        for index, names in enumerate(ingredient_sets):
+            for name in names:
+                ingredient_rows.setdefault(name, []).append(index)
+
+        return cls(
+            recipe_ids,
+            indptr,
+            indices,
+            data,
+            dense,
+            tag_vocab,
+            ingredient_vocab,
+            slices,
+            {name: np.array(indexes, dtype=np.int64) for name, indexes in ingredient_rows.items()},
+            generation
+        )
+
+
+class UserProfile:
+    """
+    用户画像：加权行向量之和及已交互的食谱
+    """
+    __slots__ = ("vector", "seen", "excluded", "generation", "loaded_at")
+
+    def __init__(self, vector: np.ndarray, seen: Set[str], excluded: np.ndarray, generation: int):
+        self.vector = vector
+        self.seen = seen
+        self.excluded = excluded
+        self.generation = generation
+        self.loaded_at = time.monotonic()
+
+
+class RecipeRecommender:
+    """
+    基于特征矩阵余弦相似度的推荐器
+    """
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        rebuild_interval: int = 3600,
+        max_tags: int = 200,
+        max_ingredients: int = 500,
+        max_profiles: int = 10000,
+        profile_ttl: int = 900
+    ):
+        self.session_factory = session_factory
+        self.rebuild_interval = rebuild_interval
+        self.max_tags = max_tags
+        self.max_ingredients = max_ingredients
+        self.max_profiles = max_profiles
+        self.profile_ttl = profile_ttl
+        self.features: Optional[RecipeFeatureMatrix] = None
+        self._profiles: "OrderedDict[str, UserProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _session(self) -> Session:
+        factory = self.session_factory
+        if factory is None:
+            from app.core.database import SessionLocal
+            factory = SessionLocal
+        return factory()
+
+    def rebuild(self, db: Optional[Session] = None) -> RecipeFeatureMatrix:
+        """
+        重建食谱特征矩阵，已缓存的用户画像随之失效
+
+        Args:
+            db: 数据库会话，为空时自行创建
+
+        Returns:
+            RecipeFeatureMatrix: 新的特征矩阵
+        """
+        with self._rebuild_lock:
+            owns_session = db is None
+            db = db or self._session()
+            try:
+                started = time.perf_counter()
+                generation = self.features.generation + 1 if self.features else 1
+                features = RecipeFeatureMatrix.build(db, self.max_tags, self.max_ingredients, generation)
+            finally:
+                if owns_session:
+                    db.close()
+            with self._lock:
+                self.features = features
+                self._profiles.clear()
+            logger.info(
+                f"推荐特征矩阵已重建: {len(features.recipe_ids)}个食谱，{features.dimension}维，"
+                f"{len(features.indices)}个非零标签/食材项，占用{features.nbytes / 1024 / 1024:.1f} MB，"
+                f"耗时{time.perf_counter() - started:.2f}秒"
+            )
+            return features
+
+    def _load_profile(self, db: Session, user_id: str, features: RecipeFeatureMatrix) -> UserProfile:
+        vector = np.zeros(features.dimension, dtype=np.float32)
+        seen: Set[str] = set()
+
+        for (recipe_id,) in db.query(Favorite.recipe_id).filter(Favorite.user_id == user_id):
+            seen.add(str(recipe_id))
+            row = features.row(recipe_id)
+            if row is not None:
+                vector += FAVORITE_PROFILE_WEIGHT * row
+        for recipe_id, score in db.query(Rating.recipe_id, Rating.score).filter(Rating.user_id == user_id):
+            seen.add(str(recipe_id))
+            row = features.row(recipe_id)
+            if row is not None:
+                vector += rating_profile_weight(score) * row
+
+        diet_preferences = db.query(User.diet_preferences).filter(User.user_id == user_id).scalar()
+        vector += DIET_PREFERENCE_WEIGHT * features.preference_vector(diet_preferences)
+        return UserProfile(vector, seen, features.restricted_rows(diet_preferences), features.generation)
+
+    def _get_profile(self, user_id: str, features: RecipeFeatureMatrix) -> UserProfile:
+        with self._lock:
+            profile = self._profiles.get(user_id)
+            if (
+                profile is not None
+                and profile.generation == features.generation
+                and time.monotonic() - profile.loaded_at < self.profile_ttl
+            ):
+                self._profiles.move_to_end(user_id)
+                return profile
+
+        db = self._session()
+        try:
+            profile = self._load_profile(db, user_id, features)
+        finally:
+            db.close()
+
+        with self._lock:
+            self._profiles[user_id] = profile
+            self._profiles.move_to_end(user_id)
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def recommend(self, user_id: Any, limit: int = 20, skip: int = 0) -> List[Tuple[str, float]]:
+        """
+        为用户推荐食谱
+
+        Args:
+            user_id: 用户ID
+            limit: 返回数量
+            skip: 跳过的数量
+
+        Returns:
+            (食谱ID, 余弦相似度)列表；用户没有任何偏好信号时返回空列表
+        """
+        features = self.features or self.rebuild()
+        profile = self._get_profile(str(user_id), features)
+
+        norm = float(np.linalg.norm(profile.vector))
+        if norm == 0 or not len(features.recipe_ids):
+            return []
+
+        scores = features.scores(profile.vector / norm)
+        for recipe_id in profile.seen:
+            row = features.row_index.get(recipe_id)
+            if row is not None:
+                scores[row] = -np.inf
+        if profile.excluded.size:
+            scores[profile.excluded] = -np.inf
+
+        k = min(skip + limit, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            (features.recipe_ids[row], float(scores[row]))
+            for row in top[skip:]
+            if np.isfinite(scores[row])
+        ]
+
+    def _update_profile(self, user_id: Any, recipe_id: Any, weight: float, seen: bool) -> None:
+        with self._lock:
+            profile = self._profiles.get(str(user_id))
+            features = self.features
+            if profile is None or features is None or profile.generation != features.generation:
+                return
+            row = features.row(recipe_id)
+            if row is not None and weight:
+                profile.vector += weight * row
+            if seen:
+                profile.seen.add(str(recipe_id))
+            else:
+                profile.seen.discard(str(recipe_id))
+
+    def record_favorite(self, user_id: Any, recipe_id: Any, added: bool = True) -> None:
+        """
+        收藏或取消收藏后增量更新已缓存的用户画像
+
+        Args:
+            user_id: 用户ID
+            recipe_id: 食谱ID
+            added: True为收藏，False为取消收藏
+        """
+        weight = FAVORITE_PROFILE_WEIGHT if added else -FAVORITE_PROFILE_WEIGHT
+        self._update_profile(user_id, recipe_id, weight, seen=added)
+
+    def record_rating(self, user_id: Any, recipe_id: Any, score: int, previous_score: Optional[int] = None) -> None:
+        """
+        评分后增量更新已缓存的用户画像
+
+        Args:
+            user_id: 用户ID
+            recipe_id: 食谱ID
+            score: 新评分
+            previous_score: 修改评分时的旧评分
+        """
+        weight = rating_profile_weight(score) - rating_profile_weight(previous_score)
+        self._update_profile(user_id, recipe_id, weight, seen=True)
+
+    def invalidate_user(self, user_id: Any) -> None:
+        """
+        丢弃用户画像缓存（如饮食偏好变化后）
+        """
+        with self._lock:
+            self._profiles.pop(str(user_id), None)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await run_in_threadpool(self.rebuild)
+            except Exception as e:
+                logger.error(f"重建推荐特征矩阵失败: {str(e)}")
+            await asyncio.sleep(self.rebuild_interval)
+
+    def start(self) -> None:
+        """
+        启动后台定时重建任务
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        停止后台定时重建任务
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# 全局推荐器实例
+recipe_recommender = RecipeRecommender(
+    rebuild_interval=settings.RECOMMENDER_REBUILD_SECONDS,
+    max_tags=settings.RECOMMENDER_MAX_TAGS,
+    max_ingredients=settings.RECOMMENDER_MAX_INGREDIENTS,
+    max_profiles=settings.RECOMMENDER_PROFILE_CACHE_SIZE,
+    profile_ttl=settings.RECOMMENDER_PROFILE_TTL_SECONDS
+)
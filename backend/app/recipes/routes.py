@@ -1,19 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Literal
+from collections import Counter
+from app.core.config import settings
+from app.core.database import get_db, get_async_db
 from app.auth.dependencies import get_current_user, optional_get_current_active_user
 from app.models.user import User
 from app.recipes.schemas import (
     RecipeBase, RecipeCreate, RecipeUpdate, RecipeResponse, RecipeListItem,
     RecipeSearchParams, RatingCreate, RatingResponse,
-    NutritionInfoResponse, RecipeListResponse
+    NutritionInfoResponse, RecipeListResponse, TagFacet, TagFacetResponse,
+    RecipeBulkImportResponse, TrendingRecipeItem, TrendingRecipeResponse,
+    RecommendedRecipeItem, RecommendedRecipeResponse, ShoppingListRequest,
+    CookableRecipeItem, CookableRecipeResponse
 )
-from app.recipes.services import RecipeService
+from app.recipes.services import RecipeService, encode_recipe_cursor, decode_recipe_cursor, recipe_list_item
+from app.core.responses import FastJSONResponse, ModelJSONResponse, dump_model_json
+from app.recipes.cache import CachedRecipeResponse, recipe_response_cache
+from app.recipes.bulk_import import RecipeBulkImporter
+from app.recipes.trending import trending_engine
+from app.recipes.recommender import recipe_recommender
+from app.recipes.ingredient_index import cookable_recipe_finder
+from app.recipes.shopping_list import build_shopping_list, iter_shopping_list_ndjson, parse_recipe_ids, plan_recipe_ids
+from app.diet_plans.services import DietPlanService
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
 
+def build_search_params(
+    query: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    max_cooking_time: Optional[int] = None,
+    tags: Optional[List[str]] = None,
+    tag_mode: str = "all"
+) -> dict:
+    """
+    根据查询参数构建食谱搜索参数字典
+    """
+    search_params = {}
+    if query:
+        search_params["query"] = query
+    if difficulty:
+        search_params["difficulty"] = difficulty
+    if max_cooking_time is not None:
+        search_params["max_cooking_time"] = max_cooking_time
+    if tags:
+        search_params["tags"] = tags
+        search_params["tag_mode"] = tag_mode
+    return search_params
+
+
 @router.post("/", response_model=RecipeResponse)
 async def create_recipe(
     recipe: RecipeCreate,
@@ -59,7 +98,7 @@ async def create_recipe(
     if isinstance(instructions, str):
         instructions = [step.strip() for step in instructions.split('\n') if step.strip()]
     
-    return RecipeResponse(
+    return ModelJSONResponse(RecipeResponse(
         recipe_id=str(full_recipe.recipe_id),
         title=full_recipe.title,
         description=full_recipe.description,
@@ -75,7 +114,7 @@ async def create_recipe(
             recipe_id=str(full_recipe.nutrition_info.recipe_id),
             calories=full_recipe.nutrition_info.calories,
             protein=full_recipe.nutrition_info.protein,
-            carbohydrates=full_recipe.nutrition_info.carbs,
+            carbs=full_recipe.nutrition_info.carbs,
             fat=full_recipe.nutrition_info.fat,
             fiber=full_recipe.nutrition_info.fiber
         ) if full_recipe.nutrition_info else None,
@@ -83,7 +122,7 @@ async def create_recipe(
         author_name=full_recipe.author.username,
         created_at=full_recipe.created_at,
         updated_at=full_recipe.updated_at
-    )
+    ))
 
 
 @router.get("/user", response_model=List[RecipeListItem])
@@ -94,27 +133,95 @@ async def get_user_recipes(
     """
     获取当前用户的食谱列表
     """
-    recipes = RecipeService.get_recipes(
+    rows = RecipeService.get_recipe_list_rows(
         db=db,
         author_id=current_user.user_id
     )
     
-    # 构建响应
-    return [
-        RecipeListItem(
-            recipe_id=str(recipe.recipe_id),
-            title=recipe.title,
-            description=recipe.description,
-            cooking_time=recipe.cooking_time,
-            difficulty=recipe.difficulty,
-            tags=recipe.tags,
-            image_url=recipe.image_url,
-            author_id=str(recipe.author_id),
-            author_name=recipe.author.username,
-            created_at=recipe.created_at
+    # 只查询列表所需的列，行直接转换为字典后由orjson序列化
+    return FastJSONResponse([recipe_list_item(row) for row in rows])
+
+
+@router.post("/bulk", response_model=RecipeBulkImportResponse)
+async def bulk_import_recipes(
+    request: Request,
+    chunk_size: int = Query(settings.BULK_IMPORT_CHUNK_SIZE, ge=1, le=10000, description="每块写入的食谱数"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    批量导入食谱
+
+    请求体为NDJSON（每行一个RecipeCreate对象），以流的方式读取。数据按块校验，
+    通过COPY写入暂存表后合并，每块独立提交；校验或写入失败的行在响应中按行号列出。
+    """
+    importer = RecipeBulkImporter(
+        db,
+        current_user.user_id,
+        chunk_size=chunk_size,
+        max_errors=settings.BULK_IMPORT_MAX_ERRORS
+    )
+
+    line_no = 0
+    buffer = b""
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if importer.add(line_no, line):
+                await run_in_threadpool(importer.flush)
+    if buffer:
+        line_no += 1
+        importer.add(line_no, buffer)
+
+    result = await run_in_threadpool(importer.finish)
+    return ModelJSONResponse(RecipeBulkImportResponse(**result.to_dict()))
+
+
+@router.post("/shopping-list")
+async def create_shopping_list(
+    request: ShoppingListRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    生成合并购物清单
+
+    合并recipe_ids中的食谱和plan_id对应饮食计划中每餐的食谱的食材，单位统一换算
+    后按份数缩放累加。响应为NDJSON，每行一个食材类别:
+    {"category": "蔬菜", "items": [{"name": "番茄", "amounts": [{"quantity": 300, "unit": "g"}], "recipe_count": 2}]}
+    """
+    recipe_counts, invalid_ids = parse_recipe_ids(request.recipe_ids)
+    if invalid_ids:
+        raise HTTPException(status_code=404, detail=f"Recipe not found: {', '.join(invalid_ids)}")
+    requested = {str(recipe_id) for recipe_id in recipe_counts}
+
+    plan_counts = Counter()
+    if request.plan_id:
+        plan = DietPlanService.get_plan(db, request.plan_id, current_user.user_id)
+        if not plan:
+            raise HTTPException(status_code=404, detail="Diet plan not found")
+        # 饮食计划按每份营养选择食谱，每餐单独计数，默认按1份缩放
+        plan_counts, _ = parse_recipe_ids(plan_recipe_ids(plan.meal_plan))
+
+    if not recipe_counts and not plan_counts:
+        raise HTTPException(status_code=400, detail="recipe_ids和plan_id至少需要提供一个")
+    if sum(recipe_counts.values()) + sum(plan_counts.values()) > settings.SHOPPING_LIST_MAX_RECIPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"单次最多合并{settings.SHOPPING_LIST_MAX_RECIPES}个食谱"
         )
-        for recipe in recipes
-    ]
+
+    groups, missing = await run_in_threadpool(
+        build_shopping_list, db, recipe_counts, request.servings, plan_counts
+    )
+    # 直接指定的食谱必须存在，饮食计划中已被删除的食谱跳过
+    missing = [recipe_id for recipe_id in missing if recipe_id in requested]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Recipe not found: {', '.join(missing)}")
+
+    return StreamingResponse(iter_shopping_list_ndjson(groups), media_type="application/x-ndjson")
 
 
 @router.get("/", response_model=RecipeListResponse)
@@ -123,87 +230,232 @@ async def get_recipes(
     limit: int = Query(20, ge=1, le=100),
     page: Optional[int] = Query(None, ge=1),  # 新增：支持page参数
     tags: Optional[List[str]] = Query(None),  # 新增：支持tags参数
+    tag_mode: Literal["all", "any"] = Query("all", description="标签匹配方式：all包含全部标签，any包含任一标签"),
     author_id: Optional[str] = None,
     query: Optional[str] = None,
     difficulty: Optional[str] = None,
     max_cooking_time: Optional[int] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="分页游标，提供时使用键集分页并忽略skip/page"),
+    count: Literal["exact", "estimate", "none"] = Query("exact", description="总数计算方式：exact精确计数，estimate估算，none不计算"),
+    sort: Literal["newest", "relevance", "rating"] = Query("newest", description="排序方式：newest最新，relevance按搜索相关度，rating按平均评分"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(optional_get_current_active_user)
 ):
     """
     获取食谱列表
+    
+    支持两种分页方式：传统的skip/page偏移分页，以及传入上一页返回的
+    next_cursor进行的键集分页（深分页时性能稳定）。无限滚动等不需要
+    总数的客户端可以传入count=none跳过计数。sort=relevance时按query的
+    全文检索相关度排序，sort=rating时按平均评分排序，这两种排序不支持游标分页。
     """
     # 构建搜索参数
-    search_params = {}
-    if query:
-        search_params["query"] = query
-    if difficulty:
-        search_params["difficulty"] = difficulty
-    if max_cooking_time is not None:
-        search_params["max_cooking_time"] = max_cooking_time
-    if tags:  # 新增：支持tags参数
-        search_params["tags"] = tags
+    search_params = build_search_params(query, difficulty, max_cooking_time, tags, tag_mode)
     
     # 如果提供了page参数，计算skip值
     if page is not None:
         skip = (page - 1) * limit
     
-    # 获取当前用户ID（如果已登录）
-    user_id = current_user.user_id if current_user else None
+    # 解析分页游标
+    decoded_cursor = None
+    if cursor:
+        if sort != "newest":
+            raise HTTPException(status_code=400, detail="Cursor pagination is only supported with sort=newest")
+        try:
+            decoded_cursor = decode_recipe_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
     
-    # 获取食谱列表和总数
-    recipes = RecipeService.get_recipes(
+    # 获取食谱列表行和总数，多取一条用于判断是否还有下一页
+    rows, total = await RecipeService.get_recipe_list_page_async(
         db=db,
         skip=skip,
-        limit=limit,
+        limit=limit + 1,
         author_id=author_id,
-        user_id=user_id,  # 传递当前用户ID用于过滤
-        search_params=search_params if search_params else None
+        search_params=search_params if search_params else None,
+        cursor=decoded_cursor,
+        count_mode=count,
+        sort=sort
+    )
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if sort == "newest":
+            last_row = rows[-1]
+            next_cursor = encode_recipe_cursor(last_row.created_at, last_row.recipe_id)
+    
+    # 只查询列表所需的列，行直接转换为字典后由orjson序列化，不构建ORM对象和pydantic模型
+    return FastJSONResponse({
+        "recipes": [recipe_list_item(row) for row in rows],
+        "page": page if page is not None else skip // limit + 1,
+        "limit": limit,
+        "total": total,
+        "next_cursor": next_cursor
+    })
+
+
+@router.get("/trending", response_model=TrendingRecipeResponse)
+async def get_trending_recipes(
+    window: Literal["24h", "7d", "30d"] = Query("24h", description="时间窗口"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    获取趋势食谱
+
+    排名来自内存中定时刷新的趋势排行（收藏和评分按时间衰减加权），
+    只需按ID加载当前页的食谱。
+    """
+    await trending_engine.ensure_ready()
+    ranked = trending_engine.top(window, limit, skip)
+    recipes = await RecipeService.get_recipes_by_ids_async(db, [recipe_id for recipe_id, _ in ranked])
+    scores = dict(ranked)
+    
+    return ModelJSONResponse(TrendingRecipeResponse(
+        window=window,
+        recipes=[
+            TrendingRecipeItem(
+                recipe_id=str(recipe.recipe_id),
+                title=recipe.title,
+                description=recipe.description,
+                cooking_time=recipe.cooking_time,
+                difficulty=recipe.difficulty,
+                author_name=recipe.author.username,
+                image_url=recipe.image_url,
+                created_at=recipe.created_at,
+                average_rating=recipe.rating_avg,
+                rating_count=recipe.rating_count,
+                trending_score=round(scores[str(recipe.recipe_id)], 4)
+            )
+            for recipe in recipes
+        ]
+    ))
+
+
+@router.get("/recommended", response_model=RecommendedRecipeResponse)
+async def get_recommended_recipes(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    获取个性化推荐食谱
+
+    根据用户的收藏、评分和饮食偏好计算推荐；没有任何偏好信号的新用户
+    返回近7天的趋势食谱。
+    """
+    strategy = "personalized"
+    ranked = await run_in_threadpool(recipe_recommender.recommend, current_user.user_id, limit, skip)
+    if not ranked:
+        strategy = "trending"
+        await trending_engine.ensure_ready()
+        ranked = trending_engine.top("7d", limit, skip)
+    
+    recipes = await RecipeService.get_recipes_by_ids_async(db, [recipe_id for recipe_id, _ in ranked])
+    scores = dict(ranked)
+    
+    return ModelJSONResponse(RecommendedRecipeResponse(
+        strategy=strategy,
+        recipes=[
+            RecommendedRecipeItem(
+                recipe_id=str(recipe.recipe_id),
+                title=recipe.title,
+                description=recipe.description,
+                cooking_time=recipe.cooking_time,
+                difficulty=recipe.difficulty,
+                author_name=recipe.author.username,
+                image_url=recipe.image_url,
+                created_at=recipe.created_at,
+                average_rating=recipe.rating_avg,
+                rating_count=recipe.rating_count,
+                score=round(scores[str(recipe.recipe_id)], 4)
+            )
+            for recipe in recipes
+        ]
+    ))
+
+
+@router.get("/cookable", response_model=CookableRecipeResponse)
+async def get_cookable_recipes(
+    ingredients: List[str] = Query(..., description="现有食材名称"),
+    sort: Literal["coverage", "missing"] = Query("coverage", description="排序方式：覆盖率或缺少的食材数"),
+    max_missing: Optional[int] = Query(None, ge=0, description="最多缺少的食材数"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    按现有食材查找食谱
+
+    在内存中的食材倒排索引上计算每个食谱命中的食材数，按覆盖率或缺少的食材数
+    排序后只需按ID加载当前页的食谱。
+    """
+    matches, unknown = await run_in_threadpool(
+        cookable_recipe_finder.find, ingredients, sort, limit, skip, max_missing
     )
+    recipes = await RecipeService.get_recipes_by_ids_async(db, [match["recipe_id"] for match in matches])
+    matches_by_id = {match["recipe_id"]: match for match in matches}
+    
+    return ModelJSONResponse(CookableRecipeResponse(
+        sort=sort,
+        unknown_ingredients=unknown,
+        recipes=[
+            CookableRecipeItem(
+                recipe_id=str(recipe.recipe_id),
+                title=recipe.title,
+                description=recipe.description,
+                cooking_time=recipe.cooking_time,
+                difficulty=recipe.difficulty,
+                author_name=recipe.author.username,
+                image_url=recipe.image_url,
+                created_at=recipe.created_at,
+                average_rating=recipe.rating_avg,
+                rating_count=recipe.rating_count,
+                matched_count=matches_by_id[str(recipe.recipe_id)]["matched_count"],
+                missing_count=matches_by_id[str(recipe.recipe_id)]["missing_count"],
+                coverage=round(matches_by_id[str(recipe.recipe_id)]["coverage"], 4),
+                missing_ingredients=matches_by_id[str(recipe.recipe_id)]["missing_ingredients"]
+            )
+            for recipe in recipes
+        ]
+    ))
+
+
+@router.get("/tags", response_model=TagFacetResponse)
+async def get_tag_facets(
+    tags: Optional[List[str]] = Query(None),
+    tag_mode: Literal["all", "any"] = Query("all", description="标签匹配方式：all包含全部标签，any包含任一标签"),
+    author_id: Optional[str] = None,
+    query: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    max_cooking_time: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    获取当前筛选条件下的标签分面统计
+    """
+    search_params = build_search_params(query, difficulty, max_cooking_time, tags, tag_mode)
     
-    total = RecipeService.get_recipes_count(
+    facets = await RecipeService.get_tag_facets_async(
         db=db,
         author_id=author_id,
-        user_id=user_id,  # 传递当前用户ID用于过滤，确保总数也排除已收藏的食谱
-        search_params=search_params if search_params else None
+        search_params=search_params if search_params else None,
+        limit=limit
     )
     
-    # 构建食谱列表项
-    recipe_list_items = [
-        RecipeListItem(
-            recipe_id=str(recipe.recipe_id),
-            title=recipe.title,
-            description=recipe.description,
-            cooking_time=recipe.cooking_time,
-            difficulty=recipe.difficulty,
-            author_name=recipe.author.username,
-            image_url=recipe.image_url,
-            created_at=recipe.created_at
-        )
-        for recipe in recipes
-    ]
-    
-    # 构建响应
-    return RecipeListResponse(
-        recipes=recipe_list_items,
-        page=page,
-        limit=limit,
-        total=total
-    )
+    return ModelJSONResponse(TagFacetResponse(
+        tags=[TagFacet(tag=tag, count=count) for tag, count in facets]
+    ))
 
 
-@router.get("/{recipe_id}", response_model=RecipeResponse)
-async def get_recipe(
-    recipe_id: str,
-    db: Session = Depends(get_db)
-):
+def build_recipe_response(recipe) -> RecipeResponse:
     """
-    获取食谱详情
+    根据食谱ORM对象构建详情响应
     """
-    recipe = RecipeService.get_recipe_by_id(db, recipe_id)
-    if not recipe:
-        raise HTTPException(status_code=404, detail="Recipe not found")
-    
     # 构建响应数据
     # 将instructions字符串按换行符分割为数组，以匹配前端期望的格式
     instructions = recipe.instructions or ""
@@ -261,6 +513,50 @@ async def get_recipe(
     )
 
 
+@router.get("/{recipe_id}", response_model=RecipeResponse)
+async def get_recipe(
+    recipe_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    获取食谱详情
+
+    响应带有ETag和Last-Modified头，客户端携带匹配的If-None-Match时返回304。
+    启用缓存时先读取食谱当前版本，只使用版本一致的缓存条目。
+    """
+    if_none_match = request.headers.get("if-none-match")
+
+    cached = None
+    version = None
+    if settings.RECIPE_CACHE_ENABLED:
+        version = await RecipeService.get_recipe_version_async(db, recipe_id)
+        if version is None:
+            recipe_response_cache.invalidate(recipe_id)
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        cached = recipe_response_cache.get(recipe_id, version)
+    if cached is None:
+        recipe = await RecipeService.get_recipe_by_id_async(db, recipe_id)
+        if not recipe:
+            raise HTTPException(status_code=404, detail="Recipe not found")
+
+        body = dump_model_json(build_recipe_response(recipe))
+        if settings.RECIPE_CACHE_ENABLED:
+            # 版本在加载之前读取：期间发生的更新只会让下一次请求版本不一致而重新加载
+            cached = recipe_response_cache.set(recipe_id, body, recipe.updated_at, version)
+        else:
+            cached = CachedRecipeResponse(body, recipe.updated_at, 0)
+
+    headers = {
+        "ETag": cached.etag,
+        "Last-Modified": cached.last_modified,
+        "Cache-Control": "no-cache"
+    }
+    if cached.matches(if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
 @router.put("/{recipe_id}", response_model=RecipeResponse)
 async def update_recipe(
     recipe_id: str,
@@ -319,7 +615,7 @@ async def update_recipe(
     if isinstance(instructions, str):
         instructions = [step.strip() for step in instructions.split('\n') if step.strip()]
     
-    return RecipeResponse(
+    return ModelJSONResponse(RecipeResponse(
         recipe_id=str(full_recipe.recipe_id),
         title=full_recipe.title,
         description=full_recipe.description,
@@ -335,7 +631,7 @@ async def update_recipe(
             recipe_id=str(full_recipe.nutrition_info.recipe_id),
             calories=full_recipe.nutrition_info.calories,
             protein=full_recipe.nutrition_info.protein,
-            carbohydrates=full_recipe.nutrition_info.carbs,
+            carbs=full_recipe.nutrition_info.carbs,
             fat=full_recipe.nutrition_info.fat,
             fiber=full_recipe.nutrition_info.fiber
         ) if full_recipe.nutrition_info else None,
@@ -343,7 +639,7 @@ async def update_recipe(
         author_name=full_recipe.author.username,
         created_at=full_recipe.created_at,
         updated_at=full_recipe.updated_at
-    )
+    ))
 
 
 
@@ -398,7 +694,7 @@ async def rate_recipe(
         rating_data.comment
     )
     
-    return RatingResponse(
+    return ModelJSONResponse(RatingResponse(
         rating_id=rating.rating_id,
         user_id=str(current_user.user_id),
         recipe_id=recipe_id,
@@ -406,7 +702,7 @@ async def rate_recipe(
         comment=rating.comment,
         created_at=rating.created_at,
         user_name=current_user.username
-    )
+    ))
 
 
 @router.get("/{recipe_id}/ratings", response_model=List[RatingResponse])
@@ -414,21 +710,21 @@ async def get_recipe_ratings(
     recipe_id: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取食谱评分列表
     """
     # 检查食谱是否存在
-    recipe = RecipeService.get_recipe_by_id(db, recipe_id)
+    recipe = await RecipeService.get_recipe_by_id_async(db, recipe_id, load_relationships=False)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
     
     # 获取评分列表
-    ratings = RecipeService.get_recipe_ratings(db, recipe_id, skip, limit)
+    ratings = await RecipeService.get_recipe_ratings_async(db, recipe_id, skip, limit)
     
     # 构建响应
-    return [
+    return ModelJSONResponse([
         RatingResponse(
             rating_id=rating.rating_id,
             user_id=str(rating.user_id),
@@ -439,7 +735,7 @@ async def get_recipe_ratings(
             user_name=rating.user.username
         )
         for rating in ratings
-    ]
+    ])
 
 
 @router.post("/{recipe_id}/favorite", response_model=dict)
@@ -96,19 +96,76 @@ class RecipeListItem(BaseModel):
     author_name: Optional[str] = Field(None, description="作者名称")
     image_url: Optional[str] = Field(None, description="图片URL")
     created_at: datetime = Field(..., description="创建时间")
+    average_rating: Optional[float] = Field(None, description="平均评分")
+    rating_count: int = Field(0, description="评分人数")
     
     class Config:
         from_attributes = True
 
+# 趋势食谱列表项模型
+class TrendingRecipeItem(RecipeListItem):
+    trending_score: float = Field(..., description="趋势分数")
+
+# 趋势食谱响应模型
+class TrendingRecipeResponse(BaseModel):
+    window: str = Field(..., description="时间窗口")
+    recipes: List[TrendingRecipeItem] = Field(..., description="趋势食谱列表")
+
+# 推荐食谱列表项模型
+class RecommendedRecipeItem(RecipeListItem):
+    score: float = Field(..., description="推荐分数（个性化推荐为余弦相似度，热门回退为趋势分数）")
+
+# 推荐食谱响应模型
+class RecommendedRecipeResponse(BaseModel):
+    strategy: str = Field(..., description="推荐方式(personalized/trending)")
+    recipes: List[RecommendedRecipeItem] = Field(..., description="推荐食谱列表")
+
+# 按现有食材查找的食谱列表项模型
+class CookableRecipeItem(RecipeListItem):
+    matched_count: int = Field(..., description="命中的现有食材数")
+    missing_count: int = Field(..., description="缺少的食材数")
+    coverage: float = Field(..., description="覆盖率（命中数 / 食谱食材总数）")
+    missing_ingredients: List[str] = Field([], description="缺少的食材名称")
+
+# 按现有食材查找的响应模型
+class CookableRecipeResponse(BaseModel):
+    sort: str = Field(..., description="排序方式(coverage/missing)")
+    unknown_ingredients: List[str] = Field([], description="没有任何食谱使用的食材名称")
+    recipes: List[CookableRecipeItem] = Field(..., description="食谱列表")
+
 # 食谱搜索参数模型
 class RecipeSearchParams(BaseModel):
     query: Optional[str] = Field(None, description="搜索关键词")
     tags: Optional[List[str]] = Field(None, description="标签筛选")
+    tag_mode: Optional[str] = Field("all", description="标签匹配方式(all/any)")
     difficulty: Optional[str] = Field(None, description="难度筛选")
     max_cooking_time: Optional[int] = Field(None, gt=0, description="最大烹饪时间")
     ingredients_include: Optional[List[str]] = Field(None, description="必须包含的食材")
     ingredients_exclude: Optional[List[str]] = Field(None, description="排除的食材")
 
+# 标签分面统计项模型
+class TagFacet(BaseModel):
+    tag: str = Field(..., description="标签")
+    count: int = Field(..., description="食谱数量")
+
+# 标签分面统计响应模型
+class TagFacetResponse(BaseModel):
+    tags: List[TagFacet] = Field(..., description="标签统计列表")
+
+# 批量导入错误项模型
+class RecipeBulkImportError(BaseModel):
+    line: int = Field(..., description="NDJSON行号")
+    error: str = Field(..., description="错误信息")
+
+# 批量导入响应模型
+class RecipeBulkImportResponse(BaseModel):
+    total: int = Field(..., description="处理的食谱行数")
+    imported: int = Field(..., description="成功导入数量")
+    failed: int = Field(..., description="失败数量")
+    chunks: int = Field(..., description="写入块数")
+    errors: List[RecipeBulkImportError] = Field(..., description="逐行错误列表")
+    errors_truncated: bool = Field(False, description="错误列表是否因数量过多被截断")
+
 # 收藏响应模型
 class FavoriteResponse(BaseModel):
     favorite_id: str = Field(..., description="收藏ID")
@@ -145,4 +202,11 @@ class RecipeListResponse(BaseModel):
     recipes: List[RecipeListItem] = Field(..., description="食谱列表")
     page: int = Field(..., description="当前页码")
     limit: int = Field(..., description="每页记录数")
-    total: int = Field(..., description="总记录数")
\ No newline at end of file
+    total: Optional[int] = Field(None, description="总记录数（count=none时为空，count=estimate时为估算值）")
+    next_cursor: Optional[str] = Field(None, description="下一页游标（没有更多数据时为空）")
+
+# 购物清单请求模型
+class ShoppingListRequest(BaseModel):
+    recipe_ids: List[str] = Field([], description="食谱ID列表，重复的ID按多次计算")
+    plan_id: Optional[str] = Field(None, description="饮食计划ID，计划中每餐的食谱都加入清单")
+    servings: Optional[int] = Field(None, gt=0, le=100, description="每个食谱的份数，为空时食谱按原份量、饮食计划每餐按1份")
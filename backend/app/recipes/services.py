@@ -1,19 +1,182 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_, func
+from sqlalchemy.orm import Session, joinedload, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, func, case, tuple_, select, insert, update, any_, bindparam, String, text, literal_column
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from uuid import UUID
-from typing import List, Optional, Dict, Any
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+import base64
+import json
 import logging
+import re
 from app.models.recipe import Recipe
 from app.models.ingredient import Ingredient
 from app.models.recipe_ingredient import RecipeIngredient
 from app.models.nutrition_info import NutritionInfo
 from app.models.rating import Rating
 from app.models.user import User
+from app.models.favorite import Favorite
 from app.core.utils import generate_recipe_id
+from app.recipes.cache import recipe_response_cache
+from app.recipes.recommender import recipe_recommender
+from app.recipes.ingredient_index import cookable_recipe_finder
 
 # 配置日志记录器
 logger = logging.getLogger(__name__)
 
+# 难度排序权重（中英文难度值统一映射为可排序的数值）
+DIFFICULTY_ORDER = {'简单': 1, '中等': 2, '困难': 3, 'easy': 1, 'medium': 2, 'hard': 3}
+
+# 收藏列表允许的排序字段
+FAVORITE_SORT_FIELDS = ("created_at", "cooking_time", "difficulty")
+
+# 食谱列表总数的计算方式
+COUNT_MODES = ("exact", "estimate", "none")
+
+# 食谱列表支持的排序方式
+RECIPE_SORTS = ("newest", "relevance", "rating")
+
+# 全文检索使用的文本搜索配置（中文内容没有内置分词器，统一使用simple配置）
+SEARCH_TS_CONFIG = "simple"
+
+# 食谱列表项（RecipeListItem）所需的列，列表查询只读取这些列，不加载步骤、食材JSON等大字段
+RECIPE_LIST_COLUMNS = (
+    Recipe.recipe_id,
+    Recipe.title,
+    Recipe.description,
+    Recipe.cooking_time,
+    Recipe.difficulty,
+    User.username.label("author_name"),
+    Recipe.image_url,
+    Recipe.created_at,
+    Recipe.rating_avg.label("average_rating"),
+    Recipe.rating_count,
+)
+
+# 与RECIPE_LIST_COLUMNS顺序一致的字段名
+RECIPE_LIST_FIELDS = (
+    "recipe_id", "title", "description", "cooking_time", "difficulty",
+    "author_name", "image_url", "created_at", "average_rating", "rating_count",
+)
+
+
+def recipe_list_select(*extra_columns):
+    """
+    构建只查询列表列的SELECT，作者名称通过外连接users表获得
+    
+    Args:
+        extra_columns: 追加在列表列之后的列（如窗口计数）
+    
+    Returns:
+        以Recipe为主表的Select对象
+    """
+    return select(*RECIPE_LIST_COLUMNS, *extra_columns).select_from(Recipe).outerjoin(
+        User, User.user_id == Recipe.author_id
+    )
+
+
+def recipe_list_item(row: Any) -> Dict[str, Any]:
+    """
+    将列表查询的行转换为RecipeListItem格式的字典（行末尾的额外列被忽略）
+    """
+    return dict(zip(RECIPE_LIST_FIELDS, row))
+
+
+def recipe_tags_filter(tags: List[str], tag_mode: str = "all"):
+    """
+    构建标签筛选条件
+    
+    Args:
+        tags: 标签列表
+        tag_mode: all表示需同时包含所有标签，any表示包含任一标签
+    
+    Returns:
+        SQL表达式
+    """
+    if tag_mode == "any":
+        return or_(*[Recipe.tags.contains([tag]) for tag in tags])
+    return Recipe.tags.contains(list(tags))
+
+
+def recipe_search_tsquery(search_text: str):
+    """
+    构建食谱全文检索的tsquery表达式
+    
+    Args:
+        search_text: 用户输入的搜索关键词
+    
+    Returns:
+        SQL表达式
+    """
+    return func.websearch_to_tsquery(SEARCH_TS_CONFIG, search_text)
+
+
+def recipe_search_rank(search_text: str):
+    """
+    构建食谱搜索相关度表达式
+    
+    ts_rank衡量分词命中情况，标题的三元组相似度补充未分词的中文内容。
+    
+    Args:
+        search_text: 用户输入的搜索关键词
+    
+    Returns:
+        SQL表达式
+    """
+    return (
+        func.coalesce(func.ts_rank(Recipe.search_vector, recipe_search_tsquery(search_text)), 0)
+        + func.similarity(Recipe.title, search_text)
+    )
+
+
+def encode_recipe_cursor(created_at: datetime, recipe_id: Any) -> str:
+    """
+    将食谱排序键编码为不透明的分页游标
+    
+    Args:
+        created_at: 食谱创建时间
+        recipe_id: 食谱ID
+    
+    Returns:
+        URL安全的游标字符串
+    """
+    payload = json.dumps([created_at.isoformat(), str(recipe_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_recipe_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    解码分页游标
+    
+    Args:
+        cursor: encode_recipe_cursor生成的游标字符串
+    
+    Returns:
+        (创建时间, 食谱ID)
+    
+    Raises:
+        ValueError: 游标格式无效时抛出
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, recipe_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), UUID(recipe_id)
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
+
+def normalize_ingredient_name(name: str) -> str:
+    """
+    规范化食材名称：去除首尾空白、合并连续空白并转为小写
+    
+    Args:
+        name: 原始食材名称
+    
+    Returns:
+        规范化后的名称
+    """
+    return re.sub(r"\s+", " ", str(name).strip()).lower()
+
 class RecipeService:
     """
     食谱服务类，处理食谱相关的业务逻辑
@@ -107,32 +270,10 @@ class RecipeService:
             db.add(new_nutrition)
         
         # 处理食材关联表（如果提供了足够的信息）
-        for ingredient_data in ingredients:
-            # 检查是否有name字段（确保是完整的食材对象）
-            if isinstance(ingredient_data, dict) and "name" in ingredient_data:
-                # 查找或创建食材
-                ingredient = db.query(Ingredient).filter(
-                    Ingredient.name == ingredient_data["name"]
-                ).first()
-                
-                if not ingredient:
-                    ingredient = Ingredient(
-                        name=ingredient_data["name"],
-                        unit=ingredient_data.get("unit")
-                    )
-                    db.add(ingredient)
-                    db.flush()  # 获取ingredient_id
-                
-                # 创建食谱-食材关联
-                recipe_ingredient = RecipeIngredient(
-                    recipe_id=recipe_id,
-                    ingredient_id=ingredient.ingredient_id,
-                    quantity=ingredient_data.get("quantity", 1),
-                    unit=ingredient_data.get("unit")
-                )
-                db.add(recipe_ingredient)
+        RecipeService._write_recipe_ingredients(db, recipe_id, ingredients)
         
         db.commit()
+        cookable_recipe_finder.refresh_recipe(db, recipe_id)
         
         # 获取并返回创建的食谱对象
         new_recipe = RecipeService.get_recipe_by_id(db, recipe_id)
@@ -179,37 +320,24 @@ class RecipeService:
         return query.first()
     
     @staticmethod
-    def get_recipes(
-        db: Session,
-        skip: int = 0,
-        limit: int = 20,
+    def apply_recipe_filters(
+        query: Query,
         author_id: Optional[Any] = None,
-        user_id: Optional[Any] = None,  # 当前用户ID，用于排除已收藏的食谱
         search_params: Optional[Dict[str, Any]] = None
-    ) -> List[Recipe]:
+    ) -> Query:
         """
-        获取食谱列表
+        为食谱查询应用作者和搜索筛选条件
+        
+        列表查询、计数查询和估算查询共用此方法，保证筛选逻辑一致。
         
         Args:
-            db: 数据库会话
-            skip: 跳过的记录数
-            limit: 返回的记录数
+            query: 以Recipe为主表的查询对象（Query或Select均可）
             author_id: 作者ID（可选）
-            user_id: 当前用户ID（可选），用于排除已收藏的食谱
             search_params: 搜索参数（可选）
         
         Returns:
-            食谱列表
+            应用筛选条件后的查询对象
         """
-        query = db.query(Recipe).options(
-            joinedload(Recipe.author)
-        )
-        
-        # 不再排除当前用户已收藏的食谱，让所有食谱都显示在列表中
-        # 收藏状态由前端通过isFavorite API单独判断
-        if user_id:
-            logger.info(f"获取用户ID {user_id} 的食谱列表，包括已收藏的食谱")
-        
         # 按作者筛选
         if author_id:
             # 安全地处理author_id
@@ -225,26 +353,22 @@ class RecipeService:
         
         # 应用搜索条件
         if search_params:
-            # 关键词搜索
+            # 关键词搜索：全文检索覆盖标题、描述、步骤和食材名称（GIN索引），
+            # 标题和描述的ILIKE由pg_trgm三元组索引支持，用于未分词的中文内容
             if search_params.get("query"):
                 search_text = f"%{search_params['query']}%"
                 query = query.filter(
                     or_(
+                        Recipe.search_vector.op("@@")(recipe_search_tsquery(search_params["query"])),
                         Recipe.title.ilike(search_text),
                         Recipe.description.ilike(search_text)
                     )
                 )
             
-            # 按标签筛选
+            # 按标签筛选：all要求包含全部标签（一次@>判断），any包含任一标签即可，
+            # 两者都可以由tags字段的GIN(jsonb_path_ops)索引支持
             if search_params.get("tags"):
-                for tag in search_params["tags"]:
-                    # 使用PostgreSQL的JSONB操作符正确查询JSON数组
-                    query = query.filter(
-                        and_(
-                            Recipe.tags.isnot(None),
-                            func.jsonb_contains(Recipe.tags, func.to_jsonb([tag]))
-                        )
-                    )
+                query = query.filter(recipe_tags_filter(search_params["tags"], search_params.get("tag_mode", "all")))
             
             # 按难度筛选
             if search_params.get("difficulty"):
@@ -254,10 +378,126 @@ class RecipeService:
             if search_params.get("max_cooking_time"):
                 query = query.filter(Recipe.cooking_time <= search_params["max_cooking_time"])
         
-        # 按创建时间降序排序
-        query = query.order_by(Recipe.created_at.desc())
+        return query
+    
+    @staticmethod
+    def _paginate_recipes_query(
+        query: Query,
+        skip: int,
+        limit: int,
+        cursor: Optional[Tuple[datetime, UUID]] = None,
+        sort: str = "newest",
+        search_params: Optional[Dict[str, Any]] = None
+    ) -> Query:
+        """
+        为食谱查询应用排序和分页
+        
+        Args:
+            query: 已应用筛选条件的查询对象（Query或Select均可）
+            skip: 跳过的记录数（提供cursor时忽略）
+            limit: 返回的记录数
+            cursor: 已解码的分页游标（可选，仅支持newest排序）
+            sort: 排序方式（newest/relevance/rating）
+            search_params: 搜索参数（relevance排序需要其中的query）
+        
+        Returns:
+            排序并分页后的查询对象
+        """
+        if sort not in RECIPE_SORTS:
+            raise ValueError(f"不支持的排序方式: {sort}")
+        
+        # 键集分页：从游标位置之后继续读取，可由(created_at, recipe_id)复合索引支持
+        if cursor is not None:
+            if sort != "newest":
+                raise ValueError("分页游标仅支持按创建时间排序")
+            query = query.filter(tuple_(Recipe.created_at, Recipe.recipe_id) < tuple_(*cursor))
+            skip = 0
+        
+        order_by = []
+        # 按相关度排序，没有搜索关键词时退化为按创建时间排序
+        search_text = (search_params or {}).get("query")
+        if sort == "relevance" and search_text:
+            order_by.append(recipe_search_rank(search_text).desc())
+        elif sort == "rating":
+            # 与ix_recipes_rating索引的列顺序一致，未评分的食谱排在最后
+            order_by.extend([Recipe.rating_avg.desc().nullslast(), Recipe.rating_count.desc()])
+        
+        # 按创建时间降序排序，recipe_id作为次级排序保证顺序稳定
+        order_by.extend([Recipe.created_at.desc(), Recipe.recipe_id.desc()])
+        query = query.order_by(*order_by)
+        
+        return query.offset(skip).limit(limit)
+    
+    @staticmethod
+    def get_recipes(
+        db: Session,
+        skip: int = 0,
+        limit: int = 20,
+        author_id: Optional[Any] = None,
+        user_id: Optional[Any] = None,  # 当前用户ID，用于排除已收藏的食谱
+        search_params: Optional[Dict[str, Any]] = None,
+        cursor: Optional[Tuple[datetime, UUID]] = None,
+        sort: str = "newest"
+    ) -> List[Recipe]:
+        """
+        获取食谱列表
+        
+        Args:
+            db: 数据库会话
+            skip: 跳过的记录数
+            limit: 返回的记录数
+            author_id: 作者ID（可选）
+            user_id: 当前用户ID（可选），用于排除已收藏的食谱
+            search_params: 搜索参数（可选）
+            cursor: 已解码的分页游标 (created_at, recipe_id)（可选），
+                提供时使用键集分页并忽略skip
+            sort: 排序方式（newest/relevance）
+        
+        Returns:
+            食谱列表
+        """
+        query = db.query(Recipe).options(
+            joinedload(Recipe.author)
+        )
+        
+        # 不再排除当前用户已收藏的食谱，让所有食谱都显示在列表中
+        # 收藏状态由前端通过isFavorite API单独判断
+        if user_id:
+            logger.info(f"获取用户ID {user_id} 的食谱列表，包括已收藏的食谱")
+        
+        query = RecipeService.apply_recipe_filters(query, author_id, search_params)
+        query = RecipeService._paginate_recipes_query(query, skip, limit, cursor, sort, search_params)
         
-        return query.offset(skip).limit(limit).all()
+        return query.all()
+    
+    @staticmethod
+    def get_recipe_list_rows(
+        db: Session,
+        skip: int = 0,
+        limit: int = 20,
+        author_id: Optional[Any] = None,
+        search_params: Optional[Dict[str, Any]] = None,
+        cursor: Optional[Tuple[datetime, UUID]] = None,
+        sort: str = "newest"
+    ) -> List[Any]:
+        """
+        获取食谱列表，只查询RECIPE_LIST_COLUMNS中的列
+        
+        Args:
+            db: 数据库会话
+            skip: 跳过的记录数
+            limit: 返回的记录数
+            author_id: 作者ID（可选）
+            search_params: 搜索参数（可选）
+            cursor: 已解码的分页游标（可选）
+            sort: 排序方式
+        
+        Returns:
+            列顺序与RECIPE_LIST_FIELDS一致的行列表
+        """
+        stmt = RecipeService.apply_recipe_filters(recipe_list_select(), author_id, search_params)
+        stmt = RecipeService._paginate_recipes_query(stmt, skip, limit, cursor, sort, search_params)
+        return db.execute(stmt).all()
     
     @staticmethod
     def get_recipes_count(
@@ -285,46 +525,150 @@ class RecipeService:
             # 不再排除当前用户已收藏的食谱，让所有食谱都计算在总数中
             logger.info(f"计算用户ID {user_id} 的食谱总数，包括已收藏的食谱")
         
-        # 按作者筛选
-        if author_id:
-            # 安全地处理author_id
-            if isinstance(author_id, UUID):
-                query = query.filter(Recipe.author_id == author_id)
-            else:
-                query = query.filter(Recipe.author_id == UUID(str(author_id)))
+        query = RecipeService.apply_recipe_filters(query, author_id, search_params)
         
-        # 应用搜索条件
-        if search_params:
-            # 关键词搜索
-            if search_params.get("query"):
-                search_text = f"%{search_params['query']}%"
-                query = query.filter(
-                    or_(
-                        Recipe.title.ilike(search_text),
-                        Recipe.description.ilike(search_text)
-                    )
-                )
-            
-            # 按标签筛选
-            if search_params.get("tags"):
-                for tag in search_params["tags"]:
-                    # 使用PostgreSQL的JSONB操作符正确查询JSON数组
-                    query = query.filter(
-                        and_(
-                            Recipe.tags.isnot(None),
-                            func.jsonb_contains(Recipe.tags, func.to_jsonb([tag]))
-                        )
+        return query.scalar() or 0
+    
+    @staticmethod
+    def estimate_recipes_count(
+        db: Session,
+        author_id: Optional[Any] = None,
+        search_params: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        估算食谱总数
+        
+        无筛选条件时读取pg_class.reltuples，有筛选条件时读取
+        EXPLAIN给出的计划行数，均不需要扫描表。统计信息尚未收集时
+        回退到精确计数。
+        
+        Args:
+            db: 数据库会话
+            author_id: 作者ID（可选）
+            search_params: 搜索参数（可选）
+        
+        Returns:
+            估算的食谱总数
+        """
+        from sqlalchemy import text
+        
+        try:
+            # 在保存点中执行，估算失败时不影响外层事务
+            with db.begin_nested():
+                if not author_id and not search_params:
+                    estimate = db.execute(text("""
+                        SELECT c.reltuples::bigint
+                        FROM pg_class c
+                        JOIN pg_namespace n ON n.oid = c.relnamespace
+                        WHERE n.nspname = :schema AND c.relname = :table
+                    """), {"schema": Recipe.__table__.schema, "table": Recipe.__tablename__}).scalar()
+                else:
+                    query = RecipeService.apply_recipe_filters(
+                        db.query(Recipe.recipe_id), author_id, search_params
                     )
+                    compiled = query.statement.compile(dialect=db.get_bind().dialect)
+                    params = compiled.params
+                    if compiled.positional:
+                        # asyncpg等位置参数风格的驱动需要按顺序传参
+                        params = tuple(params[name] for name in compiled.positiontup)
+                    plan = db.connection().exec_driver_sql(
+                        f"EXPLAIN (FORMAT JSON) {compiled}", params
+                    ).scalar()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    estimate = plan[0]["Plan"]["Plan Rows"]
             
-            # 按难度筛选
-            if search_params.get("difficulty"):
-                query = query.filter(Recipe.difficulty == search_params["difficulty"])
+            # reltuples为-1或空表示表尚未被ANALYZE
+            if estimate is not None and estimate >= 0:
+                return int(estimate)
+        except Exception as e:
+            logger.warning(f"估算食谱总数失败，回退到精确计数: {str(e)}")
+        
+        return RecipeService.get_recipes_count(db, author_id=author_id, search_params=search_params)
+    
+    @staticmethod
+    def upsert_ingredients(db: Session, ingredients: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        批量查找或创建食材
+        
+        先用一次 name = ANY(:names) 查询已有食材，再用一条
+        INSERT ... ON CONFLICT (name) DO NOTHING RETURNING 创建缺失的食材。
+        并发写入导致冲突而未返回的名称会再查询一次。
+        
+        Args:
+            db: 数据库会话
+            ingredients: 食材数据列表，每项包含name和可选的unit
+        
+        Returns:
+            规范化名称到ingredient_id的映射
+        """
+        units: Dict[str, Optional[str]] = {}
+        for ingredient_data in ingredients:
+            name = normalize_ingredient_name(ingredient_data["name"])
+            if name:
+                units.setdefault(name, ingredient_data.get("unit"))
+        if not units:
+            return {}
+        
+        def select_ids(names: List[str]) -> Dict[str, int]:
+            names_param = bindparam("names", names, type_=ARRAY(String))
+            rows = db.execute(
+                select(Ingredient.name, Ingredient.ingredient_id)
+                .where(Ingredient.name == any_(names_param))
+            ).all()
+            return {name: ingredient_id for name, ingredient_id in rows}
+        
+        ingredient_ids = select_ids(list(units))
+        missing = [name for name in units if name not in ingredient_ids]
+        if missing:
+            stmt = (
+                pg_insert(Ingredient)
+                .values([{"name": name, "unit": units[name]} for name in missing])
+                .on_conflict_do_nothing(index_elements=[Ingredient.name])
+                .returning(Ingredient.name, Ingredient.ingredient_id)
+            )
+            for name, ingredient_id in db.execute(stmt).all():
+                ingredient_ids[name] = ingredient_id
             
-            # 按烹饪时间筛选
-            if search_params.get("max_cooking_time"):
-                query = query.filter(Recipe.cooking_time <= search_params["max_cooking_time"])
+            conflicted = [name for name in missing if name not in ingredient_ids]
+            if conflicted:
+                ingredient_ids.update(select_ids(conflicted))
         
-        return query.scalar() or 0
+        return ingredient_ids
+    
+    @staticmethod
+    def _write_recipe_ingredients(db: Session, recipe_id: Any, ingredients: List[Any]) -> None:
+        """
+        写入食谱-食材关联，食材批量upsert后用一条多行INSERT写入关联记录
+        
+        Args:
+            db: 数据库会话
+            recipe_id: 食谱ID
+            ingredients: 食材数据列表
+        """
+        # 只处理包含name字段的完整食材对象
+        valid_ingredients = [
+            ingredient_data for ingredient_data in ingredients
+            if isinstance(ingredient_data, dict) and ingredient_data.get("name")
+        ]
+        if not valid_ingredients:
+            return
+        
+        ingredient_ids = RecipeService.upsert_ingredients(db, valid_ingredients)
+        rows = []
+        for ingredient_data in valid_ingredients:
+            ingredient_id = ingredient_ids.get(normalize_ingredient_name(ingredient_data["name"]))
+            if ingredient_id is None:
+                continue
+            rows.append({
+                "recipe_id": recipe_id,
+                "ingredient_id": ingredient_id,
+                "quantity": ingredient_data.get("quantity", 1),
+                "unit": ingredient_data.get("unit")
+            })
+        
+        if rows:
+            db.execute(insert(RecipeIngredient).values(rows))
     
     @staticmethod
     def update_recipe(db: Session, recipe_id: Any, recipe_data: Dict[str, Any]) -> Optional[Recipe]:
@@ -374,29 +718,13 @@ class RecipeService:
             ).delete()
             
             # 添加新食材关联
-            for ingredient_data in ingredients:
-                ingredient = db.query(Ingredient).filter(
-                    Ingredient.name == ingredient_data["name"]
-                ).first()
-                
-                if not ingredient:
-                    ingredient = Ingredient(
-                        name=ingredient_data["name"],
-                        unit=ingredient_data.get("unit")
-                    )
-                    db.add(ingredient)
-                    db.flush()
-                
-                recipe_ingredient = RecipeIngredient(
-                    recipe_id=recipe.recipe_id,
-                    ingredient_id=ingredient.ingredient_id,
-                    quantity=ingredient_data["quantity"],
-                    unit=ingredient_data.get("unit")
-                )
-                db.add(recipe_ingredient)
+            RecipeService._write_recipe_ingredients(db, recipe.recipe_id, ingredients)
         
         db.commit()
         db.refresh(recipe)
+        recipe_response_cache.invalidate(recipe_id)
+        if ingredients is not None:
+            cookable_recipe_finder.refresh_recipe(db, recipe.recipe_id)
         return recipe
     
     @staticmethod
@@ -417,6 +745,8 @@ class RecipeService:
         
         db.delete(recipe)
         db.commit()
+        recipe_response_cache.invalidate(recipe_id)
+        cookable_recipe_finder.remove_recipe(recipe.recipe_id)
         return True
     
 
@@ -436,18 +766,23 @@ class RecipeService:
         Returns:
             创建或更新的评分记录
         """
-        # 查找现有评分
+        # 查找现有评分并加锁，保证并发修改评分时聚合增量正确
         rating = db.query(Rating).filter(
             Rating.user_id == user_id,
             Rating.recipe_id == recipe_id
-        ).first()
+        ).with_for_update().first()
         
+        previous_score = rating.score if rating else None
         if rating:
-            # 更新现有评分
+            # 更新现有评分，聚合只累加新旧分数之差
+            count_delta = 0
+            sum_delta = score - rating.score
             rating.score = score
             rating.comment = comment
         else:
             # 创建新评分
+            count_delta = 1
+            sum_delta = score
             rating = Rating(
                 user_id=user_id,
                 recipe_id=recipe_id,
@@ -456,8 +791,23 @@ class RecipeService:
             )
             db.add(rating)
         
+        # 增量维护食谱评分聚合（不修改updated_at）
+        if count_delta or sum_delta:
+            db.execute(
+                update(Recipe)
+                .where(Recipe.recipe_id == recipe_id)
+                .values(
+                    rating_count=Recipe.rating_count + count_delta,
+                    rating_sum=Recipe.rating_sum + sum_delta,
+                    updated_at=Recipe.updated_at
+                )
+                .execution_options(synchronize_session=False)
+            )
+        
         db.commit()
         db.refresh(rating)
+        recipe_response_cache.invalidate(recipe_id)
+        recipe_recommender.record_rating(user_id, recipe_id, score, previous_score)
         return rating
     
 
@@ -494,12 +844,43 @@ class RecipeService:
         Returns:
             平均评分，如果没有评分则返回None
         """
-        result = db.query(func.avg(Rating.score)).filter(
-            Rating.recipe_id == recipe_id
+        result = db.query(Recipe.rating_avg).filter(
+            Recipe.recipe_id == recipe_id
         ).scalar()
         
         return float(result) if result else None
     
+    @staticmethod
+    def reconcile_rating_stats(db: Session) -> int:
+        """
+        根据ratings表重建食谱评分聚合，修正增量维护中可能出现的偏差
+        
+        Args:
+            db: 数据库会话
+        
+        Returns:
+            被修正的食谱数量
+        """
+        result = db.execute(text("""
+            UPDATE app_schema.recipes r
+            SET rating_count = s.rating_count, rating_sum = s.rating_sum
+            FROM (
+                SELECT r2.recipe_id,
+                       count(rt.rating_id) AS rating_count,
+                       coalesce(sum(rt.score), 0) AS rating_sum
+                FROM app_schema.recipes r2
+                LEFT JOIN app_schema.ratings rt ON rt.recipe_id = r2.recipe_id
+                GROUP BY r2.recipe_id
+            ) s
+            WHERE r.recipe_id = s.recipe_id
+              AND (r.rating_count <> s.rating_count OR r.rating_sum <> s.rating_sum)
+        """))
+        db.commit()
+        
+        if result.rowcount:
+            logger.warning(f"评分聚合对账修正了{result.rowcount}个食谱")
+        return result.rowcount
+    
     @staticmethod
     def add_favorite(db: Session, user_id: Any, recipe_id: Any) -> Any:
         """
@@ -538,6 +919,7 @@ class RecipeService:
             db.add(new_favorite)
             db.commit()
             db.refresh(new_favorite)
+            recipe_recommender.record_favorite(user_id, recipe_id, added=True)
             
             logger.info(f"用户 {user_id} 成功收藏食谱 {recipe_id}")
             return new_favorite
@@ -578,6 +960,7 @@ class RecipeService:
             # 删除收藏记录
             db.delete(favorite)
             db.commit()
+            recipe_recommender.record_favorite(user_id, recipe_id, added=False)
             
             logger.info(f"用户 {user_id} 成功取消收藏食谱 {recipe_id}")
             return True
@@ -600,11 +983,6 @@ class RecipeService:
         Returns:
             收藏列表
         """
-        from app.models.favorite import Favorite
-        from uuid import UUID
-        import logging
-        logger = logging.getLogger(__name__)
-        
         try:
             # 获取用户收藏列表，包含食谱信息
             favorites = db.query(Favorite).options(
@@ -621,6 +999,122 @@ class RecipeService:
             logger.error(f"获取用户收藏列表失败: {str(e)}")
             return []
     
+    @staticmethod
+    def build_user_favorites_query(
+        db: Session,
+        user_id: Any,
+        search: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        tags: Optional[List[str]] = None
+    ) -> Query:
+        """
+        构建用户收藏列表查询（Favorite -> Recipe -> User）
+        
+        所有筛选条件都在数据库中执行，查询结果的每一行包含
+        食谱对象、作者用户名以及收藏时间。
+        
+        Args:
+            db: 数据库会话
+            user_id: 用户ID
+            search: 搜索关键词（匹配标题和描述，不区分大小写）
+            difficulty: 难度筛选
+            tags: 标签筛选（需同时包含所有标签）
+        
+        Returns:
+            未排序、未分页的查询对象
+        """
+        query = db.query(
+            Recipe,
+            User.username.label("author_name"),
+            Favorite.created_at.label("favorited_at")
+        ).join(
+            Recipe, Favorite.recipe_id == Recipe.recipe_id
+        ).outerjoin(
+            User, Recipe.author_id == User.user_id
+        ).filter(
+            Favorite.user_id == UUID(str(user_id))
+        )
+        
+        # 关键词搜索
+        if search:
+            search_text = f"%{search}%"
+            query = query.filter(
+                or_(
+                    Recipe.title.ilike(search_text),
+                    Recipe.description.ilike(search_text)
+                )
+            )
+        
+        # 按难度筛选
+        if difficulty:
+            query = query.filter(Recipe.difficulty == difficulty)
+        
+        # 按标签筛选，一次JSONB包含判断即可要求同时包含所有标签
+        if tags:
+            query = query.filter(recipe_tags_filter(tags))
+        
+        return query
+    
+    @staticmethod
+    def get_user_favorites_page(
+        db: Session,
+        user_id: Any,
+        skip: int = 0,
+        limit: int = 100,
+        search: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc"
+    ) -> Tuple[List[Any], int]:
+        """
+        获取用户收藏列表的一页数据及筛选后的总数
+        
+        筛选、排序和分页均在数据库中完成，内存占用与收藏总数无关。
+        
+        Args:
+            db: 数据库会话
+            user_id: 用户ID
+            skip: 跳过的记录数
+            limit: 返回的记录数
+            search: 搜索关键词
+            difficulty: 难度筛选
+            tags: 标签筛选
+            sort_by: 排序字段（created_at/cooking_time/difficulty）
+            sort_order: 排序方向（asc/desc）
+        
+        Returns:
+            (当前页的 (Recipe, author_name, favorited_at) 行列表, 筛选后的总数)
+        
+        Raises:
+            ValueError: 排序字段不在FAVORITE_SORT_FIELDS中
+        """
+        if sort_by not in FAVORITE_SORT_FIELDS:
+            raise ValueError(f"不支持的排序字段: {sort_by}")
+        
+        query = RecipeService.build_user_favorites_query(
+            db, user_id, search=search, difficulty=difficulty, tags=tags
+        )
+        
+        total = query.order_by(None).count()
+        
+        # 排序字段，难度使用CASE映射为数值
+        if sort_by == "cooking_time":
+            sort_column = Recipe.cooking_time
+        elif sort_by == "difficulty":
+            sort_column = case(DIFFICULTY_ORDER, value=Recipe.difficulty, else_=0)
+        else:
+            sort_column = Recipe.created_at
+        
+        order_by = [sort_column.desc() if sort_order == "desc" else sort_column.asc()]
+        # 排序值相同时按收藏时间倒序，保证分页稳定
+        order_by.append(Favorite.created_at.desc())
+        order_by.append(Favorite.favorite_id)
+        
+        rows = query.order_by(*order_by).offset(skip).limit(limit).all()
+        logger.info(f"成功获取用户 {user_id} 的收藏列表，本页 {len(rows)} 条，共 {total} 条记录")
+        return rows, total
+    
     @staticmethod
     def is_favorite(db: Session, user_id: Any, recipe_id: Any) -> bool:
         """
@@ -648,4 +1142,244 @@ class RecipeService:
             return favorite is not None
         except Exception as e:
             logger.error(f"检查收藏状态失败: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+    
+    @staticmethod
+    async def get_recipe_by_id_async(db: AsyncSession, recipe_id: Any, load_relationships: bool = True) -> Optional[Recipe]:
+        """
+        根据ID获取食谱（异步版本）
+        
+        Args:
+            db: 异步数据库会话
+            recipe_id: 食谱ID
+            load_relationships: 是否加载关联数据
+        
+        Returns:
+            食谱对象，如果不存在则返回None
+        """
+        try:
+            recipe_id_uuid = recipe_id if isinstance(recipe_id, UUID) else UUID(str(recipe_id))
+        except ValueError:
+            # 如果不是有效UUID格式，直接返回None
+            return None
+        
+        stmt = select(Recipe).filter(Recipe.recipe_id == recipe_id_uuid)
+        if load_relationships:
+            stmt = stmt.options(
+                joinedload(Recipe.author),
+                joinedload(Recipe.nutrition_info)
+            )
+        
+        result = await db.execute(stmt)
+        return result.scalars().first()
+    
+    @staticmethod
+    async def get_recipe_version_async(db: AsyncSession, recipe_id: Any) -> Optional[Tuple[Any, ...]]:
+        """
+        获取食谱详情响应的当前版本（异步版本），用于校验详情缓存
+        
+        版本由食谱的updated_at、营养信息行的xmin（PostgreSQL行版本，任何写入都会改变）
+        和作者名称组成，覆盖RecipeResponse中来自其他表的内容。只按主键读取这几列，
+        不加载ORM对象。
+        
+        Args:
+            db: 异步数据库会话
+            recipe_id: 食谱ID
+        
+        Returns:
+            版本元组，食谱不存在时返回None
+        """
+        try:
+            recipe_id_uuid = recipe_id if isinstance(recipe_id, UUID) else UUID(str(recipe_id))
+        except ValueError:
+            return None
+        
+        stmt = (
+            select(
+                Recipe.updated_at,
+                literal_column("nutrition_info.xmin::text"),
+                User.username
+            )
+            .select_from(Recipe)
+            .outerjoin(NutritionInfo, NutritionInfo.recipe_id == Recipe.recipe_id)
+            .outerjoin(User, User.user_id == Recipe.author_id)
+            .where(Recipe.recipe_id == recipe_id_uuid)
+        )
+        row = (await db.execute(stmt)).first()
+        return tuple(row) if row is not None else None
+    
+    @staticmethod
+    async def get_recipes_by_ids_async(db: AsyncSession, recipe_ids: List[Any]) -> List[Recipe]:
+        """
+        按ID列表批量获取食谱（异步版本），结果顺序与recipe_ids一致
+        
+        Args:
+            db: 异步数据库会话
+            recipe_ids: 食谱ID列表
+        
+        Returns:
+            食谱列表，不存在的ID会被跳过
+        """
+        if not recipe_ids:
+            return []
+        
+        ids = [recipe_id if isinstance(recipe_id, UUID) else UUID(str(recipe_id)) for recipe_id in recipe_ids]
+        result = await db.execute(
+            select(Recipe)
+            .options(joinedload(Recipe.author))
+            .filter(Recipe.recipe_id.in_(ids))
+        )
+        recipes = {recipe.recipe_id: recipe for recipe in result.scalars().all()}
+        return [recipes[recipe_id] for recipe_id in ids if recipe_id in recipes]
+    
+    @staticmethod
+    async def get_recipe_list_page_async(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 20,
+        author_id: Optional[Any] = None,
+        search_params: Optional[Dict[str, Any]] = None,
+        cursor: Optional[Tuple[datetime, UUID]] = None,
+        count_mode: str = "exact",
+        sort: str = "newest"
+    ) -> Tuple[List[Any], Optional[int]]:
+        """
+        获取一页食谱列表行及总数（异步版本），只查询RECIPE_LIST_COLUMNS中的列，
+        不构建Recipe对象
+        
+        count_mode为exact且使用偏移分页时，总数通过窗口函数count(*) OVER()
+        与列表在同一条SQL中返回；estimate使用统计信息估算；none不计算总数。
+        
+        Args:
+            db: 异步数据库会话
+            skip: 跳过的记录数
+            limit: 返回的记录数
+            author_id: 作者ID（可选）
+            search_params: 搜索参数（可选）
+            cursor: 已解码的分页游标（可选）
+            count_mode: 总数计算方式（exact/estimate/none）
+            sort: 排序方式（newest/relevance）
+        
+        Returns:
+            (列顺序与RECIPE_LIST_FIELDS一致的行列表, 总数)，count_mode为none时总数为None
+        """
+        if count_mode not in COUNT_MODES:
+            raise ValueError(f"不支持的计数方式: {count_mode}")
+        
+        # 游标分页时窗口函数只能统计游标之后的行，因此总数单独计算
+        use_window_count = count_mode == "exact" and cursor is None
+        
+        if use_window_count:
+            stmt = recipe_list_select(func.count().over().label("total_count"))
+        else:
+            stmt = recipe_list_select()
+        stmt = RecipeService.apply_recipe_filters(stmt, author_id, search_params)
+        stmt = RecipeService._paginate_recipes_query(stmt, skip, limit, cursor, sort, search_params)
+        
+        result = await db.execute(stmt)
+        rows = result.all()
+        
+        if use_window_count:
+            if rows:
+                total = rows[0][-1]
+            elif skip > 0:
+                # 页码超出范围时没有行可以携带总数，回退到计数查询
+                total = await RecipeService.get_recipes_count_async(db, author_id=author_id, search_params=search_params)
+            else:
+                total = 0
+            return rows, total
+        
+        if count_mode == "exact":
+            total = await RecipeService.get_recipes_count_async(db, author_id=author_id, search_params=search_params)
+        elif count_mode == "estimate":
+            total = await db.run_sync(
+                lambda sync_db: RecipeService.estimate_recipes_count(
+                    sync_db, author_id=author_id, search_params=search_params
+                )
+            )
+        else:
+            total = None
+        return rows, total
+    
+    @staticmethod
+    async def get_recipes_count_async(
+        db: AsyncSession,
+        author_id: Optional[Any] = None,
+        search_params: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        获取食谱总数（异步版本）
+        
+        Args:
+            db: 异步数据库会话
+            author_id: 作者ID（可选）
+            search_params: 搜索参数（可选）
+        
+        Returns:
+            食谱总数
+        """
+        stmt = RecipeService.apply_recipe_filters(
+            select(func.count(Recipe.recipe_id)), author_id, search_params
+        )
+        result = await db.execute(stmt)
+        return result.scalar() or 0
+    
+    @staticmethod
+    async def get_tag_facets_async(
+        db: AsyncSession,
+        author_id: Optional[Any] = None,
+        search_params: Optional[Dict[str, Any]] = None,
+        limit: int = 50
+    ) -> List[Tuple[str, int]]:
+        """
+        统计当前筛选条件下各标签的食谱数量（异步版本）
+        
+        Args:
+            db: 异步数据库会话
+            author_id: 作者ID（可选）
+            search_params: 搜索参数（可选），与食谱列表使用相同的筛选条件
+            limit: 返回的标签数量上限
+        
+        Returns:
+            按数量降序排列的 (标签, 食谱数量) 列表
+        """
+        tag_rows = select(
+            func.jsonb_array_elements_text(Recipe.tags).label("tag")
+        ).filter(
+            func.jsonb_typeof(Recipe.tags) == "array"
+        )
+        tag_rows = RecipeService.apply_recipe_filters(tag_rows, author_id, search_params).subquery()
+        
+        recipe_count = func.count().label("count")
+        result = await db.execute(
+            select(tag_rows.c.tag, recipe_count).group_by(
+                tag_rows.c.tag
+            ).order_by(
+                recipe_count.desc(), tag_rows.c.tag
+            ).limit(limit)
+        )
+        
+        return [(row.tag, row.count) for row in result.all()]
+    
+    @staticmethod
+    async def get_recipe_ratings_async(db: AsyncSession, recipe_id: Any, skip: int = 0, limit: int = 20) -> List[Rating]:
+        """
+        获取食谱评分列表（异步版本）
+        
+        Args:
+            db: 异步数据库会话
+            recipe_id: 食谱ID
+            skip: 跳过的记录数
+            limit: 返回的记录数
+        
+        Returns:
+            评分列表
+        """
+        result = await db.execute(
+            select(Rating).options(
+                joinedload(Rating.user)
+            ).filter(
+                Rating.recipe_id == UUID(str(recipe_id))
+            ).order_by(Rating.created_at.desc()).offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
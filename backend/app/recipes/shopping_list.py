@@ -0,0 +1,183 @@
+"""
+购物清单
+
+把多个食谱（或一个饮食计划中的全部食谱）的食材合并为一份购物清单:
+  - 一次查询读取所有食谱的recipe_ingredients及食材名称、类别
+  - 质量单位统一换算为克、体积单位统一换算为毫升（见UNIT_CONVERSIONS），
+    计数单位（个、根等）按原单位累加，适量/少许等不累加数量
+  - 每个食谱的用量按份数缩放后在一次遍历中累加
+结果按Ingredient.category分组，以NDJSON流的形式逐组输出。
+"""
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+import json
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.ingredient import Ingredient
+from app.models.recipe import Recipe
+from app.models.recipe_ingredient import RecipeIngredient
+from app.recipes.nutrition import normalize_unit, parse_quantity
+
+# 单位换算表: 规范化单位 -> (基准单位, 换算系数)
+UNIT_CONVERSIONS = {
+    "g": ("g", 1.0), "克": ("g", 1.0),
+    "kg": ("g", 1000.0), "千克": ("g", 1000.0), "公斤": ("g", 1000.0),
+    "斤": ("g", 500.0), "两": ("g", 50.0),
+    "mg": ("g", 0.001), "毫克": ("g", 0.001),
+    "oz": ("g", 28.35), "盎司": ("g", 28.35), "lb": ("g", 453.6), "磅": ("g", 453.6),
+    "ml": ("ml", 1.0), "毫升": ("ml", 1.0), "l": ("ml", 1000.0), "升": ("ml", 1000.0),
+    "勺": ("ml", 15.0), "汤匙": ("ml", 15.0), "大勺": ("ml", 15.0), "tbsp": ("ml", 15.0),
+    "小勺": ("ml", 5.0), "茶匙": ("ml", 5.0), "小匙": ("ml", 5.0), "tsp": ("ml", 5.0),
+    "杯": ("ml", 240.0), "cup": ("ml", 240.0),
+}
+
+# 不累加数量的模糊单位
+VAGUE_UNITS = {"适量", "少许", "少量", "若干"}
+
+# 基准单位超过1000时的显示单位
+DISPLAY_UNITS = {"g": "kg", "ml": "l"}
+
+# 没有类别的食材归入该分组
+DEFAULT_CATEGORY = "其他"
+
+
+def convert_unit(quantity: Any, unit: Any) -> Tuple[Optional[float], str]:
+    """
+    将数量换算为基准单位
+
+    Args:
+        quantity: 原始数量
+        unit: 原始单位
+
+    Returns:
+        (基准单位下的数量, 基准单位)；模糊单位的数量为None
+    """
+    unit = normalize_unit(unit)
+    if unit in VAGUE_UNITS:
+        return None, unit
+    base_unit, factor = UNIT_CONVERSIONS.get(unit, (unit, 1.0))
+    return parse_quantity(quantity) * factor, base_unit
+
+
+def format_amount(quantity: Optional[float], unit: str) -> Dict[str, Any]:
+    """
+    转换为显示用的数量和单位（1000克以上显示为千克，1000毫升以上显示为升）
+    """
+    if quantity is not None and unit in DISPLAY_UNITS and quantity >= 1000:
+        quantity, unit = quantity / 1000, DISPLAY_UNITS[unit]
+    return {"quantity": None if quantity is None else round(quantity, 2), "unit": unit}
+
+
+def parse_recipe_ids(recipe_ids: Iterable[Any]) -> Tuple[Counter, List[str]]:
+    """
+    统计每个食谱出现的次数，无法解析为UUID的ID单独返回
+
+    Returns:
+        (食谱UUID到次数的Counter, 无效ID列表)
+    """
+    counts: Counter = Counter()
+    invalid = []
+    for recipe_id in recipe_ids:
+        try:
+            counts[recipe_id if isinstance(recipe_id, UUID) else UUID(str(recipe_id))] += 1
+        except ValueError:
+            invalid.append(str(recipe_id))
+    return counts, invalid
+
+
+def plan_recipe_ids(meal_plan: Any) -> List[str]:
+    """
+    提取饮食计划中每餐的食谱ID（同一食谱出现几次就返回几次）
+    """
+    if not isinstance(meal_plan, dict):
+        return []
+    return [
+        meal["recipe_id"]
+        for day in meal_plan.get("days") or []
+        for meal in (day.get("meals") or [] if isinstance(day, dict) else [])
+        if isinstance(meal, dict) and meal.get("recipe_id")
+    ]
+
+
+def build_shopping_list(
+    db: Session,
+    recipe_counts: Counter,
+    servings: Optional[int] = None,
+    plan_counts: Optional[Counter] = None
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    合并食谱的食材
+
+    Args:
+        db: 数据库会话
+        recipe_counts: 直接指定的食谱UUID到次数的Counter
+        servings: 每个食谱的目标份数，为空时直接指定的食谱按原份量、饮食计划每餐按1份
+        plan_counts: 饮食计划中食谱UUID到餐次的Counter
+
+    Returns:
+        (按类别分组的清单, 不存在的食谱ID列表)
+    """
+    plan_counts = plan_counts or Counter()
+    recipe_ids = list(recipe_counts.keys() | plan_counts.keys())
+    recipe_servings = dict(db.execute(
+        select(Recipe.recipe_id, Recipe.servings).where(Recipe.recipe_id.in_(recipe_ids))
+    ).all())
+    missing = [str(recipe_id) for recipe_id in recipe_ids if recipe_id not in recipe_servings]
+
+    # 每个食谱的缩放系数：直接指定的食谱按目标份数（默认原份量），饮食计划按目标份数（默认每餐1份）
+    factors = {}
+    for recipe_id, own_servings in recipe_servings.items():
+        own_servings = max(own_servings or 1, 1)
+        factors[recipe_id] = (
+            recipe_counts[recipe_id] * (servings / own_servings if servings else 1.0)
+            + plan_counts[recipe_id] * (servings or 1) / own_servings
+        )
+
+    rows = db.execute(
+        select(
+            RecipeIngredient.recipe_id, Ingredient.name, Ingredient.category,
+            RecipeIngredient.quantity, RecipeIngredient.unit
+        )
+        .join(Ingredient, Ingredient.ingredient_id == RecipeIngredient.ingredient_id)
+        .where(RecipeIngredient.recipe_id.in_(list(factors)))
+    ).all() if factors else []
+
+    # 类别 -> 食材名称 -> {"amounts": 基准单位 -> 数量, "recipes": 食谱集合}
+    groups: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for recipe_id, name, category, quantity, unit in rows:
+        amount, base_unit = convert_unit(quantity, unit)
+        item = groups.setdefault(category or DEFAULT_CATEGORY, {}).setdefault(
+            name, {"amounts": {}, "recipes": set()}
+        )
+        if amount is None:
+            item["amounts"].setdefault(base_unit, None)
+        else:
+            item["amounts"][base_unit] = (item["amounts"].get(base_unit) or 0.0) + amount * factors[recipe_id]
+        item["recipes"].add(recipe_id)
+
+    categories = sorted(groups, key=lambda category: (category == DEFAULT_CATEGORY, category))
+    return [
+        {
+            "category": category,
+            "items": [
+                {
+                    "name": name,
+                    "amounts": [format_amount(quantity, unit) for unit, quantity in item["amounts"].items()],
+                    "recipe_count": len(item["recipes"])
+                }
+                for name, item in sorted(groups[category].items())
+            ]
+        }
+        for category in categories
+    ], missing
+
+
+def iter_shopping_list_ndjson(groups: List[Dict[str, Any]]) -> Iterator[bytes]:
+    """
+    逐组输出NDJSON，每行一个类别
+    """
+    for group in groups:
+        yield (json.dumps(group, ensure_ascii=False) + "\n").encode("utf-8")
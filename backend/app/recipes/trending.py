@@ -0,0 +1,299 @@
+"""
+食谱热度/趋势排行
+
+趋势分数是收藏和评分事件按时间指数衰减后的加权和:
+
+    score = Σ weight(event) * 2 ^ (-(now - event.created_at) / half_life)
+
+每个时间窗口(24h/7d/30d)有各自的半衰期。因为所有分数按同一比例衰减，
+两次刷新之间排名顺序不变，所以每个窗口只需保存以reference_time为基准的
+分数和排好序的前N名，读取时乘以统一的衰减系数即可，读取开销为O(k)。
+
+后台任务每TRENDING_REFRESH_SECONDS秒增量刷新一次：把已有分数衰减到当前时间，
+再叠加水位线之后的新事件（按食谱在SQL中聚合）。取消收藏、修改评分和滑出窗口的
+事件无法增量感知，由每TRENDING_FULL_REFRESH_SECONDS秒一次的全量重建修正。
+"""
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import logging
+import math
+import threading
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 收藏事件权重
+FAVORITE_WEIGHT = 3.0
+
+# 评分事件每分的权重（5分评分权重为2.0）
+RATING_WEIGHT_PER_POINT = 0.4
+
+# 增量刷新后低于该值的分数被丢弃，限制内存占用
+MIN_TRENDING_SCORE = 1e-3
+
+TRENDING_EVENTS_SQL = text("""
+    SELECT recipe_id, sum(weight * exp(-:decay_rate * extract(epoch FROM (:now - created_at)))) AS score
+    FROM (
+        SELECT recipe_id, created_at, CAST(:favorite_weight AS float8) AS weight
+        FROM app_schema.favorites
+        WHERE created_at > :since AND created_at <= :now
+        UNION ALL
+        SELECT recipe_id, created_at, score * CAST(:rating_weight AS float8) AS weight
+        FROM app_schema.ratings
+        WHERE created_at > :since AND created_at <= :now
+    ) events
+    GROUP BY recipe_id
+""")
+
+
+class TrendingWindow:
+    """
+    趋势时间窗口定义
+    """
+    __slots__ = ("name", "span", "half_life", "decay_rate")
+
+    def __init__(self, name: str, span: timedelta, half_life: timedelta):
+        self.name = name
+        self.span = span
+        self.half_life = half_life
+        # 每秒的衰减率，exp(-decay_rate * t) == 2 ^ (-t / half_life)
+        self.decay_rate = math.log(2) / half_life.total_seconds()
+
+
+# 支持的时间窗口
+TRENDING_WINDOWS: Dict[str, TrendingWindow] = {
+    window.name: window for window in (
+        TrendingWindow("24h", timedelta(hours=24), timedelta(hours=6)),
+        TrendingWindow("7d", timedelta(days=7), timedelta(days=1, hours=12)),
+        TrendingWindow("30d", timedelta(days=30), timedelta(days=7)),
+    )
+}
+
+
+class TrendingIndex:
+    """
+    单个时间窗口的趋势分数，分数以reference_time为基准保存
+    """
+    def __init__(self, window: TrendingWindow, max_items: int = 1000):
+        self.window = window
+        self.max_items = max_items
+        self.scores: Dict[str, float] = {}
+        self.ranked: List[Tuple[str, float]] = []
+        self.reference_time: Optional[datetime] = None
+        self.watermark: Optional[datetime] = None
+        self.full_refreshed_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def _decay_factor(self, now: datetime) -> float:
+        if self.reference_time is None:
+            return 1.0
+        elapsed = (now - self.reference_time).total_seconds()
+        return math.exp(-self.window.decay_rate * max(elapsed, 0.0))
+
+    def rebuild(self, contributions: Dict[str, float], now: datetime) -> None:
+        """
+        用窗口内全部事件的分数替换现有分数
+
+        Args:
+            contributions: 食谱ID到衰减到now时刻的分数的映射
+            now: 计算分数的基准时间
+        """
+        with self._lock:
+            self.scores = dict(contributions)
+            self.reference_time = now
+            self.watermark = now
+            self.full_refreshed_at = now
+            self._rerank()
+
+    def apply(self, contributions: Dict[str, float], now: datetime) -> None:
+        """
+        将已有分数衰减到now并叠加新事件的分数
+
+        Args:
+            contributions: 水位线之后的新事件按食谱聚合的分数（已衰减到now）
+            now: 新的基准时间
+        """
+        with self._lock:
+            factor = self._decay_factor(now)
+            scores = {}
+            for recipe_id, score in self.scores.items():
+                score *= factor
+                if score >= MIN_TRENDING_SCORE:
+                    scores[recipe_id] = score
+            for recipe_id, score in contributions.items():
+                scores[recipe_id] = scores.get(recipe_id, 0.0) + score
+            self.scores = scores
+            self.reference_time = now
+            self.watermark = now
+            self._rerank()
+
+    def _rerank(self) -> None:
+        # 只保留前max_items名，读取时直接切片
+        self.ranked = heapq.nlargest(self.max_items, self.scores.items(), key=itemgetter(1))
+
+    def top(self, limit: int, skip: int = 0, now: Optional[datetime] = None) -> List[Tuple[str, float]]:
+        """
+        获取排名靠前的食谱
+
+        Args:
+            limit: 返回数量
+            skip: 跳过的数量
+            now: 分数衰减到的时间，默认为当前时间
+
+        Returns:
+            (食谱ID, 趋势分数)列表，按分数降序
+        """
+        ranked = self.ranked
+        factor = self._decay_factor(now or datetime.now(timezone.utc))
+        return [(recipe_id, score * factor) for recipe_id, score in ranked[skip:skip + limit]]
+
+
+class TrendingEngine:
+    """
+    趋势排行引擎，维护所有时间窗口的TrendingIndex并定时刷新
+    """
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        refresh_interval: int = 60,
+        full_refresh_interval: int = 3600,
+        max_items: int = 1000
+    ):
+        self.session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self.full_refresh_interval = full_refresh_interval
+        self.indexes: Dict[str, TrendingIndex] = {
+            name: TrendingIndex(window, max_items=max_items)
+            for name, window in TRENDING_WINDOWS.items()
+        }
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._refresh_lock = threading.Lock()
+
+    @staticmethod
+    def load_contributions(db: Session, window: TrendingWindow, since: datetime, now: datetime) -> Dict[str, float]:
+        """
+        在数据库中按食谱聚合(since, now]之间事件的衰减分数
+
+        Args:
+            db: 数据库会话
+            window: 时间窗口
+            since: 起始时间（不含）
+            now: 结束时间，也是分数衰减的基准时间
+
+        Returns:
+            食谱ID到分数的映射
+        """
+        rows = db.execute(TRENDING_EVENTS_SQL, {
+            "decay_rate": window.decay_rate,
+            "now": now,
+            "since": since,
+            "favorite_weight": FAVORITE_WEIGHT,
+            "rating_weight": RATING_WEIGHT_PER_POINT
+        }).all()
+        return {str(recipe_id): float(score) for recipe_id, score in rows}
+
+    def refresh(self, db: Session, full: bool = False) -> None:
+        """
+        刷新所有时间窗口
+
+        Args:
+            db: 数据库会话
+            full: 是否强制全量重建
+        """
+        with self._refresh_lock:
+            now = datetime.now(timezone.utc)
+            for index in self.indexes.values():
+                needs_full = (
+                    full
+                    or index.watermark is None
+                    or (now - index.full_refreshed_at).total_seconds() >= self.full_refresh_interval
+                )
+                if needs_full:
+                    index.rebuild(self.load_contributions(db, index.window, now - index.window.span, now), now)
+                else:
+                    index.apply(self.load_contributions(db, index.window, index.watermark, now), now)
+            logger.debug(
+                "趋势排行已刷新: " + ", ".join(
+                    f"{name}={len(index.scores)}" for name, index in self.indexes.items()
+                )
+            )
+
+    def _refresh_with_new_session(self, full: bool = False) -> None:
+        factory = self.session_factory
+        if factory is None:
+            from app.core.database import SessionLocal
+            factory = SessionLocal
+        db = factory()
+        try:
+            self.refresh(db, full=full)
+        finally:
+            db.close()
+
+    async def ensure_ready(self) -> None:
+        """
+        确保至少完成过一次全量计算（后台任务未启动时在此同步计算）
+        """
+        if self._ready.is_set():
+            return
+        await run_in_threadpool(self._refresh_with_new_session, True)
+        self._ready.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await run_in_threadpool(self._refresh_with_new_session, not self._ready.is_set())
+                self._ready.set()
+            except Exception as e:
+                logger.error(f"刷新趋势排行失败: {str(e)}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        """
+        启动后台定时刷新任务
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        停止后台定时刷新任务
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def top(self, window: str, limit: int, skip: int = 0) -> List[Tuple[str, float]]:
+        """
+        获取指定窗口排名靠前的食谱
+
+        Args:
+            window: 时间窗口名称
+            limit: 返回数量
+            skip: 跳过的数量
+
+        Returns:
+            (食谱ID, 趋势分数)列表
+        """
+        return self.indexes[window].top(limit, skip)
+
+
+# 全局趋势排行引擎实例
+trending_engine = TrendingEngine(
+    refresh_interval=settings.TRENDING_REFRESH_SECONDS,
+    full_refresh_interval=settings.TRENDING_FULL_REFRESH_SECONDS,
+    max_items=settings.TRENDING_MAX_ITEMS
+)
@@ -37,7 +37,7 @@ async def get_user_favorites(
     limit: int = Query(100, ge=1, le=1000, description="每页记录数"),
     skip: int = Query(None, ge=0, description="跳过的记录数"),
     search: str = Query(None, description="搜索关键词"),
-    sort_by: str = Query("created_at", description="排序字段"),
+    sort_by: str = Query("created_at", description="排序字段(created_at/cooking_time/difficulty)"),
     sort_order: str = Query("desc", description="排序方向"),
     difficulty: str = Query(None, description="难度筛选"),
     tags: List[str] = Query(None, description="标签筛选"),
@@ -50,84 +50,37 @@ async def get_user_favorites(
         if skip is None:
             skip = (page - 1) * limit
         
-        # 获取当前用户的收藏列表
-        favorites = recipe_service.get_user_favorites(db, current_user.user_id, skip=skip, limit=limit)
-        
-        # 应用过滤和排序
-        filtered_favorites = favorites
-        
-        # 搜索过滤
-        if search:
-            search_lower = search.lower()
-            filtered_favorites = [
-                fav for fav in filtered_favorites 
-                if hasattr(fav, 'recipe') and fav.recipe and (
-                    search_lower in fav.recipe.title.lower() or 
-                    search_lower in fav.recipe.description.lower()
-                )
-            ]
-        
-        # 难度过滤
-        if difficulty:
-            filtered_favorites = [
-                fav for fav in filtered_favorites 
-                if hasattr(fav, 'recipe') and fav.recipe and 
-                fav.recipe.difficulty == difficulty
-            ]
-        
-        # 标签过滤
-        if tags and len(tags) > 0:
-            filtered_favorites = [
-                fav for fav in filtered_favorites 
-                if hasattr(fav, 'recipe') and fav.recipe and 
-                all(tag in getattr(fav.recipe, 'tags', []) for tag in tags)
-            ]
-        
-        # 排序
-        def get_sort_key(fav):
-            if not hasattr(fav, 'recipe') or not fav.recipe:
-                return 0
-            
-            recipe = fav.recipe
-            if sort_by == 'cooking_time':
-                return recipe.cooking_time
-            elif sort_by == 'difficulty':
-                # 将难度转换为可排序的数值
-                difficulty_order = {'简单': 1, '中等': 2, '困难': 3, 'easy': 1, 'medium': 2, 'hard': 3}
-                return difficulty_order.get(recipe.difficulty, 0)
-            elif sort_by == 'created_at':
-                return recipe.created_at
-            return 0
-        
-        filtered_favorites.sort(
-            key=get_sort_key,
-            reverse=sort_order == 'desc'
+        # 筛选、排序和分页全部在数据库中完成
+        rows, total_favorites = recipe_service.get_user_favorites_page(
+            db,
+            current_user.user_id,
+            skip=skip,
+            limit=limit,
+            search=search,
+            difficulty=difficulty,
+            tags=tags,
+            sort_by=sort_by,
+            sort_order=sort_order
         )
         
-        # 应用分页
-        paginated_favorites = filtered_favorites[skip:skip+limit]
-        total_favorites = len(filtered_favorites)
-        
         # 转换数据结构，确保返回的数据与前端期望匹配
         # 特别是将Recipe对象转换为RecipeListItem格式
-        formatted_recipes = []
-        for fav in paginated_favorites:
-            # 确保recipe对象存在
-            if hasattr(fav, 'recipe') and fav.recipe:
-                recipe = fav.recipe
-                # 转换为前端期望的RecipeListItem格式
-                formatted_recipe = {
-                    "recipe_id": str(recipe.recipe_id),
-                    "title": recipe.title,
-                    "description": recipe.description,
-                    "cooking_time": recipe.cooking_time,
-                    "difficulty": recipe.difficulty,
-                    "author_name": recipe.author.username if hasattr(recipe, 'author') and recipe.author else "",
-                    "image_url": recipe.image_url,
-                    "created_at": recipe.created_at,
-                    "tags": getattr(recipe, 'tags', [])
-                }
-                formatted_recipes.append(formatted_recipe)
+        formatted_recipes = [
+            {
+                "recipe_id": str(recipe.recipe_id),
+                "title": recipe.title,
+                "description": recipe.description,
+                "cooking_time": recipe.cooking_time,
+                "difficulty": recipe.difficulty,
+                "author_name": author_name or "",
+                "image_url": recipe.image_url,
+                "created_at": recipe.created_at,
+                "tags": recipe.tags or [],
+                "average_rating": recipe.rating_avg,
+                "rating_count": recipe.rating_count
+            }
+            for recipe, author_name, _favorited_at in rows
+        ]
         
         # 返回与前端期望匹配的数据结构
         return {
@@ -136,6 +89,11 @@ async def get_user_favorites(
             "limit": limit,
             "total": total_favorites
         }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -2,6 +2,8 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.models.user import User
 from app.auth.password import get_password_hash
+from app.auth.user_cache import user_cache
+from app.recipes.recommender import recipe_recommender
 
 class UserService:
     """
@@ -103,6 +105,13 @@ class UserService:
         db.commit()
         db.refresh(user)
         
+        # 用户状态可能已变化（激活/停用、锁定等），使认证缓存失效
+        user_cache.invalidate(user.username)
+        
+        # 饮食偏好是推荐画像的一部分
+        if "diet_preferences" in kwargs:
+            recipe_recommender.invalidate_user(user.user_id)
+        
         return user
     
     @staticmethod
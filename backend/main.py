@@ -1,6 +1,5 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import uvicorn
 import logging
@@ -8,12 +7,21 @@ import traceback
 import time
 
 from app.core.config import settings
-from app.core.database import init_database, create_tables
+from app.core.database import init_database, create_tables, init_async_database, close_async_database
 from app.core.exceptions import APIException
+from app.core.responses import FastJSONResponse
+from app.auth.password import password_hasher
+from app.recipes.trending import trending_engine
+from app.recipes.recommender import recipe_recommender
+from app.recipes.ingredient_index import cookable_recipe_finder
+from app.diet_plans.planner import diet_planner
+from app.ai_service.ai_client import ai_client
+from app.ai_service.jobs import ai_job_queue
 from app.auth.routes import router as auth_router
 from app.users.routes import router as users_router
 from app.recipes.routes import router as recipes_router
 from app.ai_service.routes import router as ai_router
+from app.diet_plans.routes import router as diet_plans_router
 
 # 配置全局日志
 logging.basicConfig(
@@ -58,8 +66,23 @@ async def lifespan(app: FastAPI):
         # 创建数据库表
         create_tables()
         
+        # 初始化异步数据库引擎
+        init_async_database()
+        
         logger.info("数据库初始化完成")
         
+        # 创建AI客户端连接池
+        await ai_client.startup()
+        
+        # 启动AI生成任务worker
+        ai_job_queue.start()
+        
+        # 启动趋势排行定时刷新，以及推荐特征矩阵、食材倒排索引和饮食计划营养矩阵定时重建
+        trending_engine.start()
+        recipe_recommender.start()
+        cookable_recipe_finder.start()
+        diet_planner.start()
+        
         yield
         
     except Exception as e:
@@ -69,6 +92,14 @@ async def lifespan(app: FastAPI):
     finally:
         # 关闭时的清理操作
         logger.info("正在关闭个性化食谱管理系统API...")
+        await trending_engine.stop()
+        await recipe_recommender.stop()
+        await cookable_recipe_finder.stop()
+        await diet_planner.stop()
+        await ai_job_queue.stop()
+        await ai_client.shutdown()
+        await close_async_database()
+        password_hasher.shutdown()
 
 
 # 创建FastAPI应用实例
@@ -78,6 +109,8 @@ app = FastAPI(
     description="AI食谱推荐系统API",
     docs_url="/docs",
     redoc_url="/redoc",
+    # 默认使用orjson序列化响应，原生支持datetime和UUID
+    default_response_class=FastJSONResponse,
     lifespan=lifespan
 )
 
@@ -98,7 +131,7 @@ async def api_exception_handler(request: Request, exc: APIException):
     处理API自定义异常
     """
     logger.error(f"API异常 - {exc.error_type}: {exc.detail}, 路径: {request.url.path}")
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=exc.status_code,
         content={"error": {"type": exc.error_type, "message": exc.detail}}
     )
@@ -110,9 +143,10 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     处理HTTP异常
     """
     logger.error(f"HTTP异常 - 状态码: {exc.status_code}, 详情: {exc.detail}, 路径: {request.url.path}")
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=exc.status_code,
-        content={"error": {"type": "http_error", "message": exc.detail}}
+        content={"error": {"type": "http_error", "message": exc.detail}},
+        headers=getattr(exc, "headers", None)
     )
 
 
@@ -123,7 +157,7 @@ async def general_exception_handler(request: Request, exc: Exception):
     """
     logger.critical(f"未处理的异常 - {str(exc)}, 路径: {request.url.path}")
     logger.critical(f"错误堆栈: {traceback.format_exc()}")
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content={"error": {"type": "server_error", "message": "服务器内部错误"}}
     )
@@ -173,6 +207,7 @@ app.include_router(auth_router, prefix="/api")
 app.include_router(users_router, prefix="/api")
 app.include_router(recipes_router, prefix="/api")
 app.include_router(ai_router, prefix="/api")
+app.include_router(diet_plans_router, prefix="/api")
 
 # 根路径
 @app.get("/")
@@ -184,7 +219,11 @@ async def root():
 @app.get("/health")
 async def health_check():
     logger.info("健康检查请求")
-    return {"status": "healthy", "version": settings.VERSION}
+    return {
+        "status": "healthy",
+        "version": settings.VERSION,
+        "password_hashing": password_hasher.metrics()
+    }
 
 if __name__ == "__main__":
     try:
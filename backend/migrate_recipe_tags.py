@@ -0,0 +1,53 @@
+from sqlalchemy import text
+from app.core.database import engine
+
+
+def migrate_recipe_tags():
+    """
+    将recipes.tags转换为JSONB，并用GIN(jsonb_path_ops)索引替换原有的btree索引
+    """
+    try:
+        with engine.connect() as conn:
+            # 检查字段类型
+            data_type = conn.execute(text("""
+                SELECT data_type FROM information_schema.columns
+                WHERE table_schema = 'app_schema' AND table_name = 'recipes' AND column_name = 'tags'
+            """)).scalar()
+            print(f"tags字段当前类型: {data_type}")
+            
+            if data_type != "jsonb":
+                print("将tags字段转换为JSONB...")
+                conn.execute(text("""
+                    ALTER TABLE app_schema.recipes
+                    ALTER COLUMN tags TYPE JSONB USING tags::jsonb
+                """))
+                print("tags字段转换成功!")
+            
+            # 删除tags字段上无法用于包含查询的btree索引
+            old_indexes = conn.execute(text("""
+                SELECT indexname FROM pg_indexes
+                WHERE schemaname = 'app_schema' AND tablename = 'recipes'
+                AND indexdef LIKE '%(tags)%' AND indexdef NOT LIKE '%USING gin%'
+            """)).fetchall()
+            for row in old_indexes:
+                print(f"删除旧索引 {row[0]}...")
+                conn.execute(text(f'DROP INDEX IF EXISTS app_schema."{row[0]}"'))
+            
+            conn.commit()
+        
+        # CREATE INDEX CONCURRENTLY 不能在事务中执行，使用自动提交模式
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            print("创建GIN索引 ix_recipes_tags_gin...")
+            conn.execute(text("""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recipes_tags_gin
+                ON app_schema.recipes USING gin (tags jsonb_path_ops)
+            """))
+            print("GIN索引创建成功!")
+        
+        print("标签字段迁移完成!")
+    
+    except Exception as e:
+        print(f"迁移标签字段时出错: {str(e)}")
+
+if __name__ == "__main__":
+    migrate_recipe_tags()
@@ -0,0 +1,172 @@
+"""
+本地AI服务桩服务器
+
+模拟通义千问文本生成接口，用于在不调用付费API的情况下验证AI客户端的
+连接复用、并发限制和重试行为。用法:
+
+    python scripts/ai_stub_server.py --port 8765 --latency 0.2 --rate-limit-every 3
+    QWEN_API_BASE_URL=http://127.0.0.1:8765/generation uvicorn main:app
+
+请求头包含X-DashScope-SSE: enable时按SSE增量输出（每段--chunk-size个字符）。
+GET /stats 返回请求数、最大并发数、429/503次数和客户端建立的TCP连接数。
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import threading
+import time
+import uuid
+
+STUB_RECIPE = {
+    "title": "番茄炒蛋",
+    "description": "经典家常菜，酸甜可口",
+    "prep_time": 5,
+    "cooking_time": 10,
+    "servings": 2,
+    "difficulty": "easy",
+    "ingredients": [
+        {"name": "番茄", "quantity": 2, "unit": "个", "note": ""},
+        {"name": "鸡蛋", "quantity": 3, "unit": "个", "note": ""}
+    ],
+    "instructions": ["番茄切块，鸡蛋打散", "先炒鸡蛋盛出", "炒番茄出汁后倒入鸡蛋翻炒"],
+    "nutrition_info": {"calories": 320, "protein": 18, "carbs": 12, "fat": 20, "fiber": 2},
+    "tips": "番茄去皮口感更好",
+    "tags": ["家常菜", "快手菜"]
+}
+
+
+class StubStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+        self.connections = 0
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "max_in_flight": self.max_in_flight,
+                "rate_limited": self.rate_limited,
+                "server_errors": self.server_errors,
+                "connections": self.connections
+            }
+
+
+def make_handler(args, stats: StubStats):
+    class StubHandler(BaseHTTPRequestHandler):
+        # HTTP/1.1以支持keep-alive
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with stats.lock:
+                stats.connections += 1
+
+        def log_message(self, format, *log_args):
+            if args.verbose:
+                super().log_message(format, *log_args)
+
+        def _send_json(self, status: int, payload, headers=None):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_stream(self):
+            text = json.dumps(STUB_RECIPE, ensure_ascii=False, indent=2)
+            request_id = str(uuid.uuid4())
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            chunks = [text[i:i + args.chunk_size] for i in range(0, len(text), args.chunk_size)]
+            for number, chunk in enumerate(chunks, 1):
+                finish_reason = "stop" if number == len(chunks) else "null"
+                payload = json.dumps({
+                    "output": {"text": chunk, "finish_reason": finish_reason},
+                    "request_id": request_id
+                }, ensure_ascii=False)
+                event = f"id:{number}\nevent:result\n:HTTP_STATUS/200\ndata:{payload}\n\n".encode("utf-8")
+                self.wfile.write(f"{len(event):X}\r\n".encode("ascii") + event + b"\r\n")
+                self.wfile.flush()
+                time.sleep(args.chunk_latency)
+            self.wfile.write(b"0\r\n\r\n")
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send_json(200, stats.snapshot())
+            else:
+                self._send_json(404, {"message": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            self.rfile.read(length)
+
+            with stats.lock:
+                stats.requests += 1
+                number = stats.requests
+                stats.in_flight += 1
+                stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            try:
+                time.sleep(args.latency)
+                if args.rate_limit_every and number % args.rate_limit_every == 0:
+                    with stats.lock:
+                        stats.rate_limited += 1
+                    self._send_json(429, {"code": "Throttling", "message": "rate limited"},
+                                    {"Retry-After": str(args.retry_after)})
+                    return
+                if args.fail_every and number % args.fail_every == 0:
+                    with stats.lock:
+                        stats.server_errors += 1
+                    self._send_json(503, {"code": "ServiceUnavailable", "message": "stub failure"})
+                    return
+                if self.headers.get("X-DashScope-SSE") == "enable":
+                    self._send_stream()
+                    return
+                self._send_json(200, {
+                    "output": {"text": json.dumps(STUB_RECIPE, ensure_ascii=False), "finish_reason": "stop"},
+                    "usage": {"input_tokens": 100, "output_tokens": 200},
+                    "request_id": str(uuid.uuid4())
+                })
+            finally:
+                with stats.lock:
+                    stats.in_flight -= 1
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地AI服务桩服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.1, help="每个请求的模拟延迟（秒）")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="每N个请求返回一次429")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="429响应的Retry-After（秒）")
+    parser.add_argument("--fail-every", type=int, default=0, help="每N个请求返回一次503")
+    parser.add_argument("--chunk-size", type=int, default=16, help="流式输出每段的字符数")
+    parser.add_argument("--chunk-latency", type=float, default=0.01, help="流式输出每段之间的间隔（秒）")
+    parser.add_argument("--verbose", action="store_true", help="打印访问日志")
+    args = parser.parse_args()
+
+    stats = StubStats()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args, stats))
+    print(f"AI桩服务器运行在 http://{args.host}:{args.port}/generation")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"统计: {json.dumps(stats.snapshot(), ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
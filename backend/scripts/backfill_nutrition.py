@@ -0,0 +1,67 @@
+"""
+营养信息回填命令行工具
+
+为没有nutrition_info的食谱根据食材营养数据计算并写入营养信息，可由cron定期执行:
+    python scripts/backfill_nutrition.py --checkpoint nutrition_backfill.json --workers 4
+    python scripts/backfill_nutrition.py --recompute --checkpoint recompute.json
+
+中断后使用同一个检查点文件重新运行，会从最后一个连续完成的块之后继续。
+"""
+import argparse
+import os
+import sys
+
+# 允许从backend目录外运行
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.recipes.nutrition_backfill import NutritionBackfill
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="根据食材营养数据回填nutrition_info")
+    parser.add_argument("--chunk-size", type=int, default=settings.NUTRITION_BACKFILL_CHUNK_SIZE, help="每块处理的食谱数")
+    parser.add_argument("--workers", type=int, default=1, help="并行的工作进程数")
+    parser.add_argument("--checkpoint", help="检查点文件路径，用于中断后继续")
+    parser.add_argument("--recompute", action="store_true", help="重新计算全部食谱（只覆盖回填写入的营养信息）")
+    parser.add_argument("--max-chunks", type=int, help="最多处理的块数")
+    return parser.parse_args()
+
+
+def report(progress):
+    elapsed = progress["elapsed"]
+    rate = progress["run_scanned"] / elapsed if elapsed > 0 else 0
+    print(
+        f"累计扫描{progress['scanned']}个食谱，计算{progress['computed']}，写入{progress['written']}，"
+        f"{rate:.0f} 个/秒，检查点: {progress['last_recipe_id']}",
+        file=sys.stderr
+    )
+
+
+def main():
+    args = parse_args()
+    db = SessionLocal()
+    try:
+        backfill = NutritionBackfill(
+            db,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            recompute=args.recompute,
+            checkpoint_path=args.checkpoint,
+            progress_callback=report
+        )
+        result = backfill.run(max_chunks=args.max_chunks)
+        elapsed = result["elapsed"]
+        print(
+            f"营养信息回填完成: 累计扫描{result['scanned']}个食谱，写入{result['written']}条，"
+            f"{result['scanned'] - result['computed']}个食谱缺少食材营养数据；"
+            f"本次扫描{result['run_scanned']}个，耗时{elapsed:.1f}秒"
+        )
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
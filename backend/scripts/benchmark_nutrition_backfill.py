@@ -0,0 +1,127 @@
+"""
+营养信息回填基准测试
+
+用合成数据（默认20万个食谱、每个8~12种食材、2000种食材营养数据）比较回填中
+营养计算部分的吞吐量，不包括数据库读写:
+  1. 逐个食谱计算（每个食谱调用一次NutritionEngine.compute）
+  2. 按块计算（每块--chunk-size个食谱调用一次）
+  3. 按块分发到进程池（--workers指定的各进程数）
+
+用法:
+    python scripts/benchmark_nutrition_backfill.py --recipes 200000 --workers 1 2 4
+
+单核开发容器中的一次结果（20万个食谱，块大小1000）:
+    逐个计算      约 6,100 个/秒
+    按块计算      约 14,100 个/秒
+    进程池1个进程 约 12,300 个/秒（含进程间传输食谱数据的开销）
+    进程池2个进程 约 12,300 个/秒（只有一个CPU核，多进程没有收益）
+多核机器上的扩展性尚未测量；实际回填中每块还包括一次食材查询和一次批量写入。
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# 允许从backend目录外运行
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.recipes.nutrition import NUTRIENTS, IngredientProfile, NutritionEngine
+
+UNITS = ["g", "克", "ml", "勺", "小勺", "个", "片", "根", "适量"]
+
+# 工作进程中的食材营养数据（由initializer按相同种子生成）
+_profiles = None
+
+
+def generate_profiles(count: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    profiles = {}
+    for index in range(count):
+        vector = rng.gamma(2.0, 1.0, len(NUTRIENTS)) * np.array([100, 5, 10, 5, 1, 2, 100])
+        unit_grams = {"个": float(rng.integers(20, 300))} if index % 3 == 0 else {}
+        profiles[f"食材{index}"] = IngredientProfile(vector, unit_grams)
+    return profiles
+
+
+def generate_recipes(count: int, ingredients: int, seed: int = 7):
+    rng = random.Random(seed)
+    names = [f"食材{index}" for index in range(ingredients)]
+    # 常见食材被更多食谱使用
+    weights = [1.0 / (index + 1) ** 0.7 for index in range(ingredients)]
+    recipes = []
+    for _ in range(count):
+        chosen = rng.choices(names, weights=weights, k=rng.randint(8, 12))
+        recipes.append([
+            {"name": name, "quantity": rng.choice([1, 2, 3, 50, 100, 200, "1/2", "2-3"]), "unit": rng.choice(UNITS)}
+            for name in chosen
+        ])
+    return recipes
+
+
+def init_worker(ingredients: int):
+    global _profiles
+    _profiles = generate_profiles(ingredients)
+
+
+def compute_chunk(recipes):
+    return len(NutritionEngine.compute(recipes, _profiles))
+
+
+def chunked(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="营养信息回填基准测试")
+    parser.add_argument("--recipes", type=int, default=200_000, help="食谱数量")
+    parser.add_argument("--ingredients", type=int, default=2000, help="食材种类数")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="每块的食谱数")
+    parser.add_argument("--single-sample", type=int, default=20_000, help="逐个计算方式测量的食谱数")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="进程池大小")
+    args = parser.parse_args()
+
+    print(f"生成{args.recipes}个食谱（{args.ingredients}种食材）...")
+    profiles = generate_profiles(args.ingredients)
+    recipes = generate_recipes(args.recipes, args.ingredients)
+    chunks = chunked(recipes, args.chunk_size)
+
+    # 1. 逐个计算
+    sample = recipes[:args.single_sample]
+    started = time.perf_counter()
+    for recipe in sample:
+        NutritionEngine.compute([recipe], profiles)
+    elapsed = time.perf_counter() - started
+    print(f"逐个计算: {len(sample) / elapsed:,.0f} 个/秒")
+
+    # 2. 按块计算
+    started = time.perf_counter()
+    for chunk in chunks:
+        NutritionEngine.compute(chunk, profiles)
+    elapsed = time.perf_counter() - started
+    print(f"按块计算(块大小{args.chunk_size}): {len(recipes) / elapsed:,.0f} 个/秒")
+
+    # 3. 进程池
+    context = multiprocessing.get_context("spawn")
+    for workers in args.workers:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=init_worker,
+            initargs=(args.ingredients,)
+        ) as pool:
+            # 预热：确保所有工作进程已启动并生成食材数据
+            list(pool.map(compute_chunk, chunks[:workers]))
+            started = time.perf_counter()
+            total = sum(pool.map(compute_chunk, chunks))
+            elapsed = time.perf_counter() - started
+        print(f"进程池({workers}个进程): {total / elapsed:,.0f} 个/秒")
+    print(f"CPU核数: {os.cpu_count()}")
+
+
+if __name__ == "__main__":
+    main()
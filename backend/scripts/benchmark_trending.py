@@ -0,0 +1,112 @@
+"""
+趋势排行基准测试
+
+用合成的收藏事件（默认100万条，分布在30天、5万个食谱上）比较:
+  1. 每次请求临时扫描全部事件计算衰减分数再取前k名（即时扫描）
+  2. TrendingIndex全量重建、增量刷新和读取前k名的耗时
+
+事件聚合在Python中完成，代替生产环境中数据库里的GROUP BY。
+用法:
+    python scripts/benchmark_trending.py --events 1000000 --reads 100000
+"""
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+import argparse
+import heapq
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+# 允许从backend目录外运行
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.recipes.trending import FAVORITE_WEIGHT, TRENDING_WINDOWS, TrendingIndex
+
+
+def generate_events(count: int, recipes: int, now: datetime, span: timedelta, seed: int = 42):
+    """
+    生成(recipe_id, created_at)事件，食谱热度服从长尾分布
+    """
+    rng = random.Random(seed)
+    recipe_ids = [f"recipe-{i}" for i in range(recipes)]
+    weights = [1.0 / (i + 1) ** 0.8 for i in range(recipes)]
+    chosen = rng.choices(recipe_ids, weights=weights, k=count)
+    span_seconds = span.total_seconds()
+    return [(recipe_id, now - timedelta(seconds=rng.random() * span_seconds)) for recipe_id in chosen]
+
+
+def aggregate(events, window, since: datetime, now: datetime):
+    """
+    按食谱聚合(since, now]之间事件的衰减分数
+    """
+    scores = {}
+    rate = window.decay_rate
+    for recipe_id, created_at in events:
+        if since < created_at <= now:
+            age = (now - created_at).total_seconds()
+            scores[recipe_id] = scores.get(recipe_id, 0.0) + FAVORITE_WEIGHT * math.exp(-rate * age)
+    return scores
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="趋势排行基准测试")
+    parser.add_argument("--events", type=int, default=1_000_000, help="收藏事件数量")
+    parser.add_argument("--recipes", type=int, default=50_000, help="食谱数量")
+    parser.add_argument("--window", default="7d", choices=sorted(TRENDING_WINDOWS), help="时间窗口")
+    parser.add_argument("--limit", type=int, default=20, help="每次读取的数量")
+    parser.add_argument("--reads", type=int, default=100_000, help="读取次数")
+    parser.add_argument("--scan-reads", type=int, default=3, help="即时扫描方式的读取次数")
+    parser.add_argument("--new-events", type=int, default=5_000, help="增量刷新的新事件数量")
+    args = parser.parse_args()
+
+    window = TRENDING_WINDOWS[args.window]
+    now = datetime.now(timezone.utc)
+    print(f"生成{args.events}条收藏事件（{args.recipes}个食谱，30天）...")
+    events = generate_events(args.events, args.recipes, now, timedelta(days=30))
+
+    # 1. 即时扫描
+    scan_samples = []
+    for _ in range(args.scan_reads):
+        started = time.perf_counter()
+        scores = aggregate(events, window, now - window.span, now)
+        heapq.nlargest(args.limit, scores.items(), key=itemgetter(1))
+        scan_samples.append(time.perf_counter() - started)
+    print(f"即时扫描: 每次读取 {statistics.mean(scan_samples) * 1000:.1f} ms")
+
+    # 2. 全量重建
+    index = TrendingIndex(window)
+    started = time.perf_counter()
+    index.rebuild(aggregate(events, window, now - window.span, now), now)
+    print(f"全量重建: {(time.perf_counter() - started) * 1000:.1f} ms（{len(index.scores)}个食谱有分数）")
+
+    # 3. 增量刷新
+    later = now + timedelta(minutes=1)
+    new_events = generate_events(args.new_events, args.recipes, later, timedelta(minutes=1), seed=7)
+    started = time.perf_counter()
+    index.apply(aggregate(new_events, window, now, later), later)
+    print(f"增量刷新({args.new_events}条新事件): {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    # 4. 读取前k名
+    samples = []
+    for i in range(args.reads):
+        skip = (i % 5) * args.limit
+        started = time.perf_counter()
+        index.top(args.limit, skip)
+        samples.append(time.perf_counter() - started)
+    print(
+        f"读取前{args.limit}名({args.reads}次): "
+        f"p50 {percentile(samples, 0.50) * 1e6:.1f} µs, "
+        f"p99 {percentile(samples, 0.99) * 1e6:.1f} µs"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+AI客户端重试与连接复用检查
+
+在进程内启动scripts/ai_stub_server.py的桩服务器，对AIClient的请求逻辑做自动检查，
+任一检查失败时以非零状态码退出:
+  1. 持续返回429时共请求QWEN_MAX_RETRIES+1次后抛出RateLimitError，
+     每次等待不短于Retry-After且按指数退避增长
+  2. 持续返回503时同样重试后抛出APIConnectionError，等待时间按指数退避增长
+  3. 间歇性429/503下并发请求全部成功，始终使用同一个httpx.AsyncClient，
+     TCP连接数不超过并发上限
+
+用法:
+    python scripts/check_ai_client_retries.py
+"""
+from http.server import ThreadingHTTPServer
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import threading
+
+# 允许从backend目录外运行
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# 缩短退避时间，在读取配置之前设置
+os.environ.setdefault("QWEN_MAX_RETRIES", "3")
+os.environ.setdefault("QWEN_RETRY_BACKOFF_BASE", "0.02")
+os.environ.setdefault("QWEN_RETRY_BACKOFF_MAX", "0.5")
+os.environ.setdefault("QWEN_MAX_CONCURRENCY", "3")
+
+from app.ai_service.ai_client import AIClient
+from app.ai_service.exceptions import APIConnectionError, RateLimitError
+from scripts.ai_stub_server import StubStats, make_handler
+
+RETRY_AFTER = 0.05
+
+
+class RecordingAIClient(AIClient):
+    """
+    记录每次重试等待时间的AI客户端
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.delays = []
+
+    def _retry_delay(self, attempt, retry_after=None):
+        delay = super()._retry_delay(attempt, retry_after)
+        self.delays.append(delay)
+        return delay
+
+
+class StubServer:
+    """
+    在后台线程中运行的桩服务器，监听随机端口
+    """
+
+    def __init__(self, rate_limit_every: int = 0, fail_every: int = 0):
+        args = argparse.Namespace(
+            latency=0.01, rate_limit_every=rate_limit_every, retry_after=RETRY_AFTER,
+            fail_every=fail_every, chunk_size=16, chunk_latency=0.0, verbose=False
+        )
+        self.stats = StubStats()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args, self.stats))
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/generation"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def check_backoff(client: RecordingAIClient, minimum: float = 0.0) -> None:
+    settings = client.settings
+    assert len(client.delays) == settings.QWEN_MAX_RETRIES, f"重试次数为{len(client.delays)}"
+    for attempt, delay in enumerate(client.delays):
+        backoff = min(settings.QWEN_RETRY_BACKOFF_MAX, settings.QWEN_RETRY_BACKOFF_BASE * (2 ** attempt))
+        low = max(backoff / 2, minimum)
+        high = max(backoff, minimum)
+        assert low <= delay <= high, f"第{attempt + 1}次重试等待{delay:.3f}秒，应在[{low:.3f}, {high:.3f}]内"
+
+
+async def check_persistent_failure(label: str, expected_error, minimum: float, **stub_options) -> None:
+    client = RecordingAIClient()
+    with StubServer(**stub_options) as stub:
+        client.api_base_url = stub.url
+        try:
+            await client._make_async_request({"input": {}})
+        except expected_error:
+            pass
+        else:
+            raise AssertionError(f"{label}: 未抛出{expected_error.__name__}")
+        finally:
+            await client.shutdown()
+        requests = stub.stats.snapshot()["requests"]
+
+    attempts = client.settings.QWEN_MAX_RETRIES + 1
+    assert requests == attempts, f"{label}: 请求{requests}次，应为{attempts}次"
+    check_backoff(client, minimum)
+    print(f"{label}: 请求{requests}次，等待 " + ", ".join(f"{delay:.3f}s" for delay in client.delays))
+
+
+async def check_connection_reuse(calls: int = 12) -> None:
+    client = RecordingAIClient()
+    with StubServer(rate_limit_every=4, fail_every=5) as stub:
+        client.api_base_url = stub.url
+        await client.startup()
+        http_client = client._get_http_client()
+        try:
+            results = await asyncio.gather(*(client._make_async_request({"input": {}}) for _ in range(calls)))
+            assert client._get_http_client() is http_client, "请求过程中HTTP客户端被替换"
+        finally:
+            await client.shutdown()
+        stats = stub.stats.snapshot()
+
+    concurrency = client.settings.QWEN_MAX_CONCURRENCY
+    assert len(results) == calls and all("output" in result for result in results), "并发请求未全部成功"
+    assert stats["rate_limited"] and stats["server_errors"], "桩服务器未返回429/503"
+    assert stats["max_in_flight"] <= concurrency, f"同时进行{stats['max_in_flight']}个请求，超过上限{concurrency}"
+    assert stats["connections"] <= concurrency, f"建立了{stats['connections']}个连接，超过上限{concurrency}"
+    print(
+        f"间歇失败: {calls}个调用全部成功，共请求{stats['requests']}次"
+        f"（429 {stats['rate_limited']}次，503 {stats['server_errors']}次），"
+        f"最大并发{stats['max_in_flight']}，TCP连接{stats['connections']}个"
+    )
+
+
+async def run() -> None:
+    await check_persistent_failure("持续429", RateLimitError, RETRY_AFTER, rate_limit_every=1)
+    await check_persistent_failure("持续503", APIConnectionError, 0.0, fail_every=1)
+    await check_connection_reuse()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI客户端重试与连接复用检查")
+    parser.add_argument("--verbose", action="store_true", help="打印AI客户端日志")
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.getLogger("app.ai_service").setLevel(logging.CRITICAL)
+
+    try:
+        asyncio.run(run())
+    except AssertionError as e:
+        print(f"检查失败: {e}")
+        sys.exit(1)
+    print("全部检查通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+食谱批量导入命令行工具
+
+用法:
+    python scripts/import_recipes.py recipes.ndjson --author admin
+    cat recipes.ndjson | python scripts/import_recipes.py - --author admin --errors errors.ndjson
+
+输入文件每行一个RecipeCreate格式的JSON对象，数据按块通过COPY写入。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# 允许从backend目录外运行
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.user import User
+from app.recipes.bulk_import import BulkImportResult, RecipeBulkImporter
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="从NDJSON文件批量导入食谱")
+    parser.add_argument("path", help="NDJSON文件路径，使用 - 从标准输入读取")
+    parser.add_argument("--author", required=True, help="食谱作者的用户名")
+    parser.add_argument("--chunk-size", type=int, default=settings.BULK_IMPORT_CHUNK_SIZE, help="每块写入的食谱数")
+    parser.add_argument("--max-errors", type=int, default=100000, help="保留的逐行错误上限")
+    parser.add_argument("--errors", help="将逐行错误以NDJSON格式写入该文件")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    db = SessionLocal()
+    try:
+        author = db.query(User).filter(User.username == args.author).first()
+        if not author:
+            print(f"用户不存在: {args.author}", file=sys.stderr)
+            return 1
+
+        started = time.perf_counter()
+
+        def report(result: BulkImportResult):
+            elapsed = time.perf_counter() - started
+            rate = result.imported / elapsed if elapsed > 0 else 0
+            print(
+                f"第{result.chunks}块: 已处理{result.total}行，成功{result.imported}，"
+                f"失败{result.failed}，{rate:.0f} 条/秒",
+                file=sys.stderr
+            )
+
+        importer = RecipeBulkImporter(
+            db,
+            author.user_id,
+            chunk_size=args.chunk_size,
+            max_errors=args.max_errors,
+            progress_callback=report
+        )
+
+        source = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+        try:
+            for line_no, line in enumerate(source, start=1):
+                if importer.add(line_no, line):
+                    importer.flush()
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+        result = importer.finish()
+
+        if args.errors:
+            with open(args.errors, "w", encoding="utf-8") as f:
+                for error in result.errors:
+                    f.write(json.dumps(error, ensure_ascii=False) + "\n")
+
+        elapsed = time.perf_counter() - started
+        print(
+            f"导入完成: 共{result.total}行，成功{result.imported}，失败{result.failed}，"
+            f"耗时{elapsed:.1f}秒"
+        )
+        if result.errors_truncated:
+            print(f"错误数量超过{args.max_errors}，仅保留前{args.max_errors}条", file=sys.stderr)
+        return 0 if result.failed == 0 else 2
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
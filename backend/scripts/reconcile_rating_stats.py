@@ -0,0 +1,31 @@
+"""
+评分聚合对账任务
+
+根据ratings表重建recipes.rating_count/rating_sum，修正增量维护中
+可能出现的偏差（如直接在数据库中删除评分）。可由cron定期执行:
+    python scripts/reconcile_rating_stats.py
+"""
+import os
+import sys
+import time
+
+# 允许从backend目录外运行
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.database import SessionLocal
+from app.recipes.services import RecipeService
+
+
+def main():
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        fixed = RecipeService.reconcile_rating_stats(db)
+        print(f"评分聚合对账完成: 修正{fixed}个食谱，耗时{time.perf_counter() - started:.1f}秒")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+常见食材营养数据初始化
+
+把常见食材每100克可食部分的营养数据（参考《中国食物成分表》，取近似值）
+写入ingredients.nutrition_data，营养计算时这些食材不再需要调用AI服务估算。
+默认只填充营养数据为空的食材，--force覆盖已有数据:
+    python scripts/seed_ingredient_nutrition.py [--force]
+"""
+import argparse
+import os
+import sys
+
+# 允许从backend目录外运行
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.database import SessionLocal
+from app.recipes.nutrition import NUTRIENTS, nutrition_engine, to_nutrition_data
+
+# 名称: (卡路里, 蛋白质, 碳水化合物, 脂肪, 膳食纤维, 糖, 钠(毫克), 计数单位克数)
+SEED_NUTRITION = {
+    "大米": (346, 7.4, 77.9, 0.8, 0.7, 0.3, 3.8, {}),
+    "米饭": (116, 2.6, 25.9, 0.3, 0.3, 0.1, 2.5, {"碗": 200}),
+    "面粉": (362, 11.2, 73.6, 1.5, 2.1, 0.3, 3.1, {}),
+    "面条": (286, 8.3, 61.9, 0.7, 0.8, 0.5, 28.0, {"把": 100}),
+    "馒头": (223, 7.0, 47.0, 1.1, 1.3, 1.0, 165.0, {"个": 100}),
+    "燕麦": (377, 15.0, 66.9, 6.7, 5.3, 1.0, 3.7, {}),
+    "玉米": (112, 4.0, 22.8, 1.2, 2.9, 3.2, 1.1, {"根": 250}),
+    "土豆": (77, 2.0, 17.2, 0.2, 0.7, 0.8, 2.7, {"个": 200}),
+    "红薯": (99, 1.1, 24.7, 0.2, 1.6, 4.2, 28.5, {"个": 250}),
+    "鸡蛋": (144, 13.3, 2.8, 8.8, 0.0, 0.2, 131.5, {"个": 50, "枚": 50, "只": 50}),
+    "鸡胸肉": (133, 19.4, 2.5, 5.0, 0.0, 0.0, 34.4, {"块": 200}),
+    "鸡腿": (181, 16.0, 0.0, 13.0, 0.0, 0.0, 64.4, {"只": 150, "个": 150}),
+    "猪肉": (395, 13.2, 2.4, 37.0, 0.0, 0.0, 59.4, {}),
+    "猪里脊": (155, 20.2, 0.7, 7.9, 0.0, 0.0, 43.2, {}),
+    "排骨": (278, 16.7, 0.7, 23.1, 0.0, 0.0, 62.6, {"块": 40}),
+    "牛肉": (125, 19.9, 2.0, 4.2, 0.0, 0.0, 84.2, {}),
+    "羊肉": (203, 19.0, 0.0, 14.1, 0.0, 0.0, 80.6, {}),
+    "虾": (93, 18.6, 2.8, 0.8, 0.0, 0.0, 165.2, {"只": 15, "个": 15}),
+    "三文鱼": (139, 17.2, 0.0, 7.8, 0.0, 0.0, 63.3, {"块": 150}),
+    "鲈鱼": (105, 18.6, 0.0, 3.4, 0.0, 0.0, 144.1, {"条": 500}),
+    "豆腐": (84, 6.6, 3.4, 5.3, 0.4, 0.6, 3.1, {"块": 300}),
+    "牛奶": (54, 3.0, 3.4, 3.2, 0.0, 3.4, 37.2, {"盒": 250}),
+    "番茄": (19, 0.9, 4.0, 0.2, 0.5, 2.6, 5.0, {"个": 150}),
+    "黄瓜": (16, 0.8, 2.9, 0.2, 0.5, 1.7, 4.9, {"根": 200}),
+    "胡萝卜": (39, 1.0, 8.8, 0.2, 1.1, 4.7, 71.4, {"根": 120}),
+    "洋葱": (40, 1.1, 9.0, 0.2, 0.9, 4.2, 4.4, {"个": 200}),
+    "青椒": (22, 1.0, 5.4, 0.2, 1.4, 2.4, 3.3, {"个": 100}),
+    "西兰花": (36, 4.1, 4.3, 0.6, 1.6, 1.5, 18.8, {"颗": 400}),
+    "白菜": (18, 1.5, 3.2, 0.1, 0.8, 1.6, 57.5, {"颗": 1000}),
+    "菠菜": (28, 2.6, 4.5, 0.3, 1.7, 0.4, 85.2, {"把": 250}),
+    "香菇": (26, 2.2, 5.2, 0.3, 3.3, 0.2, 1.4, {"朵": 15, "个": 15}),
+    "大蒜": (128, 4.5, 27.6, 0.2, 1.1, 1.0, 19.6, {"瓣": 5, "头": 50}),
+    "生姜": (46, 1.3, 10.3, 0.6, 2.7, 1.7, 14.9, {"片": 3, "块": 20}),
+    "葱": (27, 1.7, 6.5, 0.3, 1.3, 2.0, 4.8, {"根": 15, "段": 5}),
+    "苹果": (53, 0.4, 13.7, 0.2, 1.7, 10.4, 1.3, {"个": 200}),
+    "香蕉": (93, 1.4, 22.0, 0.2, 1.2, 12.2, 0.8, {"根": 120}),
+    "花生": (574, 24.8, 21.7, 44.3, 5.5, 4.0, 3.6, {}),
+    "食用油": (899, 0.0, 0.0, 99.9, 0.0, 0.0, 0.0, {}),
+    "橄榄油": (899, 0.0, 0.0, 99.9, 0.0, 0.0, 0.0, {}),
+    "芝麻油": (898, 0.0, 0.0, 99.7, 0.0, 0.0, 1.1, {}),
+    "黄油": (888, 1.4, 0.0, 98.0, 0.0, 0.0, 40.3, {}),
+    "酱油": (63, 5.6, 10.1, 0.1, 0.2, 3.0, 5757.0, {}),
+    "醋": (31, 2.1, 4.9, 0.3, 0.0, 0.9, 262.1, {}),
+    "盐": (0, 0.0, 0.0, 0.0, 0.0, 0.0, 39311.0, {}),
+    "白糖": (400, 0.0, 99.9, 0.0, 0.0, 99.9, 2.0, {}),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常见食材营养数据初始化")
+    parser.add_argument("--force", action="store_true", help="覆盖已有的营养数据")
+    args = parser.parse_args()
+
+    nutrition_data = {}
+    for name, (*values, unit_grams) in SEED_NUTRITION.items():
+        record = dict(zip(NUTRIENTS, values))
+        record["unit_grams"] = unit_grams
+        nutrition_data[name] = to_nutrition_data(record, "seed")
+
+    db = SessionLocal()
+    try:
+        written = nutrition_engine.store_profiles(db, nutrition_data, overwrite=args.force, create_missing=True)
+        print(f"食材营养数据初始化完成: 写入{written}种，跳过{len(nutrition_data) - written}种已有数据的食材")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())